@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Faturamento, GrupoConta, ContaPagar
+from .models import (
+    Faturamento, GrupoConta, ContaPagar, Notificacao, RegistroAlerta, OcorrenciaLembrete, ContratoIXC,
+    ConciliacaoIXC, DivergenciaConciliacao,
+)
 
 # Register your models here.
 
@@ -10,4 +13,55 @@ class FaturamentoAdmin(admin.ModelAdmin):
     search_fields = ['observacao']
     date_hierarchy = 'mes_referencia'
 
-admin.site.register(ContaPagar)
\ No newline at end of file
+admin.site.register(ContaPagar)
+
+
+@admin.register(Notificacao)
+class NotificacaoAdmin(admin.ModelAdmin):
+    list_display = ['template', 'destinatario', 'estado', 'tentativas', 'proxima_tentativa', 'enviado_em']
+    list_filter = ['estado', 'template']
+    search_fields = ['destinatario', 'chave_deduplicacao']
+
+
+@admin.register(RegistroAlerta)
+class RegistroAlertaAdmin(admin.ModelAdmin):
+    list_display = ['conta', 'tipo', 'data_vencimento', 'criado_em']
+    list_filter = ['tipo']
+    date_hierarchy = 'data_vencimento'
+
+
+@admin.register(OcorrenciaLembrete)
+class OcorrenciaLembreteAdmin(admin.ModelAdmin):
+    list_display = ['conta', 'tipo', 'data', 'data_vencimento', 'processado_em']
+    list_filter = ['tipo']
+    date_hierarchy = 'data'
+
+
+@admin.register(ContratoIXC)
+class ContratoIXCAdmin(admin.ModelAdmin):
+    list_display = ['id_ixc', 'id_cliente', 'descricao', 'status', 'ultima_atualizacao', 'sincronizado_em']
+    list_filter = ['status']
+    search_fields = ['id_ixc', 'id_cliente', 'descricao']
+
+
+class DivergenciaConciliacaoInline(admin.TabularInline):
+    model = DivergenciaConciliacao
+    fields = ['tipo', 'contrato', 'conta', 'cpf_cnpj', 'nome_razao', 'valor_ixc', 'valor_conta', 'dia_vencimento_ixc', 'data_vencimento_conta']
+    readonly_fields = fields
+    can_delete = False
+    extra = 0
+
+
+@admin.register(ConciliacaoIXC)
+class ConciliacaoIXCAdmin(admin.ModelAdmin):
+    list_display = ['iniciado_em', 'concluido_em', 'contratos', 'contas', 'conciliados', 'divergencias']
+    date_hierarchy = 'iniciado_em'
+    inlines = [DivergenciaConciliacaoInline]
+
+
+@admin.register(DivergenciaConciliacao)
+class DivergenciaConciliacaoAdmin(admin.ModelAdmin):
+    list_display = ['conciliacao', 'tipo', 'cpf_cnpj', 'nome_razao', 'valor_ixc', 'valor_conta', 'dia_vencimento_ixc', 'data_vencimento_conta']
+    list_filter = ['tipo', 'conciliacao']
+    search_fields = ['cpf_cnpj', 'nome_razao']
+    raw_id_fields = ['contrato', 'conta']
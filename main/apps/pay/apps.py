@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PayConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main.apps.pay'
+
+    def ready(self):
+        from . import signals  # noqa: F401
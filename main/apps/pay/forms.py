@@ -5,7 +5,11 @@ from .models import GrupoConta, ContaPagar, Faturamento  # ajuste se o nome do m
 class GrupoContaForm(forms.ModelForm):
     class Meta:
         model = GrupoConta
-        fields = ['nome', 'descricao', 'ativo']
+        fields = [
+            'nome', 'descricao', 'ativo', 'lembretes_dias_antes', 'lembrete_atraso_dias', 'mensagem_confirmacao',
+            'mensagem_alerta_prox_vencer', 'mensagem_alerta_vence_hoje', 'mensagem_lembrete_antes',
+            'mensagem_lembrete_atraso',
+        ]
         widgets = {
             'nome': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -18,6 +22,34 @@ class GrupoContaForm(forms.ModelForm):
             }),
             'ativo': forms.CheckboxInput(attrs={
                 'class': 'form-check-input'
+            }),
+            'lembretes_dias_antes': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'Ex.: 7,3,1'
+            }),
+            'lembrete_atraso_dias': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'min': 0
+            }),
+            'mensagem_confirmacao': forms.Textarea(attrs={
+                'class': 'form-control',
+                'rows': 4
+            }),
+            'mensagem_alerta_prox_vencer': forms.Textarea(attrs={
+                'class': 'form-control',
+                'rows': 4
+            }),
+            'mensagem_alerta_vence_hoje': forms.Textarea(attrs={
+                'class': 'form-control',
+                'rows': 4
+            }),
+            'mensagem_lembrete_antes': forms.Textarea(attrs={
+                'class': 'form-control',
+                'rows': 4
+            }),
+            'mensagem_lembrete_atraso': forms.Textarea(attrs={
+                'class': 'form-control',
+                'rows': 4
             })
         }
 
@@ -0,0 +1,149 @@
+import math
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.utils import timezone
+from main.apps.pay.models import ContaPagar, GrupoConta, Notificacao
+from main.apps.pay.tasks import despachar_notificacoes, processar_agenda_status
+from main.celery import app
+from main.src.agents.evolution_fake import ServidorEvolutionFake
+
+
+INSTANCIA_BENCHMARK = 'benchmark'
+
+
+def percentil(valores, p):
+    """Percentil `p` (0 a 100) pelo método do posto mais próximo."""
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o pipeline de alertas (agenda de status -> outbox -> envio) contra um servidor '
+        'Evolution fake local. Roda em um banco de teste criado e apagado pelo próprio comando '
+        '(como o manage.py test) e com cache em memória: o banco, as travas e o Redis de produção '
+        'não são usados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contas', type=int, default=1000, help='Quantidade de contas criadas para o teste')
+        parser.add_argument('--destinatarios', type=int, default=0, help='Números distintos entre as contas (0 = um por conta)')
+        parser.add_argument('--latencia', type=float, default=0.05, help='Latência do servidor fake, em segundos')
+        parser.add_argument('--variacao', type=float, default=0.0, help='Variação aleatória (±) da latência, em segundos')
+        parser.add_argument('--taxa-erro', type=float, default=0.0, help='Fração de envios respondidos com erro 500 (0 a 1)')
+        parser.add_argument('--limite', type=int, default=0, help='Requisições por segundo aceitas pelo servidor fake antes do 429 (0 = sem limite)')
+        parser.add_argument('--rate-limit', type=float, default=0, help='Mensagens por segundo enviadas pelo cliente (0 = sem limite)')
+
+    def _criar_contas(self, quantidade, destinatarios, hoje):
+        grupo = GrupoConta.objects.create(nome=f'Benchmark {timezone.now():%Y-%m-%d %H:%M:%S}')
+        destinatarios = destinatarios or quantidade
+        contas = []
+        for i in range(quantidade):
+            numero = f'+55219{i % destinatarios:08d}'
+            contas.append(ContaPagar(
+                nome_conta=f'Conta benchmark {i}',
+                grupo_conta=grupo,
+                fixo_variado='fixo',
+                recorrencia='mensal',
+                valor=Decimal('100.00'),
+                # Entra em 'Próximo a Vencer' na agenda de hoje e gera um alerta
+                data_vencimento=hoje + timedelta(days=1),
+                alertar_dias_antes=3,
+                whatsapp_contato_alerta=numero,
+                whatsapp_alerta_e164=numero,
+                status='em_dia',
+                proxima_verificacao=hoje,
+            ))
+        ContaPagar.objects.bulk_create(contas, batch_size=1000)
+        return grupo
+
+    def handle(self, *args, **options):
+        hoje = timezone.now().date()
+        servidor = ServidorEvolutionFake(
+            latencia=options['latencia'],
+            variacao=options['variacao'],
+            taxa_erro=options['taxa_erro'],
+            limite_por_segundo=options['limite'],
+        )
+        instancia = {
+            'name': INSTANCIA_BENCHMARK,
+            'key': INSTANCIA_BENCHMARK,
+            'peso': 1,
+            'rate_limit': options['rate_limit'],
+        }
+        configuracao = override_settings(
+            EVOLUTION_API_URL=servidor.url,
+            EVOLUTION_INSTANCIAS=[instancia],
+            INSTANCE_NAME=INSTANCIA_BENCHMARK,
+            INSTANCE_KEY=INSTANCIA_BENCHMARK,
+            # Travas, limites de taxa e circuitos fora do Redis de produção
+            CACHE_REDIS_URL=None,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        )
+
+        # Tasks executadas no próprio processo (o chord do despacho inclusive)
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        nome_banco = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with servidor, configuracao:
+                cache.clear()
+                # Transação desfeita ao final: os despachos agendados no commit não rodam durante a medição
+                with transaction.atomic():
+                    grupo = self._criar_contas(options['contas'], options['destinatarios'], hoje)
+
+                    with CaptureQueriesContext(connection) as consultas_agenda:
+                        inicio = time.perf_counter()
+                        resultado_agenda = processar_agenda_status()
+                        duracao_agenda = time.perf_counter() - inicio
+
+                    with CaptureQueriesContext(connection) as consultas_envio:
+                        inicio = time.perf_counter()
+                        resultado_envio = despachar_notificacoes()
+                        duracao_envio = time.perf_counter() - inicio
+
+                    notificacoes = Notificacao.objects.filter(conta__grupo_conta=grupo)
+                    enviadas = list(
+                        notificacoes.filter(estado='enviado').values_list('criado_em', 'enviado_em')
+                    )
+                    falhas = notificacoes.exclude(estado='enviado').count()
+
+                    transaction.set_rollback(True)
+        finally:
+            app.conf.task_always_eager = eager
+            connection.creation.destroy_test_db(nome_banco, verbosity=0)
+            teardown_test_environment()
+
+        entrega = [(enviado_em - criado_em).total_seconds() for criado_em, enviado_em in enviadas]
+        http = servidor.duracoes
+        mensagens = servidor.contadores.get('message/sendText', 0)
+
+        self.stdout.write(f'Agenda: {resultado_agenda}')
+        self.stdout.write(f'Despacho: {resultado_envio}')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Resultado ({options["contas"]} contas):\n'
+                f'- {len(enviadas)} notificações enviadas, {falhas} não enviadas\n'
+                f'- {mensagens} mensagens recebidas pelo servidor fake '
+                f'({servidor.contadores.get("429", 0)} respostas 429, {servidor.contadores.get("500", 0)} respostas 500)\n'
+                f'- Vazão do envio: {mensagens / duracao_envio if duracao_envio else 0:.1f} mensagens/s '
+                f'({duracao_envio:.2f}s de envio, {duracao_agenda:.2f}s de agenda)\n'
+                f'- Latência das requisições no servidor fake: p50 {percentil(http, 50) * 1000:.1f} ms, p99 {percentil(http, 99) * 1000:.1f} ms\n'
+                f'- Latência de entrega (outbox -> enviado): p50 {percentil(entrega, 50):.2f}s, '
+                f'p99 {percentil(entrega, 99):.2f}s\n'
+                f'- Consultas ao banco: {len(consultas_agenda)} na agenda, {len(consultas_envio)} no envio '
+                f'({len(consultas_envio) / max(mensagens, 1):.2f} por mensagem)'
+            )
+        )
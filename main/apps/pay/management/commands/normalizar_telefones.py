@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from main.apps.pay.models import ContaPagar
+from main.apps.pay.services.jobs import JobEmLotes
+from main.apps.pay.services.telefones import CAMPOS_TELEFONE, normalizar_e164
+
+
+class JobNormalizarTelefones(JobEmLotes):
+    campos = ('id', *CAMPOS_TELEFONE)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.invalidos = 0
+
+    def queryset(self):
+        return ContaPagar.objects.all()
+
+    def processar_lote(self, registros):
+        contas = []
+        for registro in registros:
+            conta = ContaPagar(id=registro['id'])
+            for campo, campo_e164 in CAMPOS_TELEFONE.items():
+                valor = normalizar_e164(registro[campo])
+                if registro[campo] and not valor:
+                    self.invalidos += 1
+                setattr(conta, campo_e164, valor)
+            contas.append(conta)
+        ContaPagar.objects.bulk_update(contas, list(CAMPOS_TELEFONE.values()))
+
+
+class Command(BaseCommand):
+    help = 'Preenche os números de WhatsApp normalizados (E.164) de todas as contas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Contas por lote')
+
+    def handle(self, *args, **options):
+        job = JobNormalizarTelefones('normalizar_telefones', tamanho_lote=options['lote'])
+        execucao = job.executar()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{execucao.registros} contas normalizadas em {execucao.lotes} lotes '
+                f'({job.invalidos} números inválidos ficaram sem versão normalizada)'
+            )
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from main.apps.pay.services.busca import reconstruir_indice_busca
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói a tabela de busca (FTS5) das contas no SQLite'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write('No PostgreSQL os índices trigram são mantidos pelo próprio banco.')
+            return
+
+        reconstruir_indice_busca(connection)
+        self.stdout.write(self.style.SUCCESS('Índice de busca das contas reconstruído.'))
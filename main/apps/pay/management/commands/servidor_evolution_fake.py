@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from main.src.agents.evolution_fake import ServidorEvolutionFake
+
+
+class Command(BaseCommand):
+    help = 'Sobe um servidor local que imita a Evolution API (aponte EVOLUTION_API_URL para ele)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Endereço de escuta')
+        parser.add_argument('--porta', type=int, default=8081, help='Porta de escuta')
+        parser.add_argument('--latencia', type=float, default=0.05, help='Latência de cada resposta, em segundos')
+        parser.add_argument('--variacao', type=float, default=0.0, help='Variação aleatória (±) da latência, em segundos')
+        parser.add_argument('--taxa-erro', type=float, default=0.0, help='Fração das mensagens respondidas com erro 500 (0 a 1)')
+        parser.add_argument('--limite', type=int, default=0, help='Requisições por segundo por instância antes de responder 429 (0 = sem limite)')
+        parser.add_argument('--estado', default='open', help="Estado da conexão informado em connectionState ('open', 'close', ...)")
+
+    def handle(self, *args, **options):
+        servidor = ServidorEvolutionFake(
+            host=options['host'],
+            porta=options['porta'],
+            latencia=options['latencia'],
+            variacao=options['variacao'],
+            taxa_erro=options['taxa_erro'],
+            limite_por_segundo=options['limite'],
+            estado=options['estado'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Evolution fake em {servidor.url} (Ctrl+C para parar)'))
+        try:
+            servidor.servir()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.parar()
+            self.stdout.write(f'Requisições atendidas: {servidor.contadores}')
@@ -1,47 +1,37 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from apps.pay.models import ContaPagar
+from main.apps.pay.services.status import atualizar_status_contas, TRAVA_STATUS
+from main.apps.pay.services.travas import trava_execucao
 
 
 class Command(BaseCommand):
     help = 'Verifica e atualiza o status das contas conforme proximidade do vencimento'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--espera',
+            type=float,
+            default=0,
+            help='Segundos para aguardar caso os jobs de status já estejam em execução',
+        )
+
     def handle(self, *args, **options):
         hoje = timezone.now().date()
         
-        # Atualizar para 'Próximo a Vencer'
-        contas_em_dia = ContaPagar.objects.filter(
-            status='em_dia',
-            pago=False
-        )
-        
-        contas_prox_vencer = 0
-        for conta in contas_em_dia:
-            dias_ate_vencimento = (conta.data_vencimento - hoje).days
+        with trava_execucao(TRAVA_STATUS, espera=options['espera']) as adquirida:
+            if not adquirida:
+                self.stdout.write(self.style.WARNING('Atualização de status já em andamento, nada foi feito'))
+                return
             
-            if dias_ate_vencimento <= conta.alertar_dias_antes and dias_ate_vencimento > 0:
-                conta.status = 'prox_vencer'
-                conta.save(update_fields=['status', 'atualizado_em'])
-                contas_prox_vencer += 1
-        
-        # Atualizar para 'Vence Hoje'
-        contas_vence_hoje = ContaPagar.objects.filter(
-            data_vencimento=hoje,
-            pago=False,
-            status__in=['em_dia', 'prox_vencer']
-        ).update(status='vence_hoje')
-        
-        # Atualizar para 'Em Atraso'
-        contas_atrasadas = ContaPagar.objects.filter(
-            data_vencimento__lt=hoje,
-            pago=False
-        ).exclude(status='atrasado').update(status='atrasado')
+            # Todas as transições são UPDATEs em lote calculados no banco
+            transicoes = atualizar_status_contas(hoje)
         
         self.stdout.write(
             self.style.SUCCESS(
                 f'Status atualizado:\n'
-                f'- {contas_prox_vencer} contas marcadas como "Próximo a Vencer"\n'
-                f'- {contas_vence_hoje} contas marcadas como "Vence Hoje"\n'
-                f'- {contas_atrasadas} contas marcadas como "Em Atraso"'
+                f'- {len(transicoes["em_dia"])} contas marcadas como "Em Dia"\n'
+                f'- {len(transicoes["prox_vencer"])} contas marcadas como "Próximo a Vencer"\n'
+                f'- {len(transicoes["vence_hoje"])} contas marcadas como "Vence Hoje"\n'
+                f'- {len(transicoes["atrasado"])} contas marcadas como "Em Atraso"'
             )
         )
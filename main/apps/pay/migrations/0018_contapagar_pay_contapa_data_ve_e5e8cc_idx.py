@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0017_contapagar_mensagem_confirmacao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contapagar',
+            index=models.Index(fields=['data_vencimento', 'id'], name='pay_contapa_data_ve_e5e8cc_idx'),
+        ),
+    ]
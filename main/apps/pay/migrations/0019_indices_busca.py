@@ -0,0 +1,74 @@
+from django.db import migrations
+
+
+CAMPOS_BUSCA_CONTA = ('nome_conta', 'nome_razao', 'cpf_cnpj', 'placa')
+TABELA_BUSCA_SQLITE = 'pay_contapagar_busca'
+
+# Índices trigram sobre UPPER(campo::text), a mesma expressão gerada pelo icontains
+INDICES_TRGM = {
+    'pay_contapagar': CAMPOS_BUSCA_CONTA,
+    'pay_grupoconta': ('nome',),
+}
+
+def _sql_gatilhos_busca():
+    # Gatilhos que mantêm a tabela FTS5 em dia com pay_contapagar em qualquer escrita
+    # (save, bulk_create, QuerySet.update, SQL direto), não só nas que disparam signals
+    colunas = ', '.join(CAMPOS_BUSCA_CONTA)
+    novos = ', '.join(f'new.{campo}' for campo in CAMPOS_BUSCA_CONTA)
+    inserir = f'INSERT INTO {TABELA_BUSCA_SQLITE} (rowid, {colunas}) VALUES (new.id, {novos});'
+    remover = f'DELETE FROM {TABELA_BUSCA_SQLITE} WHERE rowid = old.id;'
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA_SQLITE}_ai AFTER INSERT ON pay_contapagar '
+        f'BEGIN {inserir} END',
+        f'CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA_SQLITE}_au AFTER UPDATE OF id, {colunas} ON pay_contapagar '
+        f'BEGIN {remover} {inserir} END',
+        f'CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA_SQLITE}_ad AFTER DELETE ON pay_contapagar '
+        f'BEGIN {remover} END',
+    ]
+
+
+def criar_indices_busca(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for tabela, campos in INDICES_TRGM.items():
+            for campo in campos:
+                schema_editor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {tabela}_{campo}_trgm '
+                    f'ON {tabela} USING gin ((UPPER("{campo}"::text)) gin_trgm_ops)'
+                )
+    elif vendor == 'sqlite':
+        colunas = ', '.join(CAMPOS_BUSCA_CONTA)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_BUSCA_SQLITE} "
+            f"USING fts5({colunas}, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            f'INSERT INTO {TABELA_BUSCA_SQLITE} (rowid, {colunas}) '
+            f'SELECT id, {colunas} FROM pay_contapagar'
+        )
+        for sql in _sql_gatilhos_busca():
+            schema_editor.execute(sql)
+
+
+def remover_indices_busca(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for tabela, campos in INDICES_TRGM.items():
+            for campo in campos:
+                schema_editor.execute(f'DROP INDEX IF EXISTS {tabela}_{campo}_trgm')
+    elif vendor == 'sqlite':
+        for sufixo in ('ai', 'au', 'ad'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {TABELA_BUSCA_SQLITE}_{sufixo}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABELA_BUSCA_SQLITE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0018_contapagar_pay_contapa_data_ve_e5e8cc_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices_busca, remover_indices_busca),
+    ]
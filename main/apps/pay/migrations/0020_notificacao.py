@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0019_indices_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notificacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destinatario', models.CharField(max_length=20, verbose_name='Destinatário')),
+                ('template', models.CharField(choices=[('alerta_prox_vencer', 'Alerta Próximo a Vencer'), ('alerta_vence_hoje', 'Alerta Vence Hoje')], max_length=50, verbose_name='Template')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Dados da Mensagem')),
+                ('chave_deduplicacao', models.CharField(max_length=200, unique=True, verbose_name='Chave de Deduplicação')),
+                ('estado', models.CharField(choices=[('pendente', 'Pendente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('falhou', 'Falhou')], default='pendente', max_length=20, verbose_name='Estado')),
+                ('tentativas', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('proxima_tentativa', models.DateTimeField(verbose_name='Próxima Tentativa')),
+                ('ultimo_erro', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('enviado_em', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('conta', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notificacoes', to='pay.contapagar', verbose_name='Conta')),
+            ],
+            options={
+                'verbose_name': 'Notificação',
+                'verbose_name_plural': 'Notificações',
+                'ordering': ['proxima_tentativa'],
+                'indexes': [models.Index(fields=['estado', 'proxima_tentativa'], name='pay_notific_estado_83eeef_idx')],
+            },
+        ),
+    ]
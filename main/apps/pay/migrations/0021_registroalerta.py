@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:59
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def registrar_alertas_existentes(apps, schema_editor):
+    # Os alertas já gravados na outbox entram no registro (chave: template:conta:vencimento)
+    Notificacao = apps.get_model('pay', 'Notificacao')
+    RegistroAlerta = apps.get_model('pay', 'RegistroAlerta')
+    registros = []
+    for chave in Notificacao.objects.filter(conta__isnull=False).values_list('chave_deduplicacao', flat=True).iterator():
+        tipo, conta_id, vencimento = chave.split(':')
+        registros.append(RegistroAlerta(
+            conta_id=int(conta_id), tipo=tipo, data_vencimento=date.fromisoformat(vencimento)
+        ))
+    RegistroAlerta.objects.bulk_create(registros, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0020_notificacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroAlerta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('alerta_prox_vencer', 'Alerta Próximo a Vencer'), ('alerta_vence_hoje', 'Alerta Vence Hoje')], max_length=50, verbose_name='Tipo de Alerta')),
+                ('data_vencimento', models.DateField(verbose_name='Data de Vencimento')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('conta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registros_alerta', to='pay.contapagar', verbose_name='Conta')),
+            ],
+            options={
+                'verbose_name': 'Registro de Alerta',
+                'verbose_name_plural': 'Registros de Alerta',
+                'ordering': ['-criado_em'],
+                'constraints': [models.UniqueConstraint(fields=('conta', 'tipo', 'data_vencimento'), name='registro_alerta_unico')],
+            },
+        ),
+        migrations.RunPython(registrar_alertas_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0021_registroalerta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TravaExecucao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, unique=True, verbose_name='Nome')),
+                ('dono', models.CharField(max_length=64, verbose_name='Dono')),
+                ('adquirida_em', models.DateTimeField(verbose_name='Adquirida em')),
+                ('expira_em', models.DateTimeField(verbose_name='Expira em')),
+            ],
+            options={
+                'verbose_name': 'Trava de Execução',
+                'verbose_name_plural': 'Travas de Execução',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:01
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def agendar_contas_abertas(apps, schema_editor):
+    # Todas as contas abertas entram na próxima execução da agenda, que calcula a data seguinte
+    ContaPagar = apps.get_model('pay', 'ContaPagar')
+    ContaPagar.objects.filter(pago=False).update(proxima_verificacao=timezone.now().date())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0022_travaexecucao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contapagar',
+            name='proxima_verificacao',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, verbose_name='Próxima Verificação'),
+        ),
+        migrations.RunPython(agendar_contas_abertas, migrations.RunPython.noop),
+    ]
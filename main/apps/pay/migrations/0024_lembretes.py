@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:03
+
+import django.db.models.deletion
+import main.apps.pay.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0023_contapagar_proxima_verificacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contapagar',
+            name='lembrete_atraso_dias',
+            field=models.PositiveIntegerField(blank=True, help_text='Repete o lembrete enquanto a conta estiver em atraso. Em branco usa o grupo, 0 desativa.', null=True, verbose_name='Lembrete de atraso a cada (dias)'),
+        ),
+        migrations.AddField(
+            model_name='contapagar',
+            name='lembretes_dias_antes',
+            field=models.CharField(blank=True, help_text='Dias antes do vencimento para enviar lembretes, separados por vírgula (ex.: 7,3,1). Em branco usa o grupo.', max_length=50, validators=[main.apps.pay.models.validar_dias_lembrete], verbose_name='Lembretes (dias antes)'),
+        ),
+        migrations.AddField(
+            model_name='grupoconta',
+            name='lembrete_atraso_dias',
+            field=models.PositiveIntegerField(default=0, help_text='Repete o lembrete enquanto a conta estiver em atraso. 0 desativa.', verbose_name='Lembrete de atraso a cada (dias)'),
+        ),
+        migrations.AddField(
+            model_name='grupoconta',
+            name='lembretes_dias_antes',
+            field=models.CharField(blank=True, help_text='Dias antes do vencimento para enviar lembretes, separados por vírgula (ex.: 7,3,1).', max_length=50, validators=[main.apps.pay.models.validar_dias_lembrete], verbose_name='Lembretes (dias antes)'),
+        ),
+        migrations.AlterField(
+            model_name='notificacao',
+            name='template',
+            field=models.CharField(choices=[('alerta_prox_vencer', 'Alerta Próximo a Vencer'), ('alerta_vence_hoje', 'Alerta Vence Hoje'), ('lembrete_antes', 'Lembrete Antes do Vencimento'), ('lembrete_atraso', 'Lembrete de Atraso')], max_length=50, verbose_name='Template'),
+        ),
+        migrations.AlterField(
+            model_name='registroalerta',
+            name='tipo',
+            field=models.CharField(choices=[('alerta_prox_vencer', 'Alerta Próximo a Vencer'), ('alerta_vence_hoje', 'Alerta Vence Hoje'), ('lembrete_antes', 'Lembrete Antes do Vencimento'), ('lembrete_atraso', 'Lembrete de Atraso')], max_length=50, verbose_name='Tipo de Alerta'),
+        ),
+        migrations.CreateModel(
+            name='OcorrenciaLembrete',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('lembrete_antes', 'Antes do Vencimento'), ('lembrete_atraso', 'Em Atraso')], max_length=20, verbose_name='Tipo')),
+                ('data', models.DateField(verbose_name='Data do Lembrete')),
+                ('data_vencimento', models.DateField(verbose_name='Data de Vencimento')),
+                ('processado_em', models.DateTimeField(blank=True, null=True, verbose_name='Processado em')),
+                ('conta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lembretes', to='pay.contapagar', verbose_name='Conta')),
+            ],
+            options={
+                'verbose_name': 'Ocorrência de Lembrete',
+                'verbose_name_plural': 'Ocorrências de Lembrete',
+                'ordering': ['data'],
+                'indexes': [models.Index(condition=models.Q(('processado_em__isnull', True)), fields=['data'], name='lembrete_pendente_data_idx')],
+                'constraints': [models.UniqueConstraint(fields=('conta', 'data_vencimento', 'data'), name='ocorrencia_lembrete_unica')],
+            },
+        ),
+    ]
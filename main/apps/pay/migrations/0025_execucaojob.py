@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0024_lembretes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExecucaoJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=150, unique=True, verbose_name='Nome')),
+                ('ultimo_id', models.BigIntegerField(default=0, verbose_name='Último ID Processado')),
+                ('lotes', models.PositiveIntegerField(default=0, verbose_name='Lotes Processados')),
+                ('registros', models.PositiveIntegerField(default=0, verbose_name='Registros Processados')),
+                ('duracao_total', models.FloatField(default=0, verbose_name='Duração Total dos Lotes (s)')),
+                ('duracao_maxima_lote', models.FloatField(default=0, verbose_name='Duração do Lote Mais Lento (s)')),
+                ('iniciado_em', models.DateTimeField(verbose_name='Iniciado em')),
+                ('concluido_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Execução de Job',
+                'verbose_name_plural': 'Execuções de Jobs',
+                'ordering': ['-iniciado_em'],
+            },
+        ),
+    ]
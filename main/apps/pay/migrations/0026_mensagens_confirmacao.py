@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:05
+
+import main.apps.pay.services.mensagens
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0025_execucaojob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grupoconta',
+            name='mensagem_confirmacao',
+            field=models.TextField(blank=True, help_text='Usada pelas contas do grupo sem mensagem própria. Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}, {{data_pagamento}}', validators=[main.apps.pay.services.mensagens.validar_modelo_mensagem], verbose_name='Mensagem de Confirmação de Pagamento'),
+        ),
+        migrations.AlterField(
+            model_name='contapagar',
+            name='mensagem_confirmacao',
+            field=models.TextField(blank=True, help_text='Mensagem que será enviada ao cliente quando a conta for paga (em branco usa a do grupo). Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}, {{data_pagamento}}', validators=[main.apps.pay.services.mensagens.validar_modelo_mensagem], verbose_name='Mensagem de Confirmação de Pagamento'),
+        ),
+    ]
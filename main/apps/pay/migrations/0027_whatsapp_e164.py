@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:06
+
+import re
+
+from django.db import migrations, models
+
+
+# Cópia congelada de services.telefones (a migração não acompanha mudanças no serviço)
+CAMPOS_TELEFONE = {
+    'whatsapp_confirmacao': 'whatsapp_confirmacao_e164',
+    'whatsapp_contato_alerta': 'whatsapp_alerta_e164',
+}
+
+TAMANHO_LOTE = 500
+
+
+def normalizar_e164(numero, ddi='55'):
+    numero = (numero or '').strip()
+    digitos = re.sub(r'\D', '', numero)
+    if not digitos:
+        return ''
+
+    if not numero.startswith('+'):
+        digitos = digitos.lstrip('0')
+        if len(digitos) in (10, 11):
+            digitos = ddi + digitos
+        elif not digitos.startswith(ddi):
+            return ''
+
+    if digitos.startswith('55'):
+        local = digitos[2:]
+        valido = (
+            len(local) in (10, 11)
+            and local[0] != '0'
+            and (len(local) == 10 or local[2] == '9')
+        )
+    else:
+        valido = 8 <= len(digitos) <= 15
+
+    return f'+{digitos}' if valido else ''
+
+
+def normalizar_telefones(apps, schema_editor):
+    ContaPagar = apps.get_model('pay', 'ContaPagar')
+    contas = []
+    for conta in ContaPagar.objects.only('id', *CAMPOS_TELEFONE).order_by('id').iterator(chunk_size=TAMANHO_LOTE):
+        for campo, campo_e164 in CAMPOS_TELEFONE.items():
+            setattr(conta, campo_e164, normalizar_e164(getattr(conta, campo)))
+        contas.append(conta)
+        if len(contas) == TAMANHO_LOTE:
+            ContaPagar.objects.bulk_update(contas, list(CAMPOS_TELEFONE.values()))
+            contas = []
+    if contas:
+        ContaPagar.objects.bulk_update(contas, list(CAMPOS_TELEFONE.values()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0026_mensagens_confirmacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contapagar',
+            name='whatsapp_alerta_e164',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, verbose_name='WhatsApp para Alerta (E.164)'),
+        ),
+        migrations.AddField(
+            model_name='contapagar',
+            name='whatsapp_confirmacao_e164',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, verbose_name='WhatsApp para Confirmação (E.164)'),
+        ),
+        migrations.RunPython(normalizar_telefones, migrations.RunPython.noop),
+    ]
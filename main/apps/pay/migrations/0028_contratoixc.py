@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0027_whatsapp_e164'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContratoIXC',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('id_ixc', models.BigIntegerField(unique=True, verbose_name='ID no IXC')),
+                ('id_cliente', models.BigIntegerField(blank=True, db_index=True, null=True, verbose_name='ID do Cliente no IXC')),
+                ('status', models.CharField(blank=True, max_length=5, verbose_name='Status')),
+                ('descricao', models.CharField(blank=True, max_length=300, verbose_name='Contrato')),
+                ('data_ativacao', models.DateField(blank=True, null=True, verbose_name='Data de Ativação')),
+                ('ultima_atualizacao', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Última Atualização no IXC')),
+                ('dados', models.JSONField(blank=True, default=dict, verbose_name='Registro Completo')),
+                ('sincronizado_em', models.DateTimeField(verbose_name='Sincronizado em')),
+            ],
+            options={
+                'verbose_name': 'Contrato IXC',
+                'verbose_name_plural': 'Contratos IXC',
+                'ordering': ['id_ixc'],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0028_contratoixc'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConciliacaoIXC',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('iniciado_em', models.DateTimeField(verbose_name='Iniciado em')),
+                ('concluido_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('contratos', models.PositiveIntegerField(default=0, verbose_name='Contratos Analisados')),
+                ('contas', models.PositiveIntegerField(default=0, verbose_name='Contas Analisadas')),
+                ('conciliados', models.PositiveIntegerField(default=0, verbose_name='Pares Conciliados')),
+                ('divergencias', models.PositiveIntegerField(default=0, verbose_name='Divergências')),
+            ],
+            options={
+                'verbose_name': 'Conciliação IXC',
+                'verbose_name_plural': 'Conciliações IXC',
+                'ordering': ['-iniciado_em'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DivergenciaConciliacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('sem_conta', 'Contrato sem Conta a Pagar'), ('sem_contrato', 'Conta sem Contrato no IXC'), ('valor', 'Valor Divergente'), ('vencimento', 'Vencimento Divergente')], max_length=20, verbose_name='Tipo')),
+                ('cpf_cnpj', models.CharField(blank=True, max_length=18, verbose_name='CPF/CNPJ')),
+                ('nome_razao', models.CharField(blank=True, max_length=200, verbose_name='Nome/Razão Social')),
+                ('valor_ixc', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Valor no IXC')),
+                ('valor_conta', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Valor da Conta')),
+                ('dia_vencimento_ixc', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Dia de Vencimento no IXC')),
+                ('data_vencimento_conta', models.DateField(blank=True, null=True, verbose_name='Vencimento da Conta')),
+                ('conciliacao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='pay.conciliacaoixc', verbose_name='Conciliação')),
+                ('conta', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='divergencias_ixc', to='pay.contapagar', verbose_name='Conta')),
+                ('contrato', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='divergencias', to='pay.contratoixc', verbose_name='Contrato IXC')),
+            ],
+            options={
+                'verbose_name': 'Divergência de Conciliação',
+                'verbose_name_plural': 'Divergências de Conciliação',
+                'ordering': ['conciliacao', 'tipo'],
+            },
+        ),
+    ]
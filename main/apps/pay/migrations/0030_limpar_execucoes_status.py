@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:20
+
+from django.db import migrations
+
+
+# Jobs de status que gravavam um checkpoint por dia ('<job>:<data>') antes de passarem a usar a agenda
+JOBS_STATUS = ('verificar_status_contas', 'verificar_contas_vencendo_hoje', 'verificar_contas_atrasadas')
+
+
+def apagar_execucoes_status(apps, schema_editor):
+    ExecucaoJob = apps.get_model('pay', 'ExecucaoJob')
+    for job in JOBS_STATUS:
+        ExecucaoJob.objects.filter(nome__startswith=f'{job}:').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0029_conciliacaoixc'),
+    ]
+
+    operations = [
+        migrations.RunPython(apagar_execucoes_status, migrations.RunPython.noop),
+    ]
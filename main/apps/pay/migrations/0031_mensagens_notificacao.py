@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:35
+
+import main.apps.pay.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pay', '0030_limpar_execucoes_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contapagar',
+            name='mensagem_alerta_prox_vencer',
+            field=models.TextField(blank=True, help_text='Em branco usa a do grupo ou, sem ela, a padrão. Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}', validators=[main.apps.pay.validators.validar_modelo_mensagem], verbose_name='Mensagem de Alerta Próximo a Vencer'),
+        ),
+        migrations.AddField(
+            model_name='contapagar',
+            name='mensagem_alerta_vence_hoje',
+            field=models.TextField(blank=True, help_text='Em branco usa a do grupo ou, sem ela, a padrão. Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}', validators=[main.apps.pay.validators.validar_modelo_mensagem], verbose_name='Mensagem de Alerta Vence Hoje'),
+        ),
+        migrations.AddField(
+            model_name='contapagar',
+            name='mensagem_lembrete_antes',
+            field=models.TextField(blank=True, help_text='Em branco usa a do grupo ou, sem ela, a padrão. Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}', validators=[main.apps.pay.validators.validar_modelo_mensagem], verbose_name='Mensagem de Lembrete Antes do Vencimento'),
+        ),
+        migrations.AddField(
+            model_name='contapagar',
+            name='mensagem_lembrete_atraso',
+            field=models.TextField(blank=True, help_text='Em branco usa a do grupo ou, sem ela, a padrão. Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}', validators=[main.apps.pay.validators.validar_modelo_mensagem], verbose_name='Mensagem de Lembrete de Atraso'),
+        ),
+        migrations.AddField(
+            model_name='grupoconta',
+            name='mensagem_alerta_prox_vencer',
+            field=models.TextField(blank=True, help_text='Usada pelas contas do grupo sem mensagem própria (em branco usa a padrão). Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}', validators=[main.apps.pay.validators.validar_modelo_mensagem], verbose_name='Mensagem de Alerta Próximo a Vencer'),
+        ),
+        migrations.AddField(
+            model_name='grupoconta',
+            name='mensagem_alerta_vence_hoje',
+            field=models.TextField(blank=True, help_text='Usada pelas contas do grupo sem mensagem própria (em branco usa a padrão). Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}', validators=[main.apps.pay.validators.validar_modelo_mensagem], verbose_name='Mensagem de Alerta Vence Hoje'),
+        ),
+        migrations.AddField(
+            model_name='grupoconta',
+            name='mensagem_lembrete_antes',
+            field=models.TextField(blank=True, help_text='Usada pelas contas do grupo sem mensagem própria (em branco usa a padrão). Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}', validators=[main.apps.pay.validators.validar_modelo_mensagem], verbose_name='Mensagem de Lembrete Antes do Vencimento'),
+        ),
+        migrations.AddField(
+            model_name='grupoconta',
+            name='mensagem_lembrete_atraso',
+            field=models.TextField(blank=True, help_text='Usada pelas contas do grupo sem mensagem própria (em branco usa a padrão). Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}', validators=[main.apps.pay.validators.validar_modelo_mensagem], verbose_name='Mensagem de Lembrete de Atraso'),
+        ),
+    ]
@@ -2,15 +2,63 @@ from django.db import models
 
 
 from django.db import models
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+from .validators import validar_modelo_mensagem
+
+
+def dias_lembrete(valor):
+    """Converte "7, 3, 1" em [7, 3, 1] (dias antes do vencimento, sem repetição, do maior para o menor)."""
+    dias = set()
+    for parte in (valor or '').split(','):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if not parte.isdigit():
+            raise ValidationError(f'"{parte}" não é um número de dias válido.')
+        dias.add(int(parte))
+    return sorted(dias, reverse=True)
+
+
+def validar_dias_lembrete(valor):
+    dias_lembrete(valor)
+
 
 class GrupoConta(models.Model):
     """Grupo de categorização das contas"""
     nome = models.CharField(max_length=100, verbose_name='Nome')
     descricao = models.TextField(blank=True, null=True, verbose_name='Descrição')
     ativo = models.BooleanField(default=True, null=True, verbose_name='Ativo')
+    lembretes_dias_antes = models.CharField(
+        max_length=50, blank=True, validators=[validar_dias_lembrete], verbose_name='Lembretes (dias antes)',
+        help_text='Dias antes do vencimento para enviar lembretes, separados por vírgula (ex.: 7,3,1).'
+    )
+    lembrete_atraso_dias = models.PositiveIntegerField(
+        default=0, verbose_name='Lembrete de atraso a cada (dias)',
+        help_text='Repete o lembrete enquanto a conta estiver em atraso. 0 desativa.'
+    )
+    mensagem_confirmacao = models.TextField(
+        blank=True, validators=[validar_modelo_mensagem], verbose_name='Mensagem de Confirmação de Pagamento',
+        help_text='Usada pelas contas do grupo sem mensagem própria. Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}, {{data_pagamento}}'
+    )
+    mensagem_alerta_prox_vencer = models.TextField(
+        blank=True, validators=[validar_modelo_mensagem], verbose_name='Mensagem de Alerta Próximo a Vencer',
+        help_text='Usada pelas contas do grupo sem mensagem própria (em branco usa a padrão). Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}'
+    )
+    mensagem_alerta_vence_hoje = models.TextField(
+        blank=True, validators=[validar_modelo_mensagem], verbose_name='Mensagem de Alerta Vence Hoje',
+        help_text='Usada pelas contas do grupo sem mensagem própria (em branco usa a padrão). Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}'
+    )
+    mensagem_lembrete_antes = models.TextField(
+        blank=True, validators=[validar_modelo_mensagem], verbose_name='Mensagem de Lembrete Antes do Vencimento',
+        help_text='Usada pelas contas do grupo sem mensagem própria (em branco usa a padrão). Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}'
+    )
+    mensagem_lembrete_atraso = models.TextField(
+        blank=True, validators=[validar_modelo_mensagem], verbose_name='Mensagem de Lembrete de Atraso',
+        help_text='Usada pelas contas do grupo sem mensagem própria (em branco usa a padrão). Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}'
+    )
     created_at = models.DateTimeField(auto_now_add=True, null=True, verbose_name='Criado em')
     updated_at = models.DateTimeField(auto_now=True,null=True, verbose_name='Atualizado em')
 
@@ -131,6 +179,22 @@ class ContaPagar(models.Model):
         default=0,
         help_text="Número de dias antes do vencimento para enviar o alerta."
     )
+
+    # Lembretes adicionais; em branco usa a configuração do grupo
+    lembretes_dias_antes = models.CharField(
+        max_length=50,
+        blank=True,
+        validators=[validar_dias_lembrete],
+        verbose_name="Lembretes (dias antes)",
+        help_text="Dias antes do vencimento para enviar lembretes, separados por vírgula (ex.: 7,3,1). Em branco usa o grupo."
+    )
+
+    lembrete_atraso_dias = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name="Lembrete de atraso a cada (dias)",
+        help_text="Repete o lembrete enquanto a conta estiver em atraso. Em branco usa o grupo, 0 desativa."
+    )
     
     fixo_variado = models.CharField(
         max_length=10,
@@ -279,11 +343,57 @@ class ContaPagar(models.Model):
         blank=True,
         help_text="Formato: (00) 00000-0000"
     )
+
+    # Números normalizados (E.164) mantidos no save; vazios se o número for inválido
+    whatsapp_confirmacao_e164 = models.CharField(
+        max_length=16,
+        verbose_name="WhatsApp para Confirmação (E.164)",
+        blank=True,
+        editable=False,
+        db_index=True
+    )
+
+    whatsapp_alerta_e164 = models.CharField(
+        max_length=16,
+        verbose_name="WhatsApp para Alerta (E.164)",
+        blank=True,
+        editable=False,
+        db_index=True
+    )
     
     mensagem_confirmacao = models.TextField(
         verbose_name="Mensagem de Confirmação de Pagamento",
         blank=True,
-        help_text="Mensagem que será enviada ao cliente quando a conta for paga. Use {{nome_conta}}, {{valor}}, {{data_pagamento}}"
+        validators=[validar_modelo_mensagem],
+        help_text="Mensagem que será enviada ao cliente quando a conta for paga (em branco usa a do grupo). Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}, {{data_pagamento}}"
+    )
+
+    mensagem_alerta_prox_vencer = models.TextField(
+        verbose_name="Mensagem de Alerta Próximo a Vencer",
+        blank=True,
+        validators=[validar_modelo_mensagem],
+        help_text="Em branco usa a do grupo ou, sem ela, a padrão. Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}"
+    )
+
+    mensagem_alerta_vence_hoje = models.TextField(
+        verbose_name="Mensagem de Alerta Vence Hoje",
+        blank=True,
+        validators=[validar_modelo_mensagem],
+        help_text="Em branco usa a do grupo ou, sem ela, a padrão. Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}"
+    )
+
+    mensagem_lembrete_antes = models.TextField(
+        verbose_name="Mensagem de Lembrete Antes do Vencimento",
+        blank=True,
+        validators=[validar_modelo_mensagem],
+        help_text="Em branco usa a do grupo ou, sem ela, a padrão. Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}"
+    )
+
+    mensagem_lembrete_atraso = models.TextField(
+        verbose_name="Mensagem de Lembrete de Atraso",
+        blank=True,
+        validators=[validar_modelo_mensagem],
+        help_text="Em branco usa a do grupo ou, sem ela, a padrão. Use {{nome_conta}}, {{nome_razao}}, {{grupo}}, {{valor}}, {{vencimento}}"
     )
     
     link_acesso_pagamento = models.URLField(
@@ -311,6 +421,15 @@ class ContaPagar(models.Model):
         verbose_name="Status da Conta"
     )
     
+    # Próxima data em que o status precisa ser reavaliado (mantida por services.agenda)
+    proxima_verificacao = models.DateField(
+        verbose_name="Próxima Verificação",
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True
+    )
+    
     data_pagamento = models.DateField(
         verbose_name="Data de Pagamento",
         blank=True,
@@ -328,6 +447,7 @@ class ContaPagar(models.Model):
         indexes = [
             models.Index(fields=['data_vencimento', 'pago']),
             models.Index(fields=['grupo_conta', 'data_vencimento']),
+            models.Index(fields=['data_vencimento', 'id']),
         ]
     
     def __str__(self):
@@ -492,3 +612,467 @@ class HistoricoPagamento(models.Model):
     
     def __str__(self):
         return f"{self.nome_conta} - R$ {self.valor_pago} - {self.data_pagamento.strftime('%d/%m/%Y')}"
+
+
+class Notificacao(models.Model):
+    """Fila (outbox) de mensagens de WhatsApp a serem enviadas em segundo plano"""
+
+    TEMPLATE_CHOICES = [
+        ('alerta_prox_vencer', 'Alerta Próximo a Vencer'),
+        ('alerta_vence_hoje', 'Alerta Vence Hoje'),
+        ('lembrete_antes', 'Lembrete Antes do Vencimento'),
+        ('lembrete_atraso', 'Lembrete de Atraso'),
+    ]
+
+    ESTADO_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('falhou', 'Falhou'),
+    ]
+
+    conta = models.ForeignKey(
+        ContaPagar,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notificacoes',
+        verbose_name="Conta"
+    )
+
+    destinatario = models.CharField(
+        max_length=20,
+        verbose_name="Destinatário"
+    )
+
+    template = models.CharField(
+        max_length=50,
+        choices=TEMPLATE_CHOICES,
+        verbose_name="Template"
+    )
+
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Dados da Mensagem"
+    )
+
+    chave_deduplicacao = models.CharField(
+        max_length=200,
+        unique=True,
+        verbose_name="Chave de Deduplicação"
+    )
+
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='pendente',
+        verbose_name="Estado"
+    )
+
+    tentativas = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Tentativas"
+    )
+
+    proxima_tentativa = models.DateTimeField(
+        verbose_name="Próxima Tentativa"
+    )
+
+    ultimo_erro = models.TextField(
+        verbose_name="Último Erro",
+        blank=True
+    )
+
+    enviado_em = models.DateTimeField(
+        verbose_name="Enviado em",
+        blank=True,
+        null=True
+    )
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Notificação"
+        verbose_name_plural = "Notificações"
+        ordering = ['proxima_tentativa']
+        indexes = [
+            models.Index(fields=['estado', 'proxima_tentativa']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_template_display()} - {self.destinatario} ({self.get_estado_display()})"
+
+
+class RegistroAlerta(models.Model):
+    """Registro dos alertas já gerados, um por conta, tipo de alerta e vencimento"""
+
+    conta = models.ForeignKey(
+        ContaPagar,
+        on_delete=models.CASCADE,
+        related_name='registros_alerta',
+        verbose_name="Conta"
+    )
+
+    tipo = models.CharField(
+        max_length=50,
+        choices=Notificacao.TEMPLATE_CHOICES,
+        verbose_name="Tipo de Alerta"
+    )
+
+    data_vencimento = models.DateField(
+        verbose_name="Data de Vencimento"
+    )
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Registro de Alerta"
+        verbose_name_plural = "Registros de Alerta"
+        ordering = ['-criado_em']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['conta', 'tipo', 'data_vencimento'],
+                name='registro_alerta_unico'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.conta_id} ({self.data_vencimento.strftime('%d/%m/%Y')})"
+
+
+class TravaExecucao(models.Model):
+    """Trava (lease) de execução de jobs, usada quando não há Redis configurado"""
+
+    nome = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Nome"
+    )
+
+    dono = models.CharField(
+        max_length=64,
+        verbose_name="Dono"
+    )
+
+    adquirida_em = models.DateTimeField(
+        verbose_name="Adquirida em"
+    )
+
+    expira_em = models.DateTimeField(
+        verbose_name="Expira em"
+    )
+
+    class Meta:
+        verbose_name = "Trava de Execução"
+        verbose_name_plural = "Travas de Execução"
+
+    def __str__(self):
+        return f"{self.nome} (expira em {self.expira_em.strftime('%d/%m/%Y %H:%M:%S')})"
+
+
+class OcorrenciaLembrete(models.Model):
+    """Lembretes agendados de cada conta (materializados a partir da configuração de lembretes)"""
+
+    TIPO_CHOICES = [
+        ('lembrete_antes', 'Antes do Vencimento'),
+        ('lembrete_atraso', 'Em Atraso'),
+    ]
+
+    conta = models.ForeignKey(
+        ContaPagar,
+        on_delete=models.CASCADE,
+        related_name='lembretes',
+        verbose_name="Conta"
+    )
+
+    tipo = models.CharField(
+        max_length=20,
+        choices=TIPO_CHOICES,
+        verbose_name="Tipo"
+    )
+
+    data = models.DateField(
+        verbose_name="Data do Lembrete"
+    )
+
+    data_vencimento = models.DateField(
+        verbose_name="Data de Vencimento"
+    )
+
+    processado_em = models.DateTimeField(
+        verbose_name="Processado em",
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        verbose_name = "Ocorrência de Lembrete"
+        verbose_name_plural = "Ocorrências de Lembrete"
+        ordering = ['data']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['conta', 'data_vencimento', 'data'],
+                name='ocorrencia_lembrete_unica'
+            ),
+        ]
+        indexes = [
+            # Lembretes pendentes por data: a consulta diária é uma faixa deste índice
+            models.Index(
+                fields=['data'],
+                condition=models.Q(processado_em__isnull=True),
+                name='lembrete_pendente_data_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.conta_id} ({self.data.strftime('%d/%m/%Y')})"
+
+
+class ExecucaoJob(models.Model):
+    """Checkpoint e métricas de um job em lotes (permite retomar uma execução interrompida)"""
+
+    nome = models.CharField(
+        max_length=150,
+        unique=True,
+        verbose_name="Nome"
+    )
+
+    ultimo_id = models.BigIntegerField(
+        default=0,
+        verbose_name="Último ID Processado"
+    )
+
+    lotes = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Lotes Processados"
+    )
+
+    registros = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Registros Processados"
+    )
+
+    duracao_total = models.FloatField(
+        default=0,
+        verbose_name="Duração Total dos Lotes (s)"
+    )
+
+    duracao_maxima_lote = models.FloatField(
+        default=0,
+        verbose_name="Duração do Lote Mais Lento (s)"
+    )
+
+    iniciado_em = models.DateTimeField(
+        verbose_name="Iniciado em"
+    )
+
+    concluido_em = models.DateTimeField(
+        verbose_name="Concluído em",
+        blank=True,
+        null=True
+    )
+
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Execução de Job"
+        verbose_name_plural = "Execuções de Jobs"
+        ordering = ['-iniciado_em']
+
+    def __str__(self):
+        situacao = 'concluído' if self.concluido_em else f'até o id {self.ultimo_id}'
+        return f"{self.nome} ({situacao})"
+
+
+class ContratoIXC(models.Model):
+    """Espelho local dos contratos do IXC (cliente_contrato), sincronizado pelo services.contratos_ixc"""
+
+    id_ixc = models.BigIntegerField(
+        unique=True,
+        verbose_name="ID no IXC"
+    )
+
+    id_cliente = models.BigIntegerField(
+        blank=True,
+        null=True,
+        db_index=True,
+        verbose_name="ID do Cliente no IXC"
+    )
+
+    status = models.CharField(
+        max_length=5,
+        blank=True,
+        verbose_name="Status"
+    )
+
+    descricao = models.CharField(
+        max_length=300,
+        blank=True,
+        verbose_name="Contrato"
+    )
+
+    data_ativacao = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name="Data de Ativação"
+    )
+
+    # Marca d'água da sincronização incremental
+    ultima_atualizacao = models.DateTimeField(
+        blank=True,
+        null=True,
+        db_index=True,
+        verbose_name="Última Atualização no IXC"
+    )
+
+    dados = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Registro Completo"
+    )
+
+    sincronizado_em = models.DateTimeField(
+        verbose_name="Sincronizado em"
+    )
+
+    class Meta:
+        verbose_name = "Contrato IXC"
+        verbose_name_plural = "Contratos IXC"
+        ordering = ['id_ixc']
+
+    def __str__(self):
+        return f"Contrato {self.id_ixc} - {self.descricao}"
+
+
+class ConciliacaoIXC(models.Model):
+    """Execução da conciliação entre os contratos do IXC (espelho) e as contas a pagar"""
+
+    iniciado_em = models.DateTimeField(
+        verbose_name="Iniciado em"
+    )
+
+    concluido_em = models.DateTimeField(
+        verbose_name="Concluído em",
+        blank=True,
+        null=True
+    )
+
+    contratos = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Contratos Analisados"
+    )
+
+    contas = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Contas Analisadas"
+    )
+
+    conciliados = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Pares Conciliados"
+    )
+
+    divergencias = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Divergências"
+    )
+
+    class Meta:
+        verbose_name = "Conciliação IXC"
+        verbose_name_plural = "Conciliações IXC"
+        ordering = ['-iniciado_em']
+
+    def __str__(self):
+        return f"Conciliação de {self.iniciado_em.strftime('%d/%m/%Y %H:%M')} ({self.divergencias} divergências)"
+
+
+class DivergenciaConciliacao(models.Model):
+    """Divergência encontrada em uma conciliação IXC x contas a pagar"""
+
+    TIPO_CHOICES = [
+        ('sem_conta', 'Contrato sem Conta a Pagar'),
+        ('sem_contrato', 'Conta sem Contrato no IXC'),
+        ('valor', 'Valor Divergente'),
+        ('vencimento', 'Vencimento Divergente'),
+    ]
+
+    conciliacao = models.ForeignKey(
+        ConciliacaoIXC,
+        on_delete=models.CASCADE,
+        related_name='itens',
+        verbose_name="Conciliação"
+    )
+
+    tipo = models.CharField(
+        max_length=20,
+        choices=TIPO_CHOICES,
+        verbose_name="Tipo"
+    )
+
+    contrato = models.ForeignKey(
+        ContratoIXC,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='divergencias',
+        verbose_name="Contrato IXC"
+    )
+
+    conta = models.ForeignKey(
+        ContaPagar,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='divergencias_ixc',
+        verbose_name="Conta"
+    )
+
+    cpf_cnpj = models.CharField(
+        max_length=18,
+        blank=True,
+        verbose_name="CPF/CNPJ"
+    )
+
+    nome_razao = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="Nome/Razão Social"
+    )
+
+    valor_ixc = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name="Valor no IXC"
+    )
+
+    valor_conta = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name="Valor da Conta"
+    )
+
+    dia_vencimento_ixc = models.PositiveSmallIntegerField(
+        blank=True,
+        null=True,
+        verbose_name="Dia de Vencimento no IXC"
+    )
+
+    data_vencimento_conta = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name="Vencimento da Conta"
+    )
+
+    class Meta:
+        verbose_name = "Divergência de Conciliação"
+        verbose_name_plural = "Divergências de Conciliação"
+        ordering = ['conciliacao', 'tipo']
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.cpf_cnpj or self.nome_razao}"
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from main.apps.pay.models import ContaPagar
+from main.apps.pay.services.jobs import JobEmLotes
+from main.apps.pay.services.notificacoes import enfileirar_alertas
+from main.apps.pay.services.status import ALERTAS_TRANSICAO, TRANSICOES, atualizar_status_contas
+
+
+# Contas com verificação agendada tratadas por lote (e por UPDATE do bulk_update)
+TAMANHO_LOTE_AGENDA = 500
+
+
+def status_esperado(data_vencimento, alertar_dias_antes, hoje):
+    """Status que uma conta aberta deve ter em `hoje` (mesma regra de condicoes_transicao)."""
+    if data_vencimento < hoje:
+        return 'atrasado'
+    if data_vencimento == hoje:
+        return 'vence_hoje'
+    if data_vencimento - timedelta(days=alertar_dias_antes) <= hoje:
+        return 'prox_vencer'
+    return 'em_dia'
+
+
+def calcular_proxima_verificacao(conta, hoje=None):
+    """
+    Data em que o status da conta precisa ser reavaliado: hoje, se o status
+    atual não é o esperado, senão a próxima mudança (início do alerta,
+    vencimento ou dia seguinte ao vencimento). Contas pagas ou já
+    atrasadas não têm próxima verificação.
+    """
+    hoje = hoje or timezone.now().date()
+    if conta.pago:
+        return None
+    if conta.status != status_esperado(conta.data_vencimento, conta.alertar_dias_antes, hoje):
+        return hoje
+
+    eventos = (
+        conta.data_vencimento - timedelta(days=conta.alertar_dias_antes),
+        conta.data_vencimento,
+        conta.data_vencimento + timedelta(days=1),
+    )
+    return min((evento for evento in eventos if evento > hoje), default=None)
+
+
+class JobAgendaStatus(JobEmLotes):
+    """
+    Aplica as transições de status apenas às contas com verificação
+    agendada até `hoje` (consulta pelo índice de proxima_verificacao), em
+    lotes por id, e reagenda cada uma para a próxima mudança. Os alertas
+    das transições vão para a outbox na transação do checkpoint do lote,
+    então uma execução interrompida é retomada sem perder nem repetir
+    alertas. Um checkpoint por dia ('agenda_status:<data>'); `transicoes`
+    e `alertas` acumulam o que esta execução alterou.
+    """
+
+    tamanho_lote = TAMANHO_LOTE_AGENDA
+
+    def __init__(self, hoje=None, tamanho_lote=None):
+        self.hoje = hoje or timezone.now().date()
+        super().__init__(f'agenda_status:{self.hoje.isoformat()}', tamanho_lote)
+        self.transicoes = {status: [] for status in TRANSICOES}
+        self.alertas = 0
+
+    def queryset(self):
+        return ContaPagar.objects.filter(proxima_verificacao__lte=self.hoje)
+
+    def processar_lote(self, registros):
+        conta_ids = [registro['id'] for registro in registros]
+        transicoes = atualizar_status_contas(self.hoje, conta_ids=conta_ids)
+
+        contas = list(
+            ContaPagar.objects.filter(id__in=conta_ids).only(
+                'pago', 'status', 'data_vencimento', 'alertar_dias_antes', 'proxima_verificacao'
+            )
+        )
+        for conta in contas:
+            conta.proxima_verificacao = calcular_proxima_verificacao(conta, self.hoje)
+        ContaPagar.objects.bulk_update(contas, ['proxima_verificacao'])
+
+        for status, ids in transicoes.items():
+            self.transicoes[status].extend(ids)
+        self.alertas += sum(
+            enfileirar_alertas(template, transicoes[status])
+            for status, template in ALERTAS_TRANSICAO.items()
+        )
@@ -0,0 +1,151 @@
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import Q, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+
+# Campos pesquisados pelo filtro "nome" da listagem de contas
+CAMPOS_BUSCA_CONTA = ('nome_conta', 'nome_razao', 'cpf_cnpj', 'placa')
+CAMPOS_BUSCA_GRUPO = ('nome',)
+
+# Tabela FTS5 (SQLite) espelhando os campos de busca de pay_contapagar
+TABELA_BUSCA_SQLITE = 'pay_contapagar_busca'
+
+# Gatilhos de pay_contapagar que mantêm a tabela FTS5 (inserção, alteração e exclusão)
+GATILHOS_BUSCA_SQLITE = tuple(f'{TABELA_BUSCA_SQLITE}_{sufixo}' for sufixo in ('ai', 'au', 'ad'))
+
+# O tokenizador trigram do FTS5 só casa termos com 3 ou mais caracteres
+TAMANHO_MINIMO_FTS = 3
+
+
+def _vendor(queryset):
+    return connections[queryset.db].vendor
+
+
+def _termo_fts(termo):
+    """Termo como frase FTS5 (busca por substring com o tokenizador trigram)."""
+    return '"%s"' % termo.replace('"', '""')
+
+
+def _usa_fts(queryset, termo):
+    return _vendor(queryset) == 'sqlite' and len(termo) >= TAMANHO_MINIMO_FTS
+
+
+def _filtro_icontains(campos, termo):
+    return reduce(or_, (Q(**{f'{campo}__icontains': termo}) for campo in campos))
+
+
+def buscar_contas(queryset, termo):
+    """
+    Filtra contas pelo termo em nome_conta, nome_razao, cpf_cnpj e placa.
+    No PostgreSQL o icontains usa os índices GIN trigram; no SQLite a busca
+    vai para a tabela FTS5.
+    """
+    termo = (termo or '').strip()
+    if not termo:
+        return queryset
+
+    if _usa_fts(queryset, termo):
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {TABELA_BUSCA_SQLITE} WHERE {TABELA_BUSCA_SQLITE} MATCH %s',
+            [_termo_fts(termo)],
+        ))
+    return queryset.filter(_filtro_icontains(CAMPOS_BUSCA_CONTA, termo))
+
+
+def buscar_grupos(queryset, termo):
+    """Filtra grupos de conta pelo nome (índice trigram no PostgreSQL)."""
+    termo = (termo or '').strip()
+    if not termo:
+        return queryset
+    return queryset.filter(_filtro_icontains(CAMPOS_BUSCA_GRUPO, termo))
+
+
+def ordenar_por_relevancia(queryset, termo):
+    """
+    Anota `relevancia` (maior é melhor) e ordena por ela: similaridade
+    trigram no PostgreSQL e bm25 do FTS5 no SQLite.
+    """
+    termo = (termo or '').strip()
+    if not termo:
+        return queryset
+
+    vendor = _vendor(queryset)
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        from django.db.models.functions import Greatest
+
+        relevancia = Greatest(*[TrigramWordSimilarity(termo, campo) for campo in CAMPOS_BUSCA_CONTA])
+    elif _usa_fts(queryset, termo):
+        tabela = queryset.model._meta.db_table
+        relevancia = RawSQL(
+            f'SELECT -bm25({TABELA_BUSCA_SQLITE}) FROM {TABELA_BUSCA_SQLITE} '
+            f'WHERE {TABELA_BUSCA_SQLITE} MATCH %s AND rowid = "{tabela}"."id"',
+            [_termo_fts(termo)],
+            output_field=FloatField(),
+        )
+    else:
+        relevancia = Value(0.0, output_field=FloatField())
+
+    return queryset.annotate(relevancia=relevancia).order_by('-relevancia', '-id')
+
+
+# -----------------------------------------------------------------------------
+# Manutenção dos índices
+# -----------------------------------------------------------------------------
+
+def reconstruir_indice_busca(connection):
+    """Recarrega toda a tabela FTS5 a partir de pay_contapagar (apenas SQLite)."""
+    if connection.vendor != 'sqlite':
+        return
+    colunas = ', '.join(CAMPOS_BUSCA_CONTA)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABELA_BUSCA_SQLITE}')
+        cursor.execute(
+            f'INSERT INTO {TABELA_BUSCA_SQLITE} (rowid, {colunas}) '
+            f'SELECT id, {colunas} FROM pay_contapagar'
+        )
+
+
+def sql_gatilhos_busca():
+    """
+    CREATE TRIGGER dos gatilhos que mantêm a tabela FTS5 em dia com
+    pay_contapagar em qualquer escrita (save, bulk_create, QuerySet.update,
+    migrações de dados), inclusive as que não disparam signals.
+    """
+    colunas = ', '.join(CAMPOS_BUSCA_CONTA)
+    novos = ', '.join(f'new.{campo}' for campo in CAMPOS_BUSCA_CONTA)
+    inserir = f'INSERT INTO {TABELA_BUSCA_SQLITE} (rowid, {colunas}) VALUES (new.id, {novos});'
+    remover = f'DELETE FROM {TABELA_BUSCA_SQLITE} WHERE rowid = old.id;'
+    insercao, alteracao, exclusao = GATILHOS_BUSCA_SQLITE
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {insercao} AFTER INSERT ON pay_contapagar BEGIN {inserir} END',
+        f'CREATE TRIGGER IF NOT EXISTS {alteracao} AFTER UPDATE OF id, {colunas} ON pay_contapagar '
+        f'BEGIN {remover} {inserir} END',
+        f'CREATE TRIGGER IF NOT EXISTS {exclusao} AFTER DELETE ON pay_contapagar BEGIN {remover} END',
+    ]
+
+
+def garantir_gatilhos_busca(connection):
+    """
+    Recria os gatilhos da tabela FTS5 que estiverem faltando e, nesse caso,
+    recarrega o índice, que pode ter ficado desatualizado sem eles. O SQLite
+    apaga os gatilhos junto com a tabela quando uma migração reconstrói
+    pay_contapagar, por isso roda após cada migrate. Retorna se recriou.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master WHERE name = %s OR (type = 'trigger' AND tbl_name = 'pay_contapagar')",
+            [TABELA_BUSCA_SQLITE],
+        )
+        existentes = {nome for _, nome in cursor.fetchall()}
+        if TABELA_BUSCA_SQLITE not in existentes or existentes.issuperset(GATILHOS_BUSCA_SQLITE):
+            return False
+        for sql in sql_gatilhos_busca():
+            cursor.execute(sql)
+    reconstruir_indice_busca(connection)
+    return True
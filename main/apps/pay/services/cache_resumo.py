@@ -0,0 +1,103 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from main.apps.pay.models import ContaPagar, Faturamento
+from main.apps.pay.services.resumo import filtrar_contas, resumo_contas
+
+
+PREFIXO = 'pay:resumo'
+ESCOPO_GLOBAL = 'todos'
+CHAVE_EPOCA = f'{PREFIXO}:epoca'
+CHAVE_FATURAMENTO = f'{PREFIXO}:faturamento'
+
+
+def normalizar_filtros(nome=None, grupo=None, status=None, recorrencia=None):
+    """Normaliza os filtros da listagem para montar a chave do cache."""
+    return (
+        (nome or '').strip().lower(),
+        str(grupo or '').strip(),
+        (status or '').strip(),
+        (recorrencia or '').strip(),
+    )
+
+
+def _chave_geracao(escopo):
+    return f'{PREFIXO}:geracao:{escopo}'
+
+
+def _geracoes(escopo):
+    """
+    Retorna (época, geração do escopo). A época invalida todos os resumos
+    e a geração apenas os resumos de um grupo (ou os sem filtro de grupo).
+    """
+    chaves = [CHAVE_EPOCA, _chave_geracao(escopo)]
+    valores = cache.get_many(chaves)
+
+    faltando = {chave: time.time_ns() for chave in chaves if chave not in valores}
+    for chave, valor in faltando.items():
+        cache.add(chave, valor, timeout=None)
+    if faltando:
+        valores = cache.get_many(chaves)
+
+    return valores.get(chaves[0], 0), valores.get(chaves[1], 0)
+
+
+def _chave_resumo(filtros, hoje):
+    escopo = filtros[1] or ESCOPO_GLOBAL
+    epoca, geracao = _geracoes(escopo)
+    assinatura = hashlib.md5('|'.join(filtros).encode('utf-8')).hexdigest()
+    return f'{PREFIXO}:{epoca}:{geracao}:{hoje.isoformat()}:{assinatura}'
+
+
+def resumo_contas_cache(filtros, hoje):
+    """Resumo das contas para os filtros normalizados, servido do cache quando possível."""
+    chave = _chave_resumo(filtros, hoje)
+    resumo = cache.get(chave)
+    if resumo is None:
+        nome, grupo, status, recorrencia = filtros
+        queryset = filtrar_contas(
+            ContaPagar.objects.all(),
+            nome=nome, grupo=grupo, status=status, recorrencia=recorrencia, hoje=hoje,
+        )
+        resumo = resumo_contas(queryset, hoje=hoje)
+        cache.set(chave, resumo, settings.RESUMO_CACHE_TIMEOUT)
+    return resumo
+
+
+def valor_ultimo_faturamento():
+    """Valor do último faturamento, mantido em cache até o próximo cadastro/edição."""
+    valor = cache.get(CHAVE_FATURAMENTO)
+    if valor is None:
+        ultimo_faturamento = Faturamento.get_ultimo_faturamento()
+        valor = ultimo_faturamento.valor if ultimo_faturamento else 0
+        cache.set(CHAVE_FATURAMENTO, valor, settings.RESUMO_CACHE_TIMEOUT)
+    return valor
+
+
+def resumo_dashboard_cache(filtros, hoje):
+    """Resumo das contas (do cache) acrescido do último faturamento e do lucro, usado nos cards da listagem."""
+    resumo = dict(resumo_contas_cache(filtros, hoje))
+    valor_faturamento = valor_ultimo_faturamento()
+
+    resumo['faturamento'] = valor_faturamento
+    resumo['lucro'] = valor_faturamento - resumo['total_contas']
+    return resumo
+
+
+def invalidar_resumo_grupos(*grupo_ids):
+    """Invalida os resumos sem filtro de grupo e os dos grupos informados."""
+    escopos = {ESCOPO_GLOBAL} | {str(grupo_id) for grupo_id in grupo_ids if grupo_id}
+    agora = time.time_ns()
+    cache.set_many({_chave_geracao(escopo): agora for escopo in escopos}, timeout=None)
+
+
+def invalidar_resumo_todos():
+    """Invalida todos os resumos (usado após atualizações em massa)."""
+    cache.set(CHAVE_EPOCA, time.time_ns(), timeout=None)
+
+
+def invalidar_faturamento():
+    cache.delete(CHAVE_FATURAMENTO)
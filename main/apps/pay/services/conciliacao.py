@@ -0,0 +1,187 @@
+import calendar
+import re
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.fields.json import KT
+from django.utils import timezone
+
+from main.apps.pay.models import ConciliacaoIXC, ContaPagar, ContratoIXC, DivergenciaConciliacao
+
+
+TRAVA_CONCILIACAO = 'conciliacao_ixc'
+
+# Registros lidos por vez de cada lado (iterator do banco)
+TAMANHO_LEITURA = 2000
+
+
+def normalizar_documento(valor):
+    return re.sub(r'\D', '', valor or '')
+
+
+def normalizar_nome(valor):
+    """Nome sem acentos, pontuação e diferença de maiúsculas ('Ótica São João Ltda.' -> 'otica sao joao ltda')."""
+    sem_acentos = unicodedata.normalize('NFKD', valor or '').encode('ascii', 'ignore').decode()
+    return ' '.join(re.sub(r'[^\w\s]', ' ', sem_acentos).casefold().split())
+
+
+def _valor(valor):
+    if valor in (None, ''):
+        return None
+    texto = str(valor).strip()
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(texto).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def _dia(valor):
+    """Dia do vencimento no IXC: aceita o dia ('10') ou uma data ('2024-05-10')."""
+    texto = str(valor or '').strip()
+    if re.fullmatch(r'\d{1,2}', texto):
+        dia = int(texto)
+    elif re.match(r'\d{4}-\d{2}-\d{2}', texto):
+        dia = int(texto[8:10])
+    else:
+        return None
+    return dia if 1 <= dia <= 31 else None
+
+
+def _dia_no_mes(dia, data):
+    """Dia de vencimento do IXC no mês de `data` (dia 31 em fevereiro vence no último dia, 28 ou 29)."""
+    return min(dia, calendar.monthrange(data.year, data.month)[1])
+
+
+def _contratos(status):
+    """Contratos do espelho com os campos de conciliação extraídos do JSON no banco."""
+    campos = settings.IXC_CAMPOS_CONCILIACAO
+    contratos = ContratoIXC.objects.all()
+    if status:
+        contratos = contratos.filter(status__in=status)
+    return contratos.values_list(
+        'id',
+        KT(f"dados__{campos['cpf_cnpj']}"),
+        KT(f"dados__{campos['nome_razao']}"),
+        KT(f"dados__{campos['valor']}"),
+        KT(f"dados__{campos['vencimento']}"),
+    ).order_by().iterator(chunk_size=TAMANHO_LEITURA)
+
+
+def _contas(grupo_conta_id):
+    contas = ContaPagar.objects.filter(~Q(cpf_cnpj='') | ~Q(nome_razao=''))
+    if grupo_conta_id:
+        contas = contas.filter(grupo_conta_id=grupo_conta_id)
+    return contas.values_list(
+        'id', 'cpf_cnpj', 'nome_razao', 'valor', 'data_vencimento'
+    ).order_by().iterator(chunk_size=TAMANHO_LEITURA)
+
+
+class _IndiceContas():
+    """Índices (hash) das contas por documento e por nome normalizados."""
+
+    def __init__(self):
+        self.contas = {}
+        self.por_documento = {}
+        self.por_nome = {}
+        self.conciliadas = set()
+
+    def adicionar(self, conta):
+        conta_id, cpf_cnpj, nome_razao = conta[:3]
+        self.contas[conta_id] = conta
+        documento = normalizar_documento(cpf_cnpj)
+        if documento:
+            self.por_documento.setdefault(documento, []).append(conta_id)
+        nome = normalizar_nome(nome_razao)
+        if nome:
+            self.por_nome.setdefault(nome, []).append(conta_id)
+
+    def candidatas(self, documento, nome):
+        """Contas ainda livres com o mesmo documento ou, sem documento em comum, o mesmo nome."""
+        for indice, chave in ((self.por_documento, documento), (self.por_nome, nome)):
+            if not chave:
+                continue
+            livres = [conta_id for conta_id in indice.get(chave, ()) if conta_id not in self.conciliadas]
+            if livres:
+                return livres
+        return []
+
+    def livres(self):
+        return (conta for conta_id, conta in self.contas.items() if conta_id not in self.conciliadas)
+
+
+def conciliar_contratos(grupo_conta_id=None, status=None):
+    """
+    Compara os contratos do espelho do IXC com as contas a pagar pelo
+    CPF/CNPJ (ou, sem ele, pela razão social) normalizado, com um join em
+    memória: as contas são indexadas uma vez e os contratos percorridos em
+    streaming. Entre as contas de um mesmo fornecedor é preferida a de
+    mesmo valor. Grava as divergências (contrato sem conta, conta sem
+    contrato, valor e dia de vencimento) em uma nova ConciliacaoIXC.
+    """
+    status = settings.IXC_STATUS_CONCILIACAO if status is None else status
+    tolerancia = Decimal(str(settings.CONCILIACAO_TOLERANCIA_VALOR))
+    conciliacao = ConciliacaoIXC.objects.create(iniciado_em=timezone.now())
+
+    indice = _IndiceContas()
+    for conta in _contas(grupo_conta_id):
+        indice.adicionar(conta)
+
+    divergencias = []
+    for contrato_id, cpf_cnpj, nome_razao, valor, vencimento in _contratos(status):
+        conciliacao.contratos += 1
+        valor_ixc = _valor(valor)
+        dia_ixc = _dia(vencimento)
+        item = dict(
+            conciliacao=conciliacao,
+            contrato_id=contrato_id,
+            cpf_cnpj=(cpf_cnpj or '')[:18],
+            nome_razao=(nome_razao or '')[:200],
+            valor_ixc=valor_ixc,
+            dia_vencimento_ixc=dia_ixc,
+        )
+
+        candidatas = indice.candidatas(normalizar_documento(cpf_cnpj), normalizar_nome(nome_razao))
+        if not candidatas:
+            divergencias.append(DivergenciaConciliacao(tipo='sem_conta', **item))
+            continue
+
+        conta_id = next(
+            (
+                candidata for candidata in candidatas
+                if valor_ixc is not None and abs(indice.contas[candidata][3] - valor_ixc) <= tolerancia
+            ),
+            candidatas[0],
+        )
+        indice.conciliadas.add(conta_id)
+        conciliacao.conciliados += 1
+        _, _, _, valor_conta, data_vencimento = indice.contas[conta_id]
+        item.update(conta_id=conta_id, valor_conta=valor_conta, data_vencimento_conta=data_vencimento)
+
+        if valor_ixc is not None and abs(valor_conta - valor_ixc) > tolerancia:
+            divergencias.append(DivergenciaConciliacao(tipo='valor', **item))
+        if dia_ixc is not None and data_vencimento.day != _dia_no_mes(dia_ixc, data_vencimento):
+            divergencias.append(DivergenciaConciliacao(tipo='vencimento', **item))
+
+    for conta_id, cpf_cnpj, nome_razao, valor_conta, data_vencimento in indice.livres():
+        divergencias.append(DivergenciaConciliacao(
+            conciliacao=conciliacao,
+            tipo='sem_contrato',
+            conta_id=conta_id,
+            cpf_cnpj=cpf_cnpj,
+            nome_razao=nome_razao,
+            valor_conta=valor_conta,
+            data_vencimento_conta=data_vencimento,
+        ))
+
+    conciliacao.contas = len(indice.contas)
+    conciliacao.divergencias = len(divergencias)
+    conciliacao.concluido_em = timezone.now()
+    with transaction.atomic():
+        DivergenciaConciliacao.objects.bulk_create(divergencias, batch_size=1000)
+        conciliacao.save()
+    return conciliacao
@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from main.apps.pay.models import ContratoIXC
+from main.src.agents.ixc_agent import IXC
+from main.src.httperro.http_erro import HttpErrors
+
+
+TRAVA_CONTRATOS_IXC = 'contratos_ixc'
+
+# Colunas sobrescritas quando o contrato já existe no espelho
+CAMPOS_ATUALIZADOS = [
+    'id_cliente', 'status', 'descricao', 'data_ativacao', 'ultima_atualizacao', 'dados', 'sincronizado_em',
+]
+
+FORMATO_DATA_HORA_IXC = '%Y-%m-%d %H:%M:%S'
+
+
+def _inteiro(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _data_hora(valor):
+    """Data/hora do IXC ('2024-05-10 14:32:00'); datas zeradas ou inválidas viram None."""
+    try:
+        return timezone.make_aware(datetime.strptime((valor or '')[:19], FORMATO_DATA_HORA_IXC))
+    except ValueError:
+        return None
+
+
+def _data(valor):
+    try:
+        return datetime.strptime((valor or '')[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def contrato_de_registro(registro, agora):
+    """ContratoIXC (não salvo) a partir de um registro de cliente_contrato da API."""
+    return ContratoIXC(
+        id_ixc=int(registro['id']),
+        id_cliente=_inteiro(registro.get('id_cliente')),
+        status=registro.get('status') or '',
+        descricao=(registro.get('contrato') or '')[:300],
+        data_ativacao=_data(registro.get('data_ativacao')),
+        ultima_atualizacao=_data_hora(registro.get('ultima_atualizacao')),
+        dados=registro,
+        sincronizado_em=agora,
+    )
+
+
+def salvar_contratos(registros, agora=None):
+    """Insere ou atualiza (upsert por id_ixc) os registros no espelho. Retorna quantos foram gravados."""
+    agora = agora or timezone.now()
+    contratos = [contrato_de_registro(registro, agora) for registro in registros]
+    ContratoIXC.objects.bulk_create(
+        contratos,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['id_ixc'],
+        update_fields=CAMPOS_ATUALIZADOS,
+    )
+    return len(contratos)
+
+
+def _salvar_em_lotes(registros, tamanho_lote):
+    total = 0
+    while lote := list(islice(registros, tamanho_lote)):
+        total += salvar_contratos(lote)
+    return total
+
+
+def sincronizar_contratos(ixc=None, completa=False, tamanho_lote=None):
+    """
+    Atualiza o espelho a partir do IXC, lendo os contratos em ordem de id
+    (paginação por chave). Na sincronização incremental só são buscados os
+    contratos alterados desde a maior `ultima_atualizacao` do espelho e os
+    com id maior que o último conhecido. Os alterados são gravados em uma
+    transação: como vêm por id e não por data, uma execução interrompida
+    não pode avançar a marca d'água sem ter gravado todos eles. Os novos
+    vêm em ordem de id, então a marca de id avança lote a lote. Sem
+    espelho ou com `completa`, busca todos. Retorna quantos contratos
+    foram gravados.
+    """
+    ixc = ixc or IXC()
+    tamanho_lote = tamanho_lote or settings.IXC_POR_PAGINA
+    marcas = ContratoIXC.objects.aggregate(atualizacao=Max('ultima_atualizacao'), id=Max('id_ixc'))
+
+    if completa or marcas['id'] is None:
+        return _salvar_em_lotes(ixc.iter_contratos(por_pagina=tamanho_lote), tamanho_lote)
+
+    total = 0
+    if marcas['atualizacao'] is not None:
+        alterados = ixc.iter_contratos(
+            filtros=[
+                (
+                    'cliente_contrato.ultima_atualizacao', '>=',
+                    timezone.localtime(marcas['atualizacao']).strftime(FORMATO_DATA_HORA_IXC),
+                ),
+                ('cliente_contrato.id', '<=', marcas['id']),
+            ],
+            por_pagina=tamanho_lote,
+        )
+        with transaction.atomic():
+            total += _salvar_em_lotes(alterados, tamanho_lote)
+
+    novos = ixc.iter_contratos(filtros=[('cliente_contrato.id', '>', marcas['id'])], por_pagina=tamanho_lote)
+    total += _salvar_em_lotes(novos, tamanho_lote)
+    return total
+
+
+def _vencido(contrato, ttl):
+    return timezone.now() - contrato.sincronizado_em > timedelta(seconds=ttl)
+
+
+def obter_contrato(contrato_id, ttl=None, ixc=None):
+    """
+    Contrato do espelho (leitura local pelo índice de id_ixc). Se não
+    estiver no espelho ou a cópia for mais velha que IXC_ESPELHO_TTL
+    segundos, busca no IXC e atualiza o espelho; se o IXC estiver fora,
+    devolve a cópia local mesmo vencida. Retorna None se o contrato não
+    existir.
+    """
+    ttl = settings.IXC_ESPELHO_TTL if ttl is None else ttl
+    contrato = ContratoIXC.objects.filter(id_ixc=contrato_id).first()
+    if contrato is not None and not _vencido(contrato, ttl):
+        return contrato
+
+    try:
+        registros = (ixc or IXC()).get_contratos(contrato_id)['response'].get('registros') or []
+    except HttpErrors:
+        if contrato is not None:
+            return contrato
+        raise
+
+    if not registros:
+        return None
+    salvar_contratos(registros)
+    return ContratoIXC.objects.get(id_ixc=contrato_id)
+
+
+def obter_contratos(contrato_ids, ttl=None, ixc=None):
+    """
+    Versão em lote de obter_contrato: {id_ixc: ContratoIXC}. Os contratos
+    ausentes ou vencidos são buscados no IXC em poucas requisições; se o
+    IXC estiver fora, devolve só o que há no espelho.
+    """
+    ttl = settings.IXC_ESPELHO_TTL if ttl is None else ttl
+    contrato_ids = {int(contrato_id) for contrato_id in contrato_ids}
+    contratos = ContratoIXC.objects.in_bulk(contrato_ids, field_name='id_ixc')
+
+    buscar = [
+        contrato_id for contrato_id in contrato_ids
+        if contrato_id not in contratos or _vencido(contratos[contrato_id], ttl)
+    ]
+    if buscar:
+        try:
+            salvar_contratos(list((ixc or IXC()).iter_contratos(ids=sorted(buscar))))
+        except HttpErrors:
+            return contratos
+        contratos.update(ContratoIXC.objects.in_bulk(buscar, field_name='id_ixc'))
+
+    return contratos
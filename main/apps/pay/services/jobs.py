@@ -0,0 +1,111 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from main.apps.pay.models import ExecucaoJob
+
+
+logger = logging.getLogger(__name__)
+
+
+def limpar_execucoes(dias=None):
+    """
+    Apaga os checkpoints de execuções concluídas há mais de `dias` dias
+    (padrão EXECUCAO_JOB_RETENCAO_DIAS) e os de execuções interrompidas
+    sem atualização nesse prazo, que não serão mais retomadas (checkpoints
+    diários de dias passados). Retorna quantos foram apagados.
+    """
+    dias = settings.EXECUCAO_JOB_RETENCAO_DIAS if dias is None else dias
+    limite = timezone.now() - timedelta(days=dias)
+    apagados, _ = ExecucaoJob.objects.filter(
+        Q(concluido_em__lt=limite) | Q(concluido_em__isnull=True, atualizado_em__lt=limite)
+    ).delete()
+    return apagados
+
+
+class JobEmLotes(ABC):
+    """
+    Base para jobs que percorrem uma tabela em lotes pela chave primária.
+
+    Cada lote traz apenas `campos` (via values) das linhas com id acima do
+    último processado e é tratado em `processar_lote` dentro da mesma
+    transação que grava o checkpoint em ExecucaoJob. Assim uma execução que
+    cair é retomada do lote seguinte ao último concluído. Uma execução já
+    concluída com o mesmo nome recomeça do início, reaproveitando a linha;
+    ao concluir, os checkpoints antigos de outros jobs são apagados.
+    """
+
+    tamanho_lote = 500
+    campos = ('id',)
+
+    def __init__(self, nome, tamanho_lote=None):
+        self.nome = nome
+        self.tamanho_lote = tamanho_lote or self.tamanho_lote
+
+    @abstractmethod
+    def queryset(self):
+        """Registros a percorrer (o job filtra por id e ordena)."""
+
+    @abstractmethod
+    def processar_lote(self, registros):
+        """Trata um lote (lista de dicts com `campos`) dentro da transação do checkpoint."""
+
+    def __iniciar(self):
+        execucao, criada = ExecucaoJob.objects.get_or_create(
+            nome=self.nome, defaults={'iniciado_em': timezone.now()}
+        )
+        if not criada and execucao.concluido_em:
+            execucao.ultimo_id = execucao.lotes = execucao.registros = 0
+            execucao.duracao_total = execucao.duracao_maxima_lote = 0
+            execucao.iniciado_em = timezone.now()
+            execucao.concluido_em = None
+            execucao.save()
+        elif not criada:
+            logger.info('Job %s retomado após o id %s', self.nome, execucao.ultimo_id)
+        return execucao
+
+    def __proximo_lote(self, ultimo_id):
+        campos = ('id', *[campo for campo in self.campos if campo != 'id'])
+        return list(
+            self.queryset()
+            .filter(id__gt=ultimo_id)
+            .order_by('id')
+            .values(*campos)[:self.tamanho_lote]
+        )
+
+    def executar(self):
+        """Processa todos os lotes pendentes e retorna o ExecucaoJob com as métricas."""
+        execucao = self.__iniciar()
+
+        while True:
+            registros = self.__proximo_lote(execucao.ultimo_id)
+            if not registros:
+                break
+
+            inicio = time.monotonic()
+            with transaction.atomic():
+                self.processar_lote(registros)
+
+                duracao = time.monotonic() - inicio
+                execucao.ultimo_id = registros[-1]['id']
+                execucao.lotes += 1
+                execucao.registros += len(registros)
+                execucao.duracao_total += duracao
+                execucao.duracao_maxima_lote = max(execucao.duracao_maxima_lote, duracao)
+                execucao.save()
+
+            logger.info(
+                'Job %s: lote %s com %s registros em %.3fs',
+                self.nome, execucao.lotes, len(registros), duracao
+            )
+
+        execucao.concluido_em = timezone.now()
+        execucao.save(update_fields=['concluido_em', 'atualizado_em'])
+        limpar_execucoes()
+        return execucao
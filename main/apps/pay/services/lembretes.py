@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from main.apps.pay.models import ContaPagar, Notificacao, OcorrenciaLembrete, dias_lembrete
+from main.apps.pay.services.jobs import JobEmLotes
+from main.apps.pay.services.notificacoes import campos_payload, payload_notificacao
+
+
+def configuracao_lembretes(conta):
+    """(dias antes do vencimento, intervalo de atraso) da conta, herdando do grupo o que estiver em branco."""
+    grupo = conta.grupo_conta
+    dias_antes = conta.lembretes_dias_antes or grupo.lembretes_dias_antes
+    atraso = conta.lembrete_atraso_dias if conta.lembrete_atraso_dias is not None else grupo.lembrete_atraso_dias
+    return dias_lembrete(dias_antes), atraso
+
+
+def proximo_atraso(vencimento, atraso, hoje):
+    """Primeira repetição de atraso (vencimento + N * atraso) a partir de hoje."""
+    passados = max(1, -(-(hoje - vencimento).days // atraso))
+    return vencimento + timedelta(days=passados * atraso)
+
+
+def ocorrencias_conta(conta, hoje):
+    """
+    Lembretes futuros da conta para o vencimento atual: os de antes do
+    vencimento e só a próxima repetição de atraso (as seguintes são geradas
+    uma a uma, conforme cada lembrete de atraso é processado).
+    """
+    if conta.pago:
+        return []
+
+    dias_antes, atraso = configuracao_lembretes(conta)
+    vencimento = conta.data_vencimento
+    datas = [(vencimento - timedelta(days=dias), 'lembrete_antes') for dias in dias_antes]
+    if atraso:
+        datas.append((proximo_atraso(vencimento, atraso, hoje), 'lembrete_atraso'))
+
+    return [
+        OcorrenciaLembrete(conta_id=conta.id, tipo=tipo, data=data, data_vencimento=vencimento)
+        for data, tipo in datas
+        if data >= hoje
+    ]
+
+
+def materializar_lembretes(contas, hoje=None):
+    """
+    Refaz os lembretes pendentes das contas a partir da configuração atual
+    (conta ou grupo). Lembretes já processados são mantidos.
+    """
+    hoje = hoje or timezone.now().date()
+    contas = list(contas)
+    ocorrencias = [ocorrencia for conta in contas for ocorrencia in ocorrencias_conta(conta, hoje)]
+
+    with transaction.atomic():
+        OcorrenciaLembrete.objects.filter(
+            conta_id__in=[conta.id for conta in contas], processado_em__isnull=True
+        ).delete()
+        OcorrenciaLembrete.objects.bulk_create(ocorrencias, batch_size=500, ignore_conflicts=True)
+    return len(ocorrencias)
+
+
+def materializar_lembretes_grupo(grupo_id, hoje=None):
+    contas = ContaPagar.objects.filter(grupo_conta_id=grupo_id, pago=False).select_related('grupo_conta')
+    return materializar_lembretes(contas.iterator(chunk_size=500), hoje)
+
+
+class JobLembretes(JobEmLotes):
+    """
+    Grava na outbox os lembretes com data até `hoje` (faixa do índice de
+    lembretes pendentes), em lotes por id, e marca-os como processados na
+    transação do checkpoint do lote. Cada lote trata todos os lembretes
+    pendentes das contas que aparecem nele: se vários lembretes da mesma
+    conta acumularam (task parada), só o mais recente é enviado, mesmo que
+    estejam em lotes diferentes. Para cada conta ainda em atraso é agendada
+    a próxima repetição do lembrete de atraso. Um checkpoint por dia
+    ('lembretes:<data>'); `gerados` conta os lembretes desta execução.
+    """
+
+    campos = ('id', 'conta_id')
+
+    def __init__(self, hoje=None, tamanho_lote=None):
+        self.hoje = hoje or timezone.now().date()
+        super().__init__(f'lembretes:{self.hoje.isoformat()}', tamanho_lote)
+        self.gerados = 0
+
+    def queryset(self):
+        return OcorrenciaLembrete.objects.filter(processado_em__isnull=True, data__lte=self.hoje)
+
+    def processar_lote(self, registros):
+        agora = timezone.now()
+        ocorrencias = list(
+            self.queryset()
+            .filter(conta_id__in={registro['conta_id'] for registro in registros})
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('conta__grupo_conta')
+            .only(
+                'tipo', 'data', 'data_vencimento', 'conta__pago', 'conta__whatsapp_alerta_e164',
+                'conta__lembretes_dias_antes', 'conta__lembrete_atraso_dias',
+                'conta__grupo_conta__lembretes_dias_antes', 'conta__grupo_conta__lembrete_atraso_dias',
+                *campos_payload('conta__'),
+            )
+            .order_by('data')
+        )
+
+        # Mais recente por conta, ignorando contas pagas ou com vencimento já alterado
+        ultimas = {}
+        proximos_atrasos = {}
+        for ocorrencia in ocorrencias:
+            conta = ocorrencia.conta
+            if conta.pago or conta.data_vencimento != ocorrencia.data_vencimento:
+                continue
+            if conta.whatsapp_alerta_e164:
+                ultimas[conta.id] = ocorrencia
+            if ocorrencia.tipo == 'lembrete_atraso':
+                _, atraso = configuracao_lembretes(conta)
+                if atraso:
+                    proximos_atrasos[conta.id] = OcorrenciaLembrete(
+                        conta_id=conta.id,
+                        tipo='lembrete_atraso',
+                        data=proximo_atraso(conta.data_vencimento, atraso, self.hoje + timedelta(days=1)),
+                        data_vencimento=conta.data_vencimento,
+                    )
+
+        notificacoes = [
+            Notificacao(
+                conta_id=conta_id,
+                destinatario=ocorrencia.conta.whatsapp_alerta_e164,
+                template=ocorrencia.tipo,
+                payload=payload_notificacao(ocorrencia.conta, ocorrencia.tipo),
+                chave_deduplicacao=(
+                    f'{ocorrencia.tipo}:{conta_id}:{ocorrencia.data_vencimento.isoformat()}:{ocorrencia.data.isoformat()}'
+                ),
+                proxima_tentativa=agora,
+            )
+            for conta_id, ocorrencia in ultimas.items()
+        ]
+        Notificacao.objects.bulk_create(notificacoes, batch_size=500, ignore_conflicts=True)
+        OcorrenciaLembrete.objects.filter(id__in=[ocorrencia.id for ocorrencia in ocorrencias]).update(
+            processado_em=agora
+        )
+        OcorrenciaLembrete.objects.bulk_create(proximos_atrasos.values(), batch_size=500, ignore_conflicts=True)
+        self.gerados += len(notificacoes)
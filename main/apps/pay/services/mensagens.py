@@ -0,0 +1,91 @@
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+
+# validar_modelo_mensagem continua importável daqui (referenciado pelas migrações antigas)
+from main.apps.pay.validators import PADRAO_VARIAVEL, VARIAVEIS_MENSAGEM, validar_modelo_mensagem  # noqa: F401
+
+
+def formatar_moeda(valor):
+    """Valor em reais no padrão brasileiro: Decimal('1234.5') -> 'R$ 1.234,50'."""
+    texto = f'{Decimal(valor):,.2f}'
+    return 'R$ ' + texto.replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def formatar_data(valor):
+    return valor.strftime('%d/%m/%Y')
+
+
+def formatar_valor(valor):
+    """Texto de uma variável: Decimal como moeda, datas como dd/mm/aaaa."""
+    if valor is None:
+        return ''
+    if isinstance(valor, Decimal):
+        return formatar_moeda(valor)
+    if isinstance(valor, date):
+        return formatar_data(valor)
+    return str(valor)
+
+
+class ModeloCompilado():
+    """
+    Texto de mensagem dividido uma única vez em trechos fixos e variáveis;
+    renderizar só concatena os trechos. Marcadores desconhecidos ficam no
+    texto como estão.
+    """
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.variaveis = set()
+        self.__trechos = []
+
+        posicao = 0
+        for marcador in PADRAO_VARIAVEL.finditer(texto):
+            nome = marcador.group(1)
+            if nome not in VARIAVEIS_MENSAGEM:
+                continue
+            self.__adicionar_texto(texto[posicao:marcador.start()])
+            self.__trechos.append((True, nome))
+            self.variaveis.add(nome)
+            posicao = marcador.end()
+        self.__adicionar_texto(texto[posicao:])
+
+    def __adicionar_texto(self, trecho):
+        if not trecho:
+            return
+        if self.__trechos and not self.__trechos[-1][0]:
+            self.__trechos[-1] = (False, self.__trechos[-1][1] + trecho)
+        else:
+            self.__trechos.append((False, trecho))
+
+    def renderizar(self, contexto):
+        """Monta a mensagem com um contexto de textos já formatados (KeyError se faltar variável)."""
+        return ''.join(contexto[valor] if variavel else valor for variavel, valor in self.__trechos)
+
+
+@lru_cache(maxsize=512)
+def compilar(texto):
+    """Modelo compilado, reaproveitado para textos de conteúdo igual."""
+    return ModeloCompilado(texto)
+
+
+def contexto_conta(conta, data_pagamento=None):
+    """Variáveis de uma conta formatadas para os modelos de mensagem."""
+    return {
+        'nome_conta': conta.nome_conta,
+        'nome_razao': conta.nome_razao or '',
+        'grupo': conta.grupo_conta.nome if conta.grupo_conta_id else '',
+        'valor': formatar_moeda(conta.valor),
+        'vencimento': formatar_data(conta.data_vencimento),
+        'data_pagamento': formatar_valor(data_pagamento),
+    }
+
+
+def renderizar(texto, contexto):
+    return compilar(texto).renderizar(contexto)
+
+
+def renderizar_em_lote(texto, contextos):
+    """Renderiza o mesmo modelo para vários contextos, compilando o texto uma vez."""
+    modelo = compilar(texto)
+    return [modelo.renderizar(contexto) for contexto in contextos]
@@ -0,0 +1,368 @@
+import re
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from main.apps.pay.models import ContaPagar, Notificacao, RegistroAlerta
+from main.apps.pay.services.mensagens import contexto_conta, renderizar, renderizar_em_lote
+from main.apps.pay.services.telefones import numero_envio
+from main.src.agents.evolution_async import send_text_many
+
+
+# Mensagens padrão, usadas quando nem a conta nem o grupo têm uma própria
+MENSAGENS = {
+    'alerta_prox_vencer': (
+        "⚠️ ATENÇÃO! ⚠️\n\n"
+        "A Conta Abaixo Está Próxima a Vencer.\n\n"
+        "Vencimento: {{vencimento}}\n\n"
+        "Nome da Conta: {{nome_conta}}\n\n"
+        "👉 Verifique o Pagamento Para Evitar Transtornos."
+    ),
+    'alerta_vence_hoje': (
+        "🚨 ATENÇÃO! 🚨\n\n"
+        "A Conta Abaixo a Vencer Hoje.\n\n"
+        "Vencimento: {{vencimento}}\n\n"
+        "Nome da Conta: {{nome_conta}}\n\n"
+        "👉 Verifique o Pagamento Para Evitar Transtornos."
+    ),
+    'lembrete_antes': (
+        "🔔 LEMBRETE 🔔\n\n"
+        "A Conta Abaixo Vence em Breve.\n\n"
+        "Vencimento: {{vencimento}}\n\n"
+        "Nome da Conta: {{nome_conta}}\n\n"
+        "👉 Verifique o Pagamento Para Evitar Transtornos."
+    ),
+    'lembrete_atraso': (
+        "❗ LEMBRETE ❗\n\n"
+        "A Conta Abaixo Continua em Atraso.\n\n"
+        "Vencimento: {{vencimento}}\n\n"
+        "Nome da Conta: {{nome_conta}}\n\n"
+        "👉 Regularize o Pagamento Para Evitar Transtornos."
+    ),
+}
+
+# Mensagem consolidada (modo resumo) para vários alertas do mesmo destinatário
+TITULOS_RESUMO = {
+    'alerta_vence_hoje': "🚨 Vencem Hoje:",
+    'alerta_prox_vencer': "⚠️ Próximas a Vencer:",
+    'lembrete_atraso': "❗ Em Atraso:",
+    'lembrete_antes': "🔔 Lembretes:",
+}
+ITEM_RESUMO = "• {{nome_conta}} - Vencimento: {{vencimento}}"
+CABECALHO_RESUMO = "⚠️ ATENÇÃO! ⚠️\n\nAs Contas Abaixo Precisam de Atenção."
+RODAPE_RESUMO = "👉 Verifique os Pagamentos Para Evitar Transtornos."
+
+# Templates registrados em RegistroAlerta (um por conta, tipo e vencimento)
+TEMPLATES_ALERTA = ('alerta_prox_vencer', 'alerta_vence_hoje')
+
+# Tempo que uma notificação fica reservada para um worker antes de poder ser retomada
+TEMPO_RESERVA = timedelta(minutes=5)
+
+
+# Campo (na conta e no grupo) com a mensagem própria de cada template
+CAMPOS_MENSAGEM = {template: f'mensagem_{template}' for template in MENSAGENS}
+
+
+def campos_payload(prefixo=''):
+    """Campos da conta (e do grupo) lidos para montar o payload, para usar em only()."""
+    return [
+        f'{prefixo}{campo}' for campo in (
+            'nome_conta', 'nome_razao', 'valor', 'data_vencimento', 'grupo_conta__nome',
+            *CAMPOS_MENSAGEM.values(),
+            *[f'grupo_conta__{campo}' for campo in CAMPOS_MENSAGEM.values()],
+        )
+    ]
+
+
+def modelo_mensagem(conta, template):
+    """Mensagem própria da conta ou, em branco, a do grupo ('' se nenhuma das duas tiver)."""
+    campo = CAMPOS_MENSAGEM[template]
+    return getattr(conta, campo) or getattr(conta.grupo_conta, campo)
+
+
+def payload_notificacao(conta, template):
+    """
+    Variáveis da conta para a mensagem e, se a conta ou o grupo tiverem
+    mensagem própria para o template, o texto dela em 'modelo'.
+    """
+    payload = contexto_conta(conta)
+    modelo = modelo_mensagem(conta, template)
+    if modelo:
+        payload['modelo'] = modelo
+    return payload
+
+
+def renderizar_notificacao(notificacao):
+    """Mensagem da notificação: a própria gravada no payload ou a padrão do template."""
+    modelo = notificacao.payload.get('modelo') or MENSAGENS[notificacao.template]
+    return renderizar(modelo, notificacao.payload)
+
+
+def normalizar_destinatario(numero):
+    """Apenas os dígitos do número, para agrupar o mesmo contato escrito em formatos diferentes."""
+    return re.sub(r'\D', '', numero or '')
+
+
+def renderizar_resumo(notificacoes):
+    """Uma mensagem listando os alertas de várias contas, agrupados por template."""
+    if len(notificacoes) == 1:
+        return renderizar_notificacao(notificacoes[0])
+
+    secoes = []
+    for template, titulo in TITULOS_RESUMO.items():
+        itens = renderizar_em_lote(ITEM_RESUMO, [
+            notificacao.payload for notificacao in notificacoes if notificacao.template == template
+        ])
+        if itens:
+            secoes.append("\n".join([titulo, *itens]))
+    return "\n\n".join([CABECALHO_RESUMO, *secoes, RODAPE_RESUMO])
+
+
+def _agrupar_por_destinatario(notificacoes, maximo):
+    """
+    Agrupa as notificações por destinatário normalizado, dividindo grupos
+    maiores que `maximo` em várias mensagens.
+    """
+    grupos = {}
+    for notificacao in notificacoes:
+        grupos.setdefault(normalizar_destinatario(notificacao.destinatario), []).append(notificacao)
+    return [
+        grupo[inicio:inicio + maximo]
+        for grupo in grupos.values()
+        for inicio in range(0, len(grupo), maximo)
+    ]
+
+
+def chave_alerta(template, conta_id, data_vencimento):
+    return f'{template}:{conta_id}:{data_vencimento.isoformat()}'
+
+
+def enfileirar_alertas(template, conta_ids):
+    """
+    Grava na outbox um alerta por conta (com WhatsApp de alerta configurado)
+    e registra o alerta em RegistroAlerta. Contas que já têm alerta desse
+    tipo para o vencimento atual são ignoradas (consulta única ao registro),
+    e a restrição única do registro e a chave de deduplicação da outbox
+    garantem que execuções concorrentes não dupliquem alertas. Um alerta
+    que havia esgotado as tentativas ('falhou') volta para a fila.
+    Retorna quantos alertas foram de fato gerados.
+    """
+    agora = timezone.now()
+    contas = list(
+        ContaPagar.objects.filter(id__in=conta_ids).exclude(whatsapp_alerta_e164='')
+        .select_related('grupo_conta')
+        .only('whatsapp_alerta_e164', *campos_payload())
+    )
+    ja_registrados = set(
+        RegistroAlerta.objects.filter(tipo=template, conta_id__in=[conta.id for conta in contas])
+        .values_list('conta_id', 'data_vencimento')
+    )
+    contas = [conta for conta in contas if (conta.id, conta.data_vencimento) not in ja_registrados]
+    if not contas:
+        return 0
+
+    notificacoes = {
+        chave_alerta(template, conta.id, conta.data_vencimento): Notificacao(
+            conta_id=conta.id,
+            destinatario=conta.whatsapp_alerta_e164,
+            template=template,
+            payload=payload_notificacao(conta, template),
+            chave_deduplicacao=chave_alerta(template, conta.id, conta.data_vencimento),
+            proxima_tentativa=agora,
+        )
+        for conta in contas
+    }
+    registros = [
+        RegistroAlerta(conta_id=conta.id, tipo=template, data_vencimento=conta.data_vencimento)
+        for conta in contas
+    ]
+    with transaction.atomic():
+        RegistroAlerta.objects.bulk_create(registros, batch_size=500, ignore_conflicts=True)
+        reenfileiradas = Notificacao.objects.filter(
+            chave_deduplicacao__in=notificacoes, estado='falhou'
+        ).update(estado='pendente', tentativas=0, ultimo_erro='', proxima_tentativa=agora, atualizado_em=agora)
+
+        existentes = set(
+            Notificacao.objects.filter(chave_deduplicacao__in=notificacoes)
+            .values_list('chave_deduplicacao', flat=True)
+        )
+        novas = [notificacao for chave, notificacao in notificacoes.items() if chave not in existentes]
+        Notificacao.objects.bulk_create(novas, batch_size=500, ignore_conflicts=True)
+
+        # ignore_conflicts não informa o que foi descartado: conta o que esta execução gravou
+        inseridas = Notificacao.objects.filter(
+            chave_deduplicacao__in=[notificacao.chave_deduplicacao for notificacao in novas],
+            criado_em__gte=agora,
+        ).count() if novas else 0
+    return reenfileiradas + inseridas
+
+
+def liberar_alertas_falhos(notificacoes):
+    """
+    Remove de RegistroAlerta os alertas que esgotaram as tentativas, para
+    que sejam gerados de novo na próxima vez que a conta entrar no status.
+    """
+    condicao = Q()
+    for notificacao in notificacoes:
+        if notificacao.estado == 'falhou' and notificacao.template in TEMPLATES_ALERTA and notificacao.conta_id:
+            data_vencimento = date.fromisoformat(notificacao.chave_deduplicacao.rsplit(':', 1)[1])
+            condicao |= Q(
+                conta_id=notificacao.conta_id, tipo=notificacao.template, data_vencimento=data_vencimento
+            )
+    if condicao:
+        RegistroAlerta.objects.filter(condicao).delete()
+
+
+def _backoff(tentativas):
+    segundos = settings.NOTIFICACAO_BACKOFF_SEGUNDOS * (2 ** (tentativas - 1))
+    return timedelta(seconds=min(segundos, settings.NOTIFICACAO_BACKOFF_MAXIMO))
+
+
+def _prontas_para_envio(agora):
+    """Notificações pendentes (ou com reserva expirada) cuja próxima tentativa já chegou."""
+    return Notificacao.objects.filter(
+        estado__in=['pendente', 'enviando'],
+        proxima_tentativa__lte=agora,
+    )
+
+
+def lotes_prontos_para_envio(tamanho=None):
+    """
+    Ids das notificações prontas, divididos em lotes de até `tamanho`.
+    No modo resumo as notificações de um mesmo destinatário ficam no mesmo
+    lote, para saírem em uma única mensagem.
+    """
+    tamanho = tamanho or settings.NOTIFICACAO_LOTE
+    prontas = list(
+        _prontas_para_envio(timezone.now())
+        .order_by('proxima_tentativa')
+        .values_list('id', 'destinatario')
+    )
+    if not settings.NOTIFICACAO_RESUMO:
+        ids = [notificacao_id for notificacao_id, _ in prontas]
+        return [ids[inicio:inicio + tamanho] for inicio in range(0, len(ids), tamanho)]
+
+    grupos = {}
+    for notificacao_id, destinatario in prontas:
+        grupos.setdefault(normalizar_destinatario(destinatario), []).append(notificacao_id)
+
+    lotes, lote = [], []
+    for ids in grupos.values():
+        if lote and len(lote) + len(ids) > tamanho:
+            lotes.append(lote)
+            lote = []
+        lote.extend(ids)
+    if lote:
+        lotes.append(lote)
+    return lotes
+
+
+def reservar_lote(ids=None, tamanho=None):
+    """
+    Reserva um lote de notificações prontas para envio (restrito a `ids`,
+    quando informado). Notificações 'enviando' cuja reserva expirou (worker
+    caiu) voltam a ser elegíveis.
+    """
+    tamanho = tamanho or settings.NOTIFICACAO_LOTE
+    agora = timezone.now()
+
+    with transaction.atomic():
+        prontas = _prontas_para_envio(agora)
+        if ids is not None:
+            prontas = prontas.filter(id__in=ids)
+        ids_reservados = list(
+            prontas
+            .order_by('proxima_tentativa')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:tamanho]
+        )
+        Notificacao.objects.filter(id__in=ids_reservados).update(
+            estado='enviando', proxima_tentativa=agora + TEMPO_RESERVA, atualizado_em=agora
+        )
+
+    return list(Notificacao.objects.filter(id__in=ids_reservados))
+
+
+# Colunas gravadas (bulk_update) após o envio de um lote
+CAMPOS_RESULTADO = ['tentativas', 'estado', 'enviado_em', 'ultimo_erro', 'proxima_tentativa', 'atualizado_em']
+
+
+def registrar_resultado(notificacao, resultado, agora=None):
+    """
+    Aplica o resultado de um envio à notificação (sem salvar) e agenda a
+    retentativa com backoff em caso de falha. A gravação fica a cargo de
+    gravar_resultados, uma vez por lote.
+    """
+    agora = agora or timezone.now()
+    notificacao.tentativas += 1
+    notificacao.atualizado_em = agora
+
+    if resultado['ok']:
+        notificacao.estado = 'enviado'
+        notificacao.enviado_em = agora
+        return notificacao
+
+    notificacao.ultimo_erro = str(resultado['erro'])
+    if notificacao.tentativas >= settings.NOTIFICACAO_MAX_TENTATIVAS:
+        notificacao.estado = 'falhou'
+    else:
+        notificacao.estado = 'pendente'
+        notificacao.proxima_tentativa = agora + _backoff(notificacao.tentativas)
+    return notificacao
+
+
+def gravar_resultados(notificacoes):
+    """
+    Grava o resultado de um lote inteiro de envios em uma única atualização
+    e libera o registro dos alertas que falharam de vez.
+    """
+    with transaction.atomic():
+        Notificacao.objects.bulk_update(notificacoes, CAMPOS_RESULTADO, batch_size=500)
+        liberar_alertas_falhos(notificacoes)
+
+
+def despachar_lote(ids=None, tamanho=None):
+    """
+    Reserva e envia um lote concorrentemente (AsyncEvolution). No modo
+    resumo os alertas do mesmo destinatário saem em uma única mensagem.
+    Uma mensagem que não pode ser montada conta como falha sem afetar as
+    demais. Os resultados são gravados juntos ao final do lote.
+    Retorna (enviadas, falhas, tamanho do lote).
+    """
+    lote = reservar_lote(ids=ids, tamanho=tamanho)
+    if not lote:
+        return 0, 0, 0
+
+    if settings.NOTIFICACAO_RESUMO:
+        grupos = _agrupar_por_destinatario(lote, settings.NOTIFICACAO_RESUMO_MAXIMO)
+    else:
+        grupos = [[notificacao] for notificacao in lote]
+
+    envios = []
+    for grupo in grupos:
+        try:
+            texto = renderizar_resumo(grupo)
+        except (KeyError, IndexError, ValueError) as e:
+            for notificacao in grupo:
+                registrar_resultado(notificacao, {'ok': False, 'erro': f'Mensagem inválida: {e!r}'})
+            continue
+        envios.append((grupo, {'number': numero_envio(grupo[0].destinatario), 'text': texto}))
+
+    resultados = send_text_many(
+        [mensagem for _, mensagem in envios],
+        concurrency=settings.NOTIFICACAO_CONCORRENCIA,
+    )
+
+    agora = timezone.now()
+    enviadas = 0
+    for (grupo, _), resultado in zip(envios, resultados):
+        for notificacao in grupo:
+            registrar_resultado(notificacao, resultado, agora)
+        if resultado['ok']:
+            enviadas += len(grupo)
+
+    gravar_resultados(lote)
+    return enviadas, len(lote) - enviadas, len(lote)
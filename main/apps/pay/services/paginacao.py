@@ -0,0 +1,154 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+
+
+class PaginatorComTotal(Paginator):
+    """
+    Paginator que reaproveita um total já calculado (ex.: pelo resumo das
+    contas) em vez de executar um COUNT(*) extra.
+    """
+
+    def __init__(self, object_list, per_page, total=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if total is not None:
+            self.__dict__['count'] = total
+
+
+# Ordenações disponíveis na listagem de contas (o último campo deve ser único)
+ORDENACOES = {
+    'id': ('-id',),
+    'vencimento': ('data_vencimento', 'id'),
+}
+ORDENACAO_PADRAO = 'id'
+
+
+def _codificar_cursor(ordem, direcao, valores):
+    dados = json.dumps({'o': ordem, 'd': direcao, 'k': valores}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(dados.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decodificar_cursor(token, model, ordem):
+    """Retorna (direção, valores) do cursor ou None se o token for inválido."""
+    campos = ORDENACOES[ordem]
+    try:
+        preenchimento = '=' * (-len(token) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(token + preenchimento))
+        direcao, valores = dados['d'], dados['k']
+        if dados['o'] != ordem or direcao not in ('proximo', 'anterior') or len(valores) != len(campos):
+            return None
+        valores = [
+            model._meta.get_field(campo.lstrip('-')).to_python(valor)
+            for campo, valor in zip(campos, valores)
+        ]
+    except (ValueError, TypeError, KeyError, ValidationError, FieldDoesNotExist):
+        return None
+    return direcao, valores
+
+
+def _filtro_keyset(campos, valores, apos=True):
+    """
+    Monta a condição (a > x) OR (a = x AND b > y) ... respeitando a direção
+    de cada campo da ordenação.
+    """
+    condicao = Q()
+    for i, campo in enumerate(campos):
+        decrescente = campo.startswith('-')
+        operador = 'lt' if decrescente == apos else 'gt'
+        parte = Q(**{f'{campo.lstrip("-")}__{operador}': valores[i]})
+        for campo_anterior, valor_anterior in zip(campos[:i], valores[:i]):
+            parte &= Q(**{campo_anterior.lstrip('-'): valor_anterior})
+        condicao |= parte
+    return condicao
+
+
+def _inverter(campos):
+    return tuple(campo[1:] if campo.startswith('-') else f'-{campo}' for campo in campos)
+
+
+def _valores_chave(obj, campos):
+    valores = []
+    for campo in campos:
+        valor = getattr(obj, campo.lstrip('-'))
+        valores.append(valor.isoformat() if hasattr(valor, 'isoformat') else valor)
+    return valores
+
+
+def estimar_total(queryset):
+    """
+    Estimativa de linhas pelo planejador do PostgreSQL (sem COUNT(*)).
+    Retorna None nos demais bancos.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plano = json.loads(queryset.order_by().explain(format='json'))
+    return int(plano[0]['Plan']['Plan Rows'])
+
+
+class PaginaCursor:
+    """Página da paginação por cursor, iterável como um Page do Django."""
+
+    def __init__(self, object_list, proximo_cursor=None, cursor_anterior=None, total_estimado=None):
+        self.object_list = object_list
+        self.proximo_cursor = proximo_cursor
+        self.cursor_anterior = cursor_anterior
+        self.total_estimado = total_estimado
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.proximo_cursor is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginar_por_cursor(queryset, cursor=None, ordem=None, por_pagina=100, com_estimativa=False):
+    """
+    Paginação por chave (keyset): em vez de OFFSET + COUNT(*), filtra pelos
+    valores da última linha exibida, então qualquer página custa o mesmo
+    que a primeira.
+    """
+    ordem = ordem if ordem in ORDENACOES else ORDENACAO_PADRAO
+    campos = ORDENACOES[ordem]
+
+    direcao, valores = 'proximo', None
+    if cursor:
+        decodificado = _decodificar_cursor(cursor, queryset.model, ordem)
+        if decodificado:
+            direcao, valores = decodificado
+
+    pagina = queryset
+    if valores is not None:
+        pagina = pagina.filter(_filtro_keyset(campos, valores, apos=direcao == 'proximo'))
+    ordenacao = campos if direcao == 'proximo' else _inverter(campos)
+
+    linhas = list(pagina.order_by(*ordenacao)[:por_pagina + 1])
+    ha_mais = len(linhas) > por_pagina
+    linhas = linhas[:por_pagina]
+
+    if direcao == 'anterior':
+        linhas.reverse()
+        tem_proxima, tem_anterior = True, ha_mais
+    else:
+        tem_proxima, tem_anterior = ha_mais, valores is not None
+
+    proximo_cursor = cursor_anterior = None
+    if linhas and tem_proxima:
+        proximo_cursor = _codificar_cursor(ordem, 'proximo', _valores_chave(linhas[-1], campos))
+    if linhas and tem_anterior:
+        cursor_anterior = _codificar_cursor(ordem, 'anterior', _valores_chave(linhas[0], campos))
+
+    total_estimado = estimar_total(queryset) if com_estimativa else None
+    return PaginaCursor(linhas, proximo_cursor, cursor_anterior, total_estimado)
@@ -0,0 +1,95 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Q, Sum, Count, Value, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from main.apps.pay.services.busca import buscar_contas
+
+
+DIAS_PROXIMO_VENCER = 7
+
+
+def filtros_situacao(hoje):
+    """
+    Condições de cada situação da conta usadas tanto no filtro de status
+    da listagem quanto nos cards de totais.
+    """
+    proximo = hoje + timedelta(days=DIAS_PROXIMO_VENCER)
+    return {
+        'em_dia': Q(data_vencimento__gt=hoje, pago=False),
+        'hoje': Q(data_vencimento=hoje, pago=False),
+        'atrasada': Q(data_vencimento__lt=hoje, pago=False),
+        'proximo_vencer': Q(data_vencimento__gt=hoje, data_vencimento__lte=proximo, pago=False),
+    }
+
+
+# Colunas exibidas na tabela da listagem de contas
+CAMPOS_LISTAGEM = (
+    'id',
+    'nome_conta',
+    'grupo_conta__nome',
+    'status',
+    'pago',
+    'recorrencia',
+    'fixo_variado',
+    'data_vencimento',
+    'valor',
+)
+
+
+# Situação -> (chave do total, chave da quantidade) usadas no template
+CHAVES_RESUMO = {
+    'em_dia': ('total_em_dia', 'qtd_em_dia'),
+    'hoje': ('total_vence_hoje', 'qtd_vence_hoje'),
+    'atrasada': ('total_atrasado', 'qtd_atrasadas'),
+    'proximo_vencer': ('total_proximo_vencer', 'qtd_proximo_vencer'),
+}
+
+
+def filtrar_contas(queryset, nome=None, grupo=None, status=None, recorrencia=None, hoje=None):
+    """Aplica os filtros da listagem de contas sobre o queryset."""
+    hoje = hoje or timezone.now().date()
+
+    if nome:
+        queryset = buscar_contas(queryset, nome)
+    if grupo:
+        queryset = queryset.filter(grupo_conta_id=grupo)
+    if recorrencia:
+        queryset = queryset.filter(recorrencia=recorrencia)
+
+    condicao = filtros_situacao(hoje).get(status)
+    if condicao is not None:
+        queryset = queryset.filter(condicao)
+
+    return queryset
+
+
+def contas_listagem(queryset):
+    """
+    Projeção enxuta para a tabela: carrega apenas as colunas exibidas e o
+    nome do grupo no mesmo SELECT, sem consultas extras por linha.
+    """
+    return queryset.select_related('grupo_conta').only(*CAMPOS_LISTAGEM)
+
+
+def resumo_contas(queryset, hoje=None):
+    """
+    Calcula o total geral e o total/quantidade de cada situação em uma
+    única consulta com agregação condicional sobre o queryset filtrado.
+    """
+    hoje = hoje or timezone.now().date()
+    zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+    agregacoes = {
+        'total_contas': Coalesce(Sum('valor'), zero),
+        'total_registros': Count('id'),
+    }
+    for situacao, condicao in filtros_situacao(hoje).items():
+        chave_total, chave_qtd = CHAVES_RESUMO[situacao]
+        agregacoes[chave_total] = Coalesce(Sum('valor', filter=condicao), zero)
+        agregacoes[chave_qtd] = Count('id', filter=condicao)
+
+    return queryset.order_by().aggregate(**agregacoes)
+
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import DateField, F, Func
+from django.utils import timezone
+
+from main.apps.pay.models import ContaPagar
+from main.apps.pay.services.cache_resumo import invalidar_resumo_todos
+
+
+# Ordem de aplicação das transições
+TRANSICOES = ('em_dia', 'prox_vencer', 'vence_hoje', 'atrasado')
+
+# Tasks e comando de status atualizam as mesmas linhas e compartilham uma única trava
+TRAVA_STATUS = 'status_contas'
+
+# Alerta gerado para as contas que entram em cada status
+ALERTAS_TRANSICAO = {
+    'prox_vencer': 'alerta_prox_vencer',
+    'vence_hoje': 'alerta_vence_hoje',
+}
+
+# Quantidade de ids por UPDATE ... WHERE id IN (...)
+TAMANHO_LOTE_UPDATE = 500
+
+
+class SubtrairDias(Func):
+    """`data - dias` calculado no banco, com os dias vindos de outra coluna."""
+
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = DateField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template="DATE(%(expressions)s || ' days')",
+            arg_joiner=", '-' || ",
+            **extra_context
+        )
+
+
+def _contas_abertas():
+    """Contas não pagas anotadas com a data a partir da qual devem ser alertadas."""
+    return ContaPagar.objects.filter(pago=False).alias(
+        data_alerta=SubtrairDias(F('data_vencimento'), F('alertar_dias_antes'))
+    )
+
+
+def condicoes_transicao(hoje):
+    """Filtros (mutuamente exclusivos) que definem o status esperado de cada conta aberta."""
+    return {
+        'em_dia': {'data_vencimento__gt': hoje, 'data_alerta__gt': hoje},
+        'prox_vencer': {'data_vencimento__gt': hoje, 'data_alerta__lte': hoje},
+        'vence_hoje': {'data_vencimento': hoje},
+        'atrasado': {'data_vencimento__lt': hoje},
+    }
+
+
+def proxima_verificacao_transicao(status, hoje):
+    """
+    Próxima verificação (agenda) de uma conta que acabou de entrar em
+    `status`, calculada no banco: o início do alerta, o vencimento, o dia
+    seguinte ao vencimento ou nenhuma (mesma regra de calcular_proxima_verificacao).
+    """
+    return {
+        'em_dia': SubtrairDias(F('data_vencimento'), F('alertar_dias_antes')),
+        'prox_vencer': F('data_vencimento'),
+        'vence_hoje': hoje + timedelta(days=1),
+        'atrasado': None,
+    }[status]
+
+
+def aplicar_transicao(status, hoje=None, conta_ids=None):
+    """
+    Move para `status` todas as contas abertas (restritas a `conta_ids`,
+    quando informado) que se enquadram na regra e ainda estão em outro
+    status, reagendando a próxima verificação de cada uma. Retorna os ids
+    alterados.
+    """
+    hoje = hoje or timezone.now().date()
+    condicao = condicoes_transicao(hoje)[status]
+    contas = _contas_abertas()
+    if conta_ids is not None:
+        contas = contas.filter(id__in=conta_ids)
+
+    with transaction.atomic():
+        ids = list(
+            contas
+            .filter(**condicao)
+            .exclude(status=status)
+            .select_for_update()
+            .values_list('id', flat=True)
+        )
+        agora = timezone.now()
+        for inicio in range(0, len(ids), TAMANHO_LOTE_UPDATE):
+            ContaPagar.objects.filter(id__in=ids[inicio:inicio + TAMANHO_LOTE_UPDATE]).update(
+                status=status,
+                proxima_verificacao=proxima_verificacao_transicao(status, hoje),
+                atualizado_em=agora,
+            )
+
+    if ids:
+        invalidar_resumo_todos()
+    return ids
+
+
+def atualizar_status_contas(hoje=None, transicoes=TRANSICOES, conta_ids=None):
+    """Aplica as transições informadas e retorna {status: [ids alterados]}."""
+    hoje = hoje or timezone.now().date()
+    return {status: aplicar_transicao(status, hoje, conta_ids) for status in transicoes}
@@ -0,0 +1,53 @@
+import re
+
+
+DDI_PADRAO = '55'
+
+# Campo de WhatsApp da conta -> coluna normalizada correspondente
+CAMPOS_TELEFONE = {
+    'whatsapp_confirmacao': 'whatsapp_confirmacao_e164',
+    'whatsapp_contato_alerta': 'whatsapp_alerta_e164',
+}
+
+
+def normalizar_e164(numero, ddi=DDI_PADRAO):
+    """
+    Número de WhatsApp no formato E.164 ('+5521999990001'), ou '' se não
+    for um telefone válido. Números sem DDI são considerados brasileiros
+    (DDD + 8 ou 9 dígitos); o 0 de discagem à frente do DDD é ignorado.
+    """
+    numero = (numero or '').strip()
+    digitos = re.sub(r'\D', '', numero)
+    if not digitos:
+        return ''
+
+    if not numero.startswith('+'):
+        digitos = digitos.lstrip('0')
+        if len(digitos) in (10, 11):
+            digitos = ddi + digitos
+        elif not digitos.startswith(ddi):
+            return ''
+
+    if digitos.startswith(DDI_PADRAO):
+        # DDD (11 a 99) + 8 dígitos (fixo) ou 9 começando com 9 (celular)
+        local = digitos[len(DDI_PADRAO):]
+        valido = (
+            len(local) in (10, 11)
+            and local[0] != '0'
+            and (len(local) == 10 or local[2] == '9')
+        )
+    else:
+        valido = 8 <= len(digitos) <= 15
+
+    return f'+{digitos}' if valido else ''
+
+
+def numero_envio(e164):
+    """Número como a Evolution espera (só dígitos, com DDI)."""
+    return e164.lstrip('+')
+
+
+def normalizar_telefones_conta(conta):
+    """Atualiza as colunas E.164 da conta a partir dos campos digitados."""
+    for campo, campo_e164 in CAMPOS_TELEFONE.items():
+        setattr(conta, campo_e164, normalizar_e164(getattr(conta, campo)))
@@ -0,0 +1,118 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from main.apps.pay.models import TravaExecucao
+
+
+logger = logging.getLogger(__name__)
+
+# Intervalo entre tentativas enquanto espera a trava
+INTERVALO_ESPERA = 0.1
+
+CAMPOS_METRICAS = ('adquiridas', 'ocupadas', 'espera_ms')
+
+
+class TravaRedis():
+    """Lease no Redis (SET NX com expiração); só o dono libera a trava."""
+
+    def __init__(self, nome, duracao):
+        from django_redis import get_redis_connection
+
+        self.__lock = get_redis_connection('default').lock(
+            f'trava:{nome}', timeout=duracao, sleep=INTERVALO_ESPERA
+        )
+
+    def adquirir(self, espera):
+        return self.__lock.acquire(blocking=espera > 0, blocking_timeout=espera or None)
+
+    def liberar(self):
+        from redis.exceptions import LockError
+
+        try:
+            self.__lock.release()
+        except LockError:
+            # O lease expirou e a trava pode já estar com outra execução
+            pass
+
+
+class TravaBanco():
+    """Lease em TravaExecucao, para o ambiente sem Redis (SQLite em desenvolvimento)."""
+
+    def __init__(self, nome, duracao):
+        self.__nome = nome
+        self.__duracao = timedelta(seconds=duracao)
+        self.__dono = uuid.uuid4().hex
+
+    def __tentar(self):
+        agora = timezone.now()
+        dados = {'dono': self.__dono, 'adquirida_em': agora, 'expira_em': agora + self.__duracao}
+
+        # Assume uma trava expirada (execução anterior caiu sem liberar)
+        if TravaExecucao.objects.filter(nome=self.__nome, expira_em__lte=agora).update(**dados):
+            return True
+        try:
+            with transaction.atomic():
+                TravaExecucao.objects.create(nome=self.__nome, **dados)
+        except IntegrityError:
+            return False
+        return True
+
+    def adquirir(self, espera):
+        limite = time.monotonic() + espera
+        while not self.__tentar():
+            if time.monotonic() >= limite:
+                return False
+            time.sleep(INTERVALO_ESPERA)
+        return True
+
+    def liberar(self):
+        TravaExecucao.objects.filter(nome=self.__nome, dono=self.__dono).delete()
+
+
+def _registrar_metricas(nome, adquirida, espera):
+    incrementos = {'adquiridas' if adquirida else 'ocupadas': 1, 'espera_ms': round(espera * 1000)}
+    for campo, valor in incrementos.items():
+        chave = f'trava:{nome}:{campo}'
+        cache.add(chave, 0, timeout=None)
+        cache.incr(chave, valor)
+
+    logger.info(
+        'Trava %s %s após %.3fs de espera', nome, 'adquirida' if adquirida else 'ocupada', espera
+    )
+
+
+def metricas_trava(nome):
+    """Contadores acumulados da trava: adquiridas, ocupadas e tempo total de espera (ms)."""
+    return {campo: cache.get(f'trava:{nome}:{campo}', 0) for campo in CAMPOS_METRICAS}
+
+
+@contextmanager
+def trava_execucao(nome, duracao=None, espera=0):
+    """
+    Impede execuções sobrepostas de um job. Entrega True se a trava foi
+    adquirida (esperando até `espera` segundos) e False se outra execução
+    está em andamento. A trava expira após `duracao` segundos mesmo se o
+    processo cair sem liberar. Usa Redis quando configurado e o banco
+    como alternativa.
+    """
+    duracao = duracao or settings.TRAVA_DURACAO
+    classe = TravaRedis if settings.CACHE_REDIS_URL else TravaBanco
+    trava = classe(nome, duracao)
+
+    inicio = time.monotonic()
+    adquirida = trava.adquirir(espera)
+    _registrar_metricas(nome, adquirida, time.monotonic() - inicio)
+
+    try:
+        yield adquirida
+    finally:
+        if adquirida:
+            trava.liberar()
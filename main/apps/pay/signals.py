@@ -0,0 +1,109 @@
+from django.db import connections, transaction
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from .models import ContaPagar, Faturamento, GrupoConta
+from .services.cache_resumo import invalidar_resumo_grupos, invalidar_faturamento
+from .services.busca import garantir_gatilhos_busca
+from .services.agenda import calcular_proxima_verificacao
+from .services.telefones import CAMPOS_TELEFONE, normalizar_telefones_conta
+from .services.lembretes import materializar_lembretes
+from .tasks import rematerializar_lembretes_grupo
+
+# Campos que alteram a agenda de verificação de status da conta
+CAMPOS_AGENDA = {'pago', 'status', 'data_vencimento', 'alertar_dias_antes', 'proxima_verificacao'}
+
+# Campos que alteram os lembretes materializados
+CAMPOS_LEMBRETES_GRUPO = ('lembretes_dias_antes', 'lembrete_atraso_dias')
+CAMPOS_LEMBRETES_CONTA = ('grupo_conta', 'pago', 'data_vencimento', *CAMPOS_LEMBRETES_GRUPO)
+
+
+def _lembretes_conta(conta):
+    return tuple(getattr(conta, ContaPagar._meta.get_field(campo).attname) for campo in CAMPOS_LEMBRETES_CONTA)
+
+
+@receiver(pre_save, sender=ContaPagar)
+def guardar_grupo_anterior(sender, instance, update_fields=None, **kwargs):
+    """
+    Guarda o grupo anterior (para invalidar também o resumo dele se a conta
+    mudar de grupo) e a configuração de lembretes anterior, em uma consulta.
+    """
+    instance._grupo_conta_id_anterior = None
+    instance._lembretes_anteriores = None
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_LEMBRETES_CONTA):
+        return
+    if instance.pk:
+        instance._lembretes_anteriores = (
+            ContaPagar.objects.filter(pk=instance.pk)
+            .values_list(*CAMPOS_LEMBRETES_CONTA)
+            .first()
+        )
+        if instance._lembretes_anteriores:
+            instance._grupo_conta_id_anterior = instance._lembretes_anteriores[0]
+
+
+@receiver(pre_save, sender=ContaPagar)
+def agendar_verificacao(sender, instance, update_fields=None, **kwargs):
+    """Recalcula a próxima verificação de status (cadastro, edição e renovação após pagamento)."""
+    if update_fields is not None and not set(update_fields) & CAMPOS_AGENDA:
+        return
+    instance.proxima_verificacao = calcular_proxima_verificacao(instance)
+
+
+@receiver(pre_save, sender=ContaPagar)
+def normalizar_telefones(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_TELEFONE):
+        return
+    normalizar_telefones_conta(instance)
+
+
+@receiver(post_save, sender=ContaPagar)
+@receiver(post_delete, sender=ContaPagar)
+def invalidar_resumo_conta(sender, instance, **kwargs):
+    invalidar_resumo_grupos(
+        instance.grupo_conta_id,
+        getattr(instance, '_grupo_conta_id_anterior', None),
+    )
+
+
+@receiver(post_migrate)
+def recriar_gatilhos_busca(sender, app_config, using, **kwargs):
+    """O índice de busca (SQLite) é mantido por gatilhos do banco, refeitos se uma migração os apagou."""
+    if app_config.label == 'pay':
+        garantir_gatilhos_busca(connections[using])
+
+
+@receiver(post_save, sender=ContaPagar)
+def atualizar_lembretes_conta(sender, instance, created, update_fields=None, **kwargs):
+    """Refaz os lembretes da conta apenas quando o vencimento, o pagamento ou a configuração mudam."""
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_LEMBRETES_CONTA):
+        return
+    if not created and _lembretes_conta(instance) == getattr(instance, '_lembretes_anteriores', None):
+        return
+    materializar_lembretes([instance])
+
+
+@receiver(pre_save, sender=GrupoConta)
+def guardar_lembretes_grupo(sender, instance, **kwargs):
+    instance._lembretes_anteriores = (
+        GrupoConta.objects.filter(pk=instance.pk).values_list(*CAMPOS_LEMBRETES_GRUPO).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=GrupoConta)
+def atualizar_lembretes_grupo(sender, instance, created, **kwargs):
+    """
+    Refaz os lembretes das contas do grupo apenas quando a configuração de
+    lembretes muda, em uma task (fora da requisição) após o commit.
+    """
+    atuais = tuple(getattr(instance, campo) for campo in CAMPOS_LEMBRETES_GRUPO)
+    if created or atuais == getattr(instance, '_lembretes_anteriores', None):
+        return
+    transaction.on_commit(lambda: rematerializar_lembretes_grupo.delay(instance.pk))
+
+
+@receiver(post_save, sender=Faturamento)
+@receiver(post_delete, sender=Faturamento)
+def invalidar_resumo_faturamento(sender, instance, **kwargs):
+    invalidar_faturamento()
@@ -1,44 +1,71 @@
-from celery import shared_task
+from celery import shared_task, chord
+from celery.exceptions import Retry
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
 from .models import ContaPagar
 from django.conf import settings
 from main.src.agents.evolution_agent import Evolution
+from main.src.agents.evolution_pool import alguma_instancia_conectada, get_pool
+from main.src.agents.limite_taxa import limite_instancia
+from main.src.httperro.http_erro import HttpErrors
+from .services.status import TRAVA_STATUS
+from .services.travas import trava_execucao
+from .services.agenda import JobAgendaStatus
+from .services.lembretes import JobLembretes, materializar_lembretes_grupo
+from .services.mensagens import contexto_conta, renderizar
+from .services.telefones import numero_envio
+from .services.notificacoes import despachar_lote, lotes_prontos_para_envio
+from .services.contratos_ixc import TRAVA_CONTRATOS_IXC, sincronizar_contratos
+from .services.conciliacao import TRAVA_CONCILIACAO, conciliar_contratos
 
+# Marca que já existe um despacho agendado aguardando a reconexão do WhatsApp
+CHAVE_AGUARDANDO_CONEXAO = 'notificacoes:aguardando_conexao'
 
-@shared_task
-def enviar_confirmacao_pagamento(conta_id, data_pagamento_str):
+
+@shared_task(bind=True, max_retries=60)
+def enviar_confirmacao_pagamento(self, conta_id, data_pagamento_str, data_vencimento_str=None):
     """
     Task para enviar confirmação de pagamento via WhatsApp em segundo plano.
     
     Args:
         conta_id: ID da conta que foi paga
         data_pagamento_str: Data do pagamento no formato 'YYYY-MM-DD'
+        data_vencimento_str: Vencimento que foi pago ('YYYY-MM-DD'); a conta já
+            estará com o próximo vencimento quando a task rodar
     """
     try:
-        conta = ContaPagar.objects.get(id=conta_id)
+        conta = ContaPagar.objects.select_related('grupo_conta').get(id=conta_id)
+        
+        # Mensagem da conta ou, se em branco, a do grupo
+        modelo = conta.mensagem_confirmacao or conta.grupo_conta.mensagem_confirmacao
         
         # Verificar se tem WhatsApp e mensagem configurados
-        if not conta.whatsapp_confirmacao or not conta.mensagem_confirmacao:
-            return f"Conta {conta_id}: WhatsApp ou mensagem não configurados"
+        if not conta.whatsapp_confirmacao_e164 or not modelo:
+            return f"Conta {conta_id}: WhatsApp (válido) ou mensagem não configurados"
+        
+        # Instância do pool (conectada) para o destinatário; sem nenhuma, aguarda a reconexão
+        instancia = get_pool().escolher(conta.whatsapp_confirmacao_e164)
+        if instancia is None:
+            raise self.retry(countdown=settings.EVOLUTION_ESPERA_RECONEXAO)
         
         ev = Evolution()
         
         # Converter string de data para objeto date
         from datetime import datetime
         data_pagamento = datetime.strptime(data_pagamento_str, '%Y-%m-%d').date()
+        if data_vencimento_str:
+            conta.data_vencimento = datetime.strptime(data_vencimento_str, '%Y-%m-%d').date()
         
-        # Formatar mensagem substituindo variáveis
-        mensagem = conta.mensagem_confirmacao
-        mensagem = mensagem.replace('{{nome_conta}}', conta.nome_conta)
-        mensagem = mensagem.replace('{{valor}}', f"R$ {conta.valor}")
-        mensagem = mensagem.replace('{{data_pagamento}}', data_pagamento.strftime('%d/%m/%Y'))
+        # Formatar mensagem (valor em reais e datas no padrão dd/mm/aaaa)
+        mensagem = renderizar(modelo, contexto_conta(conta, data_pagamento))
         
-        # Enviar via WhatsApp
+        # Enviar via WhatsApp, respeitando o limite de envios da instância
+        limite_instancia(instancia).aguardar()
         response = ev.instance_send_text(
-            settings.INSTANCE_NAME,
-            settings.INSTANCE_KEY,
-            conta.whatsapp_confirmacao,
+            instancia['name'],
+            instancia['key'],
+            numero_envio(conta.whatsapp_confirmacao_e164),
             mensagem
         )
         
@@ -46,113 +73,208 @@ def enviar_confirmacao_pagamento(conta_id, data_pagamento_str):
         
     except ContaPagar.DoesNotExist:
         return f"Erro: Conta {conta_id} não encontrada"
-    except Exception as e:
-        return f"Erro ao enviar confirmação para conta {conta_id}: {str(e)}"
+    except Retry:
+        raise
+    except HttpErrors as e:
+        # Evolution fora do ar, sobrecarregada ou com o circuito aberto: tenta de novo mais tarde
+        if e.status_code >= 500 or e.status_code == 429:
+            raise self.retry(exc=e, countdown=settings.CIRCUITO_TEMPO_ABERTO)
+        raise
 
 
-@shared_task
-def verificar_status_contas():
+def _processar_agenda(task):
+    """
+    Aplica as transições das contas com verificação agendada até hoje e
+    grava os alertas na outbox (JobAgendaStatus, em lotes com checkpoint).
+    Retorna ({status: [ids alterados]}, alertas).
+    """
+    with trava_execucao(TRAVA_STATUS) as adquirida:
+        if not adquirida:
+            # Outra task de status está rodando: tenta de novo depois em vez de perder o dia
+            raise task.retry(countdown=settings.TRAVA_ESPERA_RETENTATIVA)
+        
+        job = JobAgendaStatus(timezone.now().date())
+        job.executar()
+        
+        # Os alertas vão para a outbox e são enviados pelo despachante
+        if job.alertas:
+            transaction.on_commit(despachar_notificacoes.delay)
+    
+    return job.transicoes, job.alertas
+
+
+@shared_task(bind=True, max_retries=settings.TRAVA_MAXIMO_RETENTATIVAS)
+def verificar_status_contas(self):
     """
     Task periódica para atualizar o status das contas conforme proximidade do vencimento.
-    Executa diariamente para verificar contas que precisam de alerta.
+    Mantida para os agendamentos já cadastrados no beat: processa a agenda
+    (como processar_agenda_status, que tem a própria entrada no beat) em
+    vez de varrer todas as contas.
+    """
+    transicoes, _ = _processar_agenda(self)
+    return f"{len(transicoes['prox_vencer'])} contas atualizadas para 'Próximo a Vencer'"
+
+
+@shared_task(bind=True, max_retries=settings.TRAVA_MAXIMO_RETENTATIVAS)
+def verificar_contas_vencendo_hoje(self):
+    """
+    Task para marcar contas que vencem hoje (processa a agenda, como
+    processar_agenda_status).
     """
-    hoje = timezone.now().date()
-    contas_atualizadas = 0
-    ev = Evolution()
+    transicoes, _ = _processar_agenda(self)
+    return f"{len(transicoes['vence_hoje'])} contas atualizadas para 'Vence Hoje'"
+
+
+@shared_task(bind=True, max_retries=settings.TRAVA_MAXIMO_RETENTATIVAS)
+def verificar_contas_atrasadas(self):
+    """
+    Task para marcar contas atrasadas (processa a agenda, como
+    processar_agenda_status).
+    """
+    transicoes, _ = _processar_agenda(self)
+    return f"{len(transicoes['atrasado'])} contas atualizadas para 'Em Atraso'"
+
+
+@shared_task(bind=True, max_retries=settings.TRAVA_MAXIMO_RETENTATIVAS)
+def processar_agenda_status(self):
+    """
+    Task periódica (entrada processar-agenda-status do beat, a cada
+    AGENDA_STATUS_INTERVALO segundos) que trata apenas as contas com
+    verificação agendada até hoje: aplica as transições de status e gera
+    os alertas. O trabalho é proporcional às contas que mudam no dia, não
+    ao tamanho da tabela.
+    """
+    transicoes, alertas = _processar_agenda(self)
+    alteradas = sum(len(ids) for ids in transicoes.values())
+    return f"{alteradas} contas com status atualizado, {alertas} alertas gerados"
+
+
+@shared_task
+def enviar_lembretes():
+    """
+    Task diária que gera os lembretes agendados para hoje (dias antes do
+    vencimento e repetições de atraso) a partir de OcorrenciaLembrete
+    (JobLembretes, em lotes com checkpoint).
+    """
+    job = JobLembretes(timezone.now().date())
+    job.executar()
+    if job.gerados:
+        transaction.on_commit(despachar_notificacoes.delay)
     
-    # Buscar contas em dia e não pagas
-    contas = ContaPagar.objects.filter(
-        status='em_dia',
-        pago=False
-    )
+    return f"{job.gerados} lembretes gerados"
+
+
+@shared_task
+def rematerializar_lembretes_grupo(grupo_id):
+    """
+    Refaz os lembretes pendentes das contas de um grupo após a mudança da
+    configuração de lembretes dele (disparada pelo signal do GrupoConta).
+    """
+    lembretes = materializar_lembretes_grupo(grupo_id)
+    return f"{lembretes} lembretes agendados para as contas do grupo {grupo_id}"
+
+
+@shared_task
+def despachar_notificacoes():
+    """
+    Task pai do envio de notificações: separa as notificações prontas em
+    lotes e distribui um subtask por lote (fila NOTIFICACAO_FILA), com um
+    chord que consolida o resumo da entrega. Roda também pelo beat
+    (CELERY_BEAT_SCHEDULE) para reprocessar as notificações com retentativa.
     
-    for conta in contas:
-        dias_ate_vencimento = (conta.data_vencimento - hoje).days
-        
-        # Se os dias até o vencimento são menores ou iguais ao alerta configurado
-        if dias_ate_vencimento <= conta.alertar_dias_antes and dias_ate_vencimento > 0:
-            conta.status = 'prox_vencer'
-            conta.save(update_fields=['status', 'atualizado_em'])
-            
-            # Enviar alerta apenas se houver WhatsApp configurado
-            if conta.whatsapp_contato_alerta:
-                # Formatar mensagem de alerta
-                mensagem = (
-                    "⚠️ ATENÇÃO! ⚠️\n\n"
-                    "A Conta Abaixo Está Próxima a Vencer.\n\n"
-                    f"Vencimento: {conta.data_vencimento.strftime('%d/%m/%Y')}\n\n"
-                    f"Nome da Conta: {conta.nome_conta}\n\n"
-                    "👉 Verifique o Pagamento Para Evitar Transtornos."
-                )
-                
-                # Enviar alerta via WhatsApp
-                response = ev.instance_send_text(
-                    settings.INSTANCE_NAME,
-                    settings.INSTANCE_KEY,
-                    conta.whatsapp_contato_alerta,
-                    mensagem
-                )
-            
-            contas_atualizadas += 1
+    Com o WhatsApp desconectado nada é enviado: um único despacho fica
+    agendado para depois de EVOLUTION_ESPERA_RECONEXAO segundos e o envio
+    recomeça sozinho quando a instância voltar.
+    """
+    if not alguma_instancia_conectada():
+        espera = settings.EVOLUTION_ESPERA_RECONEXAO
+        if cache.add(CHAVE_AGUARDANDO_CONEXAO, True, timeout=espera):
+            despachar_notificacoes.apply_async(countdown=espera)
+        return "WhatsApp desconectado: envio de notificações pausado"
+    
+    lotes = lotes_prontos_para_envio()
+    if not lotes:
+        return "Nenhuma notificação pendente"
     
-    return f"{contas_atualizadas} contas atualizadas para 'Próximo a Vencer'"
+    chord(enviar_lote_notificacoes.s(lote) for lote in lotes)(resumir_envio_notificacoes.s())
+    
+    total = sum(len(lote) for lote in lotes)
+    return f"{total} notificações distribuídas em {len(lotes)} lotes"
 
 
 @shared_task
-def verificar_contas_vencendo_hoje():
+def enviar_lote_notificacoes(ids):
     """
-    Task para marcar contas que vencem hoje.
+    Subtask que envia um lote de notificações. Erros inesperados são
+    devolvidos no resultado para não impedir o resumo dos demais lotes.
+    Se o WhatsApp caiu depois da distribuição, o lote fica para o próximo
+    despacho.
     """
-    hoje = timezone.now().date()
-    ev = Evolution()
-    
-    contas_vencendo_hoje = ContaPagar.objects.filter(
-        data_vencimento=hoje,
-        pago=False,
-        status__in=['em_dia', 'prox_vencer']
-    )
+    if not alguma_instancia_conectada():
+        return {"enviadas": 0, "falhas": 0, "ignoradas": len(ids), "lote": len(ids)}
     
-    contas_atualizadas = 0
-    for conta in contas_vencendo_hoje:
-        conta.status = 'vence_hoje'
-        conta.save(update_fields=['status', 'atualizado_em'])
-        
-        # Enviar alerta apenas se houver WhatsApp configurado
-        if conta.whatsapp_contato_alerta:
-            # Formatar mensagem de alerta
-            mensagem = (
-                "🚨 ATENÇÃO! 🚨\n\n"
-                "A Conta Abaixo a Vencer Hoje.\n\n"
-                f"Vencimento: {conta.data_vencimento.strftime('%d/%m/%Y')}\n\n"
-                f"Nome da Conta: {conta.nome_conta}\n\n"
-                "👉 Verifique o Pagamento Para Evitar Transtornos."
-            )
-            
-            # Enviar alerta via WhatsApp
-            response = ev.instance_send_text(
-                settings.INSTANCE_NAME,
-                settings.INSTANCE_KEY,
-                conta.whatsapp_contato_alerta,
-                mensagem
-            )
-        
-        contas_atualizadas += 1
+    try:
+        enviadas, falhas, tamanho = despachar_lote(ids=ids, tamanho=len(ids))
+    except Exception as e:
+        return {"enviadas": 0, "falhas": 0, "ignoradas": 0, "erro": str(e), "lote": len(ids)}
     
-    return f"{contas_atualizadas} contas atualizadas para 'Vence Hoje'"
+    # 'ignoradas' são as que outro worker já reservou ou que deixaram de estar pendentes
+    return {"enviadas": enviadas, "falhas": falhas, "ignoradas": len(ids) - tamanho, "lote": len(ids)}
 
 
 @shared_task
-def verificar_contas_atrasadas():
+def resumir_envio_notificacoes(resultados):
     """
-    Task para marcar contas atrasadas.
+    Callback do chord: consolida o resultado de todos os lotes.
     """
-    hoje = timezone.now().date()
+    enviadas = sum(resultado["enviadas"] for resultado in resultados)
+    falhas = sum(resultado["falhas"] for resultado in resultados)
+    ignoradas = sum(resultado["ignoradas"] for resultado in resultados)
+    lotes_com_erro = sum(1 for resultado in resultados if resultado.get("erro"))
     
-    contas_atrasadas = ContaPagar.objects.filter(
-        data_vencimento__lt=hoje,
-        pago=False
-    ).exclude(status='atrasado')
+    return (
+        f"{enviadas} notificações enviadas, {falhas} com falha, {ignoradas} ignoradas "
+        f"({len(resultados)} lotes, {lotes_com_erro} com erro)"
+    )
+
+
+@shared_task
+def sincronizar_contratos_ixc(completa=False):
+    """
+    Task periódica que atualiza o espelho local dos contratos do IXC
+    (incremental pela data da última atualização; `completa` relê todos).
+    """
+    with trava_execucao(TRAVA_CONTRATOS_IXC) as adquirida:
+        if not adquirida:
+            return "Execução ignorada: sincronização de contratos IXC já em andamento"
+        
+        total = sincronizar_contratos(completa=completa)
     
-    contas_atualizadas = contas_atrasadas.update(status='atrasado')
+    return f"{total} contratos IXC sincronizados"
+
+
+@shared_task
+def conciliar_contratos_ixc(grupo_conta_id=None, sincronizar=True):
+    """
+    Concilia os contratos do IXC com as contas a pagar e grava o relatório
+    de divergências. Antes atualiza o espelho (incremental); se o IXC
+    estiver fora, concilia com o que já está no espelho.
+    """
+    with trava_execucao(TRAVA_CONCILIACAO) as adquirida:
+        if not adquirida:
+            return "Execução ignorada: conciliação IXC já em andamento"
+        
+        if sincronizar:
+            try:
+                with trava_execucao(TRAVA_CONTRATOS_IXC) as sincronizando:
+                    if sincronizando:
+                        sincronizar_contratos()
+            except HttpErrors:
+                pass
+        
+        conciliacao = conciliar_contratos(grupo_conta_id)
     
-    return f"{contas_atualizadas} contas atualizadas para 'Em Atraso'"
+    return (
+        f"{conciliacao.contratos} contratos e {conciliacao.contas} contas conciliados: "
+        f"{conciliacao.conciliados} pares, {conciliacao.divergencias} divergências"
+    )
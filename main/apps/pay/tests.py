@@ -1,3 +1,1130 @@
-from django.test import TestCase
+import operator
+import threading
+import time
+from datetime import date, timedelta
+from importlib import import_module
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from celery.exceptions import Retry
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .forms import GrupoContaForm
+from .models import ContratoIXC, ExecucaoJob, GrupoConta, ContaPagar, Notificacao, OcorrenciaLembrete, RegistroAlerta
+from .services.conciliacao import _dia, _valor, conciliar_contratos
+from .services.contratos_ixc import obter_contrato, obter_contratos, salvar_contratos, sincronizar_contratos
+from .services.busca import GATILHOS_BUSCA_SQLITE, buscar_contas, garantir_gatilhos_busca, ordenar_por_relevancia
+from .services.cache_resumo import normalizar_filtros, resumo_contas_cache
+from .services.jobs import JobEmLotes
+from .services.lembretes import JobLembretes
+from .services.notificacoes import (
+    CABECALHO_RESUMO, MENSAGENS, chave_alerta, despachar_lote, enfileirar_alertas, lotes_prontos_para_envio,
+    renderizar_notificacao,
+)
+from .services.paginacao import paginar_por_cursor
+from .services.resumo import contas_listagem, resumo_contas
+from .services.agenda import JobAgendaStatus, calcular_proxima_verificacao
+from .services.status import TRAVA_STATUS, atualizar_status_contas
+from .services.travas import trava_execucao
+from .validators import validar_modelo_mensagem
+from .tasks import (
+    CHAVE_AGUARDANDO_CONEXAO, despachar_notificacoes, enviar_lote_notificacoes, processar_agenda_status,
+    rematerializar_lembretes_grupo, verificar_contas_atrasadas,
+)
+from main.src.agents.evolution_agent import Evolution
+from main.src.agents.evolution_async import send_text_many
+from main.src.agents.evolution_monitor import ESTADO_INDISPONIVEL, estado_instancia
+from main.src.agents.evolution_pool import get_pool
+from main.src.agents.http_session import get_session
+from main.src.agents.ixc_agent import IXC
+from main.src.agents.limite_taxa import LimiteTaxa, limite_instancia
+from main.src.httperro.http_erro import HttpErrors
+from main.src.agents.resiliencia import ABERTO, FECHADO, MEIO_ABERTO, CircuitBreaker, circuito, metricas_circuito
+
+
+def criar_conta(grupo, **campos):
+    dados = {
+        'nome_conta': 'Conta',
+        'grupo_conta': grupo,
+        'fixo_variado': 'fixo',
+        'recorrencia': 'mensal',
+        'valor': Decimal('100.00'),
+        'data_vencimento': timezone.now().date() + timedelta(days=30),
+    }
+    dados.update(campos)
+    return ContaPagar.objects.create(**dados)
+
+
+class ContaPagarListViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('teste', password='senha')
+        cls.hoje = timezone.now().date()
+        cls.energia = GrupoConta.objects.create(nome='Energia')
+        cls.aluguel = GrupoConta.objects.create(nome='Aluguel')
+
+        criar_conta(cls.energia, nome_conta='Luz loja', valor=Decimal('150.00'), data_vencimento=cls.hoje)
+        criar_conta(cls.energia, nome_conta='Luz depósito', valor=Decimal('50.00'), data_vencimento=cls.hoje - timedelta(days=3))
+        criar_conta(cls.aluguel, nome_conta='Aluguel loja', valor=Decimal('1000.00'), data_vencimento=cls.hoje + timedelta(days=5))
+        criar_conta(cls.aluguel, nome_conta='Aluguel depósito', valor=Decimal('800.00'), data_vencimento=cls.hoje + timedelta(days=20))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def listar(self, **parametros):
+        return self.client.get(reverse('conta_list'), {'paginacao': 'cursor', **parametros})
+
+    def test_listagem_sem_filtros(self):
+        # sessão, usuário, resumo, faturamento, página e grupos do filtro
+        with self.assertNumQueries(6):
+            resposta = self.listar()
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(resposta.context['contas']), 4)
+        self.assertEqual(resposta.context['total_contas'], Decimal('2000.00'))
+        self.assertEqual(resposta.context['total_vence_hoje'], Decimal('150.00'))
+        self.assertEqual(resposta.context['qtd_atrasadas'], 1)
+        self.assertEqual(resposta.context['qtd_proximo_vencer'], 1)
+        self.assertEqual(resposta.context['qtd_em_dia'], 2)
+
+    def test_busca_por_nome(self):
+        self.listar()
+        # Faturamento já está no cache; o resumo da busca ainda não
+        with self.assertNumQueries(5):
+            resposta = self.listar(nome='luz')
+
+        self.assertEqual({conta.nome_conta for conta in resposta.context['contas']}, {'Luz loja', 'Luz depósito'})
+        self.assertEqual(resposta.context['total_contas'], Decimal('200.00'))
+
+    def test_filtro_por_grupo_e_status(self):
+        self.listar(grupo=self.aluguel.id, status='proximo_vencer')
+        # Resumo e faturamento servidos do cache
+        with self.assertNumQueries(4):
+            resposta = self.listar(grupo=self.aluguel.id, status='proximo_vencer')
+
+        self.assertEqual([conta.nome_conta for conta in resposta.context['contas']], ['Aluguel loja'])
+        self.assertEqual(resposta.context['total_contas'], Decimal('1000.00'))
+        self.assertEqual(resposta.context['qtd_proximo_vencer'], 1)
+
+
+class PaginacaoCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('teste', password='senha')
+        grupo = GrupoConta.objects.create(nome='Energia')
+        hoje = timezone.now().date()
+        cls.contas = [
+            criar_conta(grupo, nome_conta=f'Conta {i}', data_vencimento=hoje + timedelta(days=i % 3))
+            for i in range(7)
+        ]
+
+    def test_proxima_e_anterior_por_vencimento(self):
+        queryset = ContaPagar.objects.all()
+        esperado = list(queryset.order_by('data_vencimento', 'id'))
+
+        primeira = paginar_por_cursor(queryset, ordem='vencimento', por_pagina=3)
+        segunda = paginar_por_cursor(queryset, primeira.proximo_cursor, ordem='vencimento', por_pagina=3)
+        terceira = paginar_por_cursor(queryset, segunda.proximo_cursor, ordem='vencimento', por_pagina=3)
+        volta = paginar_por_cursor(queryset, terceira.cursor_anterior, ordem='vencimento', por_pagina=3)
+
+        self.assertEqual(list(primeira) + list(segunda) + list(terceira), esperado)
+        self.assertFalse(primeira.has_previous())
+        self.assertFalse(terceira.has_next())
+        self.assertEqual(list(volta), list(segunda))
+
+    def test_cursor_invalido_volta_para_primeira_pagina(self):
+        pagina = paginar_por_cursor(ContaPagar.objects.all(), 'invalido', por_pagina=3)
+        self.assertEqual(list(pagina), list(ContaPagar.objects.order_by('-id')[:3]))
+
+    def test_listagem_exibe_total_estimado(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+        with mock.patch('main.apps.pay.services.paginacao.estimar_total', return_value=1234):
+            resposta = self.client.get(reverse('conta_list'), {'paginacao': 'cursor'})
+
+        self.assertEqual(resposta.context['contas'].total_estimado, 1234)
+        self.assertContains(resposta, '~1234 contas')
+
+
+class ResumoContasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hoje = timezone.now().date()
+        cls.grupo = GrupoConta.objects.create(nome='Energia')
+        criar_conta(cls.grupo, valor=Decimal('10.00'), data_vencimento=cls.hoje)
+        criar_conta(cls.grupo, valor=Decimal('20.00'), data_vencimento=cls.hoje - timedelta(days=1))
+        criar_conta(cls.grupo, valor=Decimal('30.00'), data_vencimento=cls.hoje + timedelta(days=2))
+        criar_conta(cls.grupo, valor=Decimal('40.00'), data_vencimento=cls.hoje + timedelta(days=15))
+        criar_conta(cls.grupo, valor=Decimal('50.00'), data_vencimento=cls.hoje, pago=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_totais_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            resumo = resumo_contas(ContaPagar.objects.all(), hoje=self.hoje)
+
+        self.assertEqual(resumo['total_contas'], Decimal('150.00'))
+        self.assertEqual(resumo['total_registros'], 5)
+        self.assertEqual((resumo['total_vence_hoje'], resumo['qtd_vence_hoje']), (Decimal('10.00'), 1))
+        self.assertEqual((resumo['total_atrasado'], resumo['qtd_atrasadas']), (Decimal('20.00'), 1))
+        self.assertEqual((resumo['total_proximo_vencer'], resumo['qtd_proximo_vencer']), (Decimal('30.00'), 1))
+        self.assertEqual((resumo['total_em_dia'], resumo['qtd_em_dia']), (Decimal('70.00'), 2))
+
+    def test_resumo_vazio_retorna_zeros(self):
+        resumo = resumo_contas(ContaPagar.objects.none(), hoje=self.hoje)
+        self.assertEqual(resumo['total_contas'], Decimal('0.00'))
+        self.assertEqual(resumo['qtd_em_dia'], 0)
+
+    def test_listagem_carrega_apenas_colunas_exibidas(self):
+        for quantidade in (1, 5):
+            with self.assertNumQueries(1):
+                contas = list(contas_listagem(ContaPagar.objects.order_by('id'))[:quantidade])
+                nomes_grupo = [conta.grupo_conta.nome for conta in contas]
+
+            self.assertEqual(nomes_grupo, ['Energia'] * quantidade)
+            self.assertIn('senha', contas[0].get_deferred_fields())
+            self.assertIn('descricao_observacao', contas[0].get_deferred_fields())
+
+    def test_cache_invalidado_ao_salvar_conta(self):
+        filtros = normalizar_filtros()
+        resumo = resumo_contas_cache(filtros, self.hoje)
+        self.assertEqual(resumo['total_contas'], Decimal('150.00'))
+
+        # Servido do cache: nenhuma consulta
+        with self.assertNumQueries(0):
+            self.assertEqual(resumo_contas_cache(filtros, self.hoje), resumo)
+
+        criar_conta(self.grupo, valor=Decimal('5.00'), data_vencimento=self.hoje)
+
+        with self.assertNumQueries(1):
+            resumo = resumo_contas_cache(filtros, self.hoje)
+        self.assertEqual(resumo['total_contas'], Decimal('155.00'))
+        self.assertEqual(resumo['qtd_vence_hoje'], 2)
+
+
+def criar_notificacao(destinatario, **campos):
+    dados = {
+        'destinatario': destinatario,
+        'template': 'alerta_vence_hoje',
+        'payload': {'nome_conta': 'Conta', 'vencimento': '10/05/2024'},
+        'chave_deduplicacao': f'teste:{destinatario}',
+        'proxima_tentativa': timezone.now() - timedelta(seconds=1),
+    }
+    dados.update(campos)
+    return Notificacao.objects.create(**dados)
+
+
+@override_settings(NOTIFICACAO_RESUMO=False, NOTIFICACAO_MAX_TENTATIVAS=3)
+class DespacharLoteTests(TestCase):
+
+    def despachar(self, resultados):
+        with mock.patch('main.apps.pay.services.notificacoes.send_text_many', return_value=resultados):
+            return despachar_lote()
+
+    def test_consultas_nao_crescem_com_o_lote(self):
+        criar_notificacao('+5521999990000')
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.despachar([{'ok': True}]), (1, 0, 1))
+
+        for i in range(1, 6):
+            criar_notificacao(f'+552199999{i:04d}')
+        # Reserva, leitura do lote e uma única gravação dos resultados, qualquer que seja o tamanho
+        with self.assertNumQueries(len(consultas)):
+            self.assertEqual(self.despachar([{'ok': True}] * 5), (5, 0, 5))
+
+        self.assertEqual(Notificacao.objects.filter(estado='enviado', tentativas=1).count(), 6)
+        self.assertFalse(Notificacao.objects.filter(estado='enviado', enviado_em__isnull=True).exists())
+
+    def test_falha_agenda_retentativa_e_desiste_no_limite(self):
+        pendente = criar_notificacao('+5521999990001')
+        esgotada = criar_notificacao('+5521999990002', tentativas=2)
+        antes = timezone.now()
+
+        self.assertEqual(self.despachar([{'ok': False, 'erro': 'HTTP 500'}] * 2), (0, 2, 2))
+
+        pendente.refresh_from_db()
+        esgotada.refresh_from_db()
+        self.assertEqual((pendente.estado, pendente.tentativas, pendente.ultimo_erro), ('pendente', 1, 'HTTP 500'))
+        self.assertGreater(pendente.proxima_tentativa, antes + timedelta(seconds=30))
+        self.assertEqual((esgotada.estado, esgotada.tentativas), ('falhou', 3))
+
+
+@override_settings(NOTIFICACAO_RESUMO=True, NOTIFICACAO_RESUMO_MAXIMO=3)
+class ResumoNotificacoesTests(TestCase):
+
+    def criar(self, destinatario, quantidade, nome='Conta', atraso=0):
+        return [
+            criar_notificacao(
+                destinatario,
+                payload={'nome_conta': f'{nome} {i}', 'vencimento': '10/05/2024'},
+                chave_deduplicacao=f'teste:{nome}:{i}',
+                proxima_tentativa=timezone.now() - timedelta(seconds=60 - atraso - i),
+            )
+            for i in range(quantidade)
+        ]
+
+    def despachar(self):
+        def enviar(mensagens, concurrency):
+            return [{'ok': True}] * len(mensagens)
+
+        with mock.patch('main.apps.pay.services.notificacoes.send_text_many', side_effect=enviar) as envio:
+            resultado = despachar_lote()
+        return resultado, envio.call_args.args[0]
+
+    def test_uma_mensagem_por_destinatario(self):
+        # O mesmo contato escrito em formatos diferentes é um destinatário só
+        luz = self.criar('+55 (21) 99999-0001', 1, 'Luz')
+        self.criar('+5521999990001', 1, 'Água')
+        gas = self.criar('+5521999990002', 1, 'Gás')
+
+        (enviadas, falhas, tamanho), mensagens = self.despachar()
+
+        self.assertEqual((enviadas, falhas, tamanho), (3, 0, 3))
+        self.assertEqual(len(mensagens), 2)
+        textos = {mensagem['number']: mensagem['text'] for mensagem in mensagens}
+        resumo = next(texto for texto in textos.values() if texto.startswith(CABECALHO_RESUMO))
+        self.assertIn('• Luz 0 - Vencimento: 10/05/2024', resumo)
+        self.assertIn('• Água 0 - Vencimento: 10/05/2024', resumo)
+        # Um único alerta para o destinatário sai com a mensagem normal do template
+        self.assertIn(renderizar_notificacao(gas[0]), textos.values())
+        self.assertNotEqual(renderizar_notificacao(luz[0]), resumo)
+        self.assertEqual(Notificacao.objects.filter(estado='enviado').count(), 3)
+
+    def test_resumo_dividido_no_maximo_de_contas(self):
+        notificacoes = self.criar('+5521999990001', 4)
+
+        (enviadas, _, _), mensagens = self.despachar()
+
+        self.assertEqual(enviadas, 4)
+        resumos = [mensagem['text'] for mensagem in mensagens if mensagem['text'].startswith(CABECALHO_RESUMO)]
+        avulsas = [mensagem['text'] for mensagem in mensagens if not mensagem['text'].startswith(CABECALHO_RESUMO)]
+        self.assertEqual([resumo.count('• Conta') for resumo in resumos], [3])
+        # A sobra de um único alerta volta para a mensagem normal
+        self.assertEqual(len(avulsas), 1)
+        self.assertIn(avulsas[0], [renderizar_notificacao(notificacao) for notificacao in notificacoes])
+
+    def test_destinatario_nunca_fica_em_dois_lotes(self):
+        # Prontas intercaladas: um corte simples a cada 2 ids separaria os destinatários
+        for i in range(3):
+            self.criar('+5521999990001', 1, f'A{i}', atraso=i * 3)
+            self.criar('+5521999990002', 1, f'B{i}', atraso=i * 3 + 1)
+        self.criar('+5521999990003', 1, 'C', atraso=20)
+
+        lotes = lotes_prontos_para_envio(tamanho=2)
+
+        destinatarios = [
+            set(Notificacao.objects.filter(id__in=lote).values_list('destinatario', flat=True)) for lote in lotes
+        ]
+        self.assertEqual(sorted(len(lote) for lote in lotes), [1, 3, 3])
+        for destinatario in ('+5521999990001', '+5521999990002', '+5521999990003'):
+            self.assertEqual(sum(destinatario in grupo for grupo in destinatarios), 1, destinatario)
+
+
+class HttpSessionTests(TestCase):
+
+    def test_status_so_repetido_em_metodos_idempotentes(self):
+        retry = get_session('teste_retry').get_adapter('https://exemplo.com').max_retries
+
+        self.assertTrue(retry.is_retry('GET', 503))
+        self.assertFalse(retry.is_retry('POST', 503))
+        self.assertFalse(retry.is_retry('GET', 500))
+
+
+class LimiteTaxaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_envios_espacados_e_compartilhados_entre_limitadores(self):
+        # Dois limitadores da mesma instância (como em dois processos) dividem a mesma taxa
+        primeiro, segundo = LimiteTaxa('instancia', 10), LimiteTaxa('instancia', 10)
+        esperas = [limite.reservar(agora=100.0) for limite in [primeiro, segundo] * 5]
+        self.assertEqual([round(espera, 2) for espera in esperas], [round(i / 10, 2) for i in range(10)])
+
+        # Janela cheia: a próxima vaga é no segundo seguinte
+        self.assertAlmostEqual(primeiro.reservar(agora=100.0), 1.0)
+        # Outra instância tem a própria taxa
+        self.assertEqual(LimiteTaxa('outra', 10).reservar(agora=100.0), 0)
+
+    def test_taxa_menor_que_um_por_segundo(self):
+        limite = LimiteTaxa('lenta', 0.5)
+        self.assertEqual(limite.reservar(agora=100.0), 0)
+        self.assertAlmostEqual(limite.reservar(agora=100.0), 2.0)
+
+    def test_envio_em_massa_nao_bloqueia_o_event_loop(self):
+        loop = threading.get_ident()
+        threads = []
+        reservar = LimiteTaxa.reservar
+
+        def registrar(limite, *args, **kwargs):
+            threads.append(threading.get_ident())
+            return reservar(limite, *args, **kwargs)
+
+        evolution = mock.Mock()
+        evolution.instance_send_text.side_effect = lambda *args: (
+            threads.append(threading.get_ident()) or {'status_code': 201, 'response': {}}
+        )
+        pool = mock.Mock(instancias=[{'name': 'a', 'key': 'a', 'rate_limit': 100}])
+        pool.escolher.return_value = {'name': 'a', 'key': 'a'}
+
+        with mock.patch.object(LimiteTaxa, 'reservar', registrar):
+            resultados = send_text_many(
+                [{'number': f'55219999900{i:02d}', 'text': 'oi'} for i in range(5)],
+                concurrency=3, evolution=evolution, pool=pool,
+            )
+
+        self.assertTrue(all(resultado['ok'] for resultado in resultados))
+        # 5 reservas e 5 envios, todos fora da thread do event loop
+        self.assertEqual(len(threads), 10)
+        self.assertNotIn(loop, threads)
+
+    @override_settings(EVOLUTION_RATE_LIMIT=0)
+    def test_limite_da_instancia(self):
+        self.assertEqual(limite_instancia({'name': 'a', 'rate_limit': 5}).por_segundo, 5)
+        self.assertEqual(limite_instancia({'name': 'a'}).reservar(), 0)
+
+
+class RotasCeleryTests(TestCase):
+
+    def test_lotes_de_notificacao_vao_para_a_fila_padrao(self):
+        from main.celery import app
+
+        rota = app.amqp.router.route({}, 'main.apps.pay.tasks.enviar_lote_notificacoes')
+        self.assertEqual(rota['queue'].name, app.conf.task_default_queue)
+
+    def test_tarefas_periodicas_registradas(self):
+        from django.conf import settings
+        from main.celery import app
+
+        for nome, entrada in settings.CELERY_BEAT_SCHEDULE.items():
+            with self.subTest(nome):
+                self.assertIn(entrada['task'], app.tasks)
+
+
+@override_settings(NOTIFICACAO_RESUMO=False, NOTIFICACAO_MAX_TENTATIVAS=1)
+class EnfileirarAlertasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        grupo = GrupoConta.objects.create(nome='Energia')
+        cls.conta = criar_conta(grupo, whatsapp_contato_alerta='(21) 99999-0000')
+
+    def test_conta_apenas_alertas_gravados(self):
+        self.assertEqual(enfileirar_alertas('alerta_prox_vencer', [self.conta.id]), 1)
+        self.assertEqual(enfileirar_alertas('alerta_prox_vencer', [self.conta.id]), 0)
+
+        # Alerta já gravado na outbox por outra execução, sem registro: nada novo é gerado
+        RegistroAlerta.objects.all().delete()
+        self.assertEqual(enfileirar_alertas('alerta_prox_vencer', [self.conta.id]), 0)
+        self.assertEqual(Notificacao.objects.count(), 1)
+
+    def test_alerta_que_falhou_volta_a_ser_gerado(self):
+        enfileirar_alertas('alerta_vence_hoje', [self.conta.id])
+        with mock.patch(
+            'main.apps.pay.services.notificacoes.send_text_many', return_value=[{'ok': False, 'erro': 'HTTP 500'}]
+        ):
+            despachar_lote()
+
+        notificacao = Notificacao.objects.get()
+        self.assertEqual(notificacao.estado, 'falhou')
+        self.assertEqual(
+            notificacao.chave_deduplicacao,
+            chave_alerta('alerta_vence_hoje', self.conta.id, self.conta.data_vencimento),
+        )
+        self.assertFalse(RegistroAlerta.objects.exists())
+
+        self.assertEqual(enfileirar_alertas('alerta_vence_hoje', [self.conta.id]), 1)
+        notificacao.refresh_from_db()
+        self.assertEqual((notificacao.estado, notificacao.tentativas), ('pendente', 0))
+        self.assertTrue(RegistroAlerta.objects.filter(conta=self.conta, tipo='alerta_vence_hoje').exists())
+
+
+class TasksStatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        grupo = GrupoConta.objects.create(nome='Energia')
+        cls.conta = criar_conta(grupo, data_vencimento=timezone.now().date() - timedelta(days=2))
+
+    def test_trava_ocupada_reagenda_a_task(self):
+        with trava_execucao(TRAVA_STATUS) as adquirida:
+            self.assertTrue(adquirida)
+            for task in (verificar_contas_atrasadas, processar_agenda_status):
+                with mock.patch.object(task, 'retry', side_effect=Retry) as retry:
+                    with self.assertRaises(Retry):
+                        task()
+                retry.assert_called_once_with(countdown=60)
+
+        self.conta.refresh_from_db()
+        self.assertNotEqual(self.conta.status, 'atrasado')
+
+    def test_trava_livre_executa(self):
+        self.assertEqual(verificar_contas_atrasadas(), "1 contas atualizadas para 'Em Atraso'")
+        self.conta.refresh_from_db()
+        self.assertEqual(self.conta.status, 'atrasado')
+
+
+class AgendaStatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hoje = timezone.now().date()
+        grupo = GrupoConta.objects.create(nome='Energia')
+        cls.contas = [
+            criar_conta(grupo, data_vencimento=cls.hoje + timedelta(days=dias), alertar_dias_antes=3, status=status)
+            for dias, status in ((10, 'prox_vencer'), (2, 'em_dia'), (0, 'em_dia'), (-1, 'vence_hoje'))
+        ]
+
+    def test_varredura_completa_reagenda_as_contas_alteradas(self):
+        transicoes = atualizar_status_contas(self.hoje)
+        self.assertEqual(sum(len(ids) for ids in transicoes.values()), 4)
+
+        for conta in ContaPagar.objects.filter(id__in=[conta.id for conta in self.contas]):
+            self.assertEqual(conta.proxima_verificacao, calcular_proxima_verificacao(conta, self.hoje), conta.status)
+
+    def test_job_retoma_do_checkpoint(self):
+        ids = sorted(conta.id for conta in self.contas)
+        ContaPagar.objects.filter(id__in=ids).update(proxima_verificacao=self.hoje)
+        ExecucaoJob.objects.create(
+            nome=f'agenda_status:{self.hoje.isoformat()}', ultimo_id=ids[1], lotes=1, registros=2,
+            iniciado_em=timezone.now(),
+        )
+
+        job = JobAgendaStatus(self.hoje, tamanho_lote=1)
+        execucao = job.executar()
+
+        self.assertEqual(sum(len(alteradas) for alteradas in job.transicoes.values()), 2)
+        self.assertEqual((execucao.lotes, execucao.registros), (3, 4))
+        self.assertIsNotNone(execucao.concluido_em)
+        status = dict(ContaPagar.objects.filter(id__in=ids).values_list('id', 'status'))
+        # As contas antes do checkpoint ficaram para a próxima execução
+        self.assertEqual([status[conta_id] for conta_id in ids], ['prox_vencer', 'em_dia', 'vence_hoje', 'atrasado'])
+        self.assertEqual(
+            list(ContaPagar.objects.filter(id__in=ids[2:]).order_by('id').values_list('proxima_verificacao', flat=True)),
+            [self.hoje + timedelta(days=1), None],
+        )
+
+    def test_job_grava_os_alertas_das_transicoes(self):
+        ContaPagar.objects.filter(id=self.contas[2].id).update(whatsapp_alerta_e164='+5521999990000')
+        ContaPagar.objects.update(proxima_verificacao=self.hoje)
+
+        job = JobAgendaStatus(self.hoje)
+        job.executar()
+
+        self.assertEqual(job.alertas, 1)
+        self.assertEqual(Notificacao.objects.get().template, 'alerta_vence_hoje')
+
+    def test_tasks_antigas_nao_varrem_contas_fora_da_agenda(self):
+        ContaPagar.objects.update(proxima_verificacao=None)
+        self.assertEqual(verificar_contas_atrasadas(), "0 contas atualizadas para 'Em Atraso'")
+        self.assertFalse(ContaPagar.objects.filter(status='atrasado').exists())
+
+
+class LembretesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hoje = timezone.now().date()
+        cls.grupo = GrupoConta.objects.create(nome='Energia', lembrete_atraso_dias=3)
+        cls.conta = criar_conta(
+            cls.grupo,
+            data_vencimento=cls.hoje - timedelta(days=200),
+            whatsapp_contato_alerta='(21) 99999-0000',
+        )
+
+    def datas_pendentes(self):
+        return list(
+            OcorrenciaLembrete.objects.filter(conta=self.conta, processado_em__isnull=True)
+            .values_list('tipo', 'data')
+        )
+
+    def test_apenas_a_proxima_repeticao_de_atraso_e_agendada(self):
+        vencimento = self.conta.data_vencimento
+        self.assertEqual(self.datas_pendentes(), [('lembrete_atraso', vencimento + timedelta(days=201))])
+
+        # Processar o lembrete agenda a repetição seguinte, sem limite de dias após o vencimento
+        dia = vencimento + timedelta(days=201)
+        job = JobLembretes(dia)
+        job.executar()
+        self.assertEqual(job.gerados, 1)
+        self.assertEqual(self.datas_pendentes(), [('lembrete_atraso', vencimento + timedelta(days=204))])
+        self.assertEqual(Notificacao.objects.get().template, 'lembrete_atraso')
+
+    def test_lembretes_acumulados_da_conta_em_lotes_diferentes_geram_um_envio(self):
+        vencimento = self.conta.data_vencimento
+        OcorrenciaLembrete.objects.create(
+            conta=self.conta, tipo='lembrete_antes', data=vencimento - timedelta(days=1), data_vencimento=vencimento
+        )
+
+        job = JobLembretes(vencimento + timedelta(days=201), tamanho_lote=1)
+        execucao = job.executar()
+
+        self.assertEqual(job.gerados, 1)
+        self.assertEqual(execucao.lotes, 1)
+        self.assertEqual(Notificacao.objects.get().template, 'lembrete_atraso')
+        self.assertEqual(self.datas_pendentes(), [('lembrete_atraso', vencimento + timedelta(days=204))])
+
+    def test_salvar_sem_mudanca_mantem_os_lembretes(self):
+        ocorrencia = OcorrenciaLembrete.objects.get(conta=self.conta)
+        conta = ContaPagar.objects.get(pk=self.conta.pk)
+        conta.nome_conta = 'Luz'
+        conta.save()
+        self.assertTrue(OcorrenciaLembrete.objects.filter(pk=ocorrencia.pk).exists())
+
+        conta.data_vencimento = self.hoje - timedelta(days=1)
+        conta.save()
+        self.assertEqual(self.datas_pendentes(), [('lembrete_atraso', self.hoje + timedelta(days=2))])
+
+    def test_mudanca_no_grupo_refaz_lembretes_em_task(self):
+        with mock.patch.object(rematerializar_lembretes_grupo, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.grupo.lembrete_atraso_dias = 5
+                self.grupo.save()
+                # Nada é refeito dentro da requisição
+                self.assertEqual(len(self.datas_pendentes()), 1)
+                self.assertEqual(self.datas_pendentes()[0][1], self.conta.data_vencimento + timedelta(days=201))
+        delay.assert_called_once_with(self.grupo.pk)
+
+        rematerializar_lembretes_grupo(self.grupo.pk)
+        self.assertEqual(self.datas_pendentes(), [('lembrete_atraso', self.conta.data_vencimento + timedelta(days=200))])
+
+
+class JobContas(JobEmLotes):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lotes = []
+
+    def queryset(self):
+        return ContaPagar.objects.all()
+
+    def processar_lote(self, registros):
+        self.lotes.append([registro['id'] for registro in registros])
+
+
+class JobEmLotesTests(TestCase):
+
+    def test_subclasse_precisa_implementar_os_metodos(self):
+        with self.assertRaises(TypeError):
+            JobEmLotes('incompleto')
+
+    def test_reaproveita_a_linha_e_apaga_checkpoints_antigos(self):
+        grupo = GrupoConta.objects.create(nome='Energia')
+        ids = [criar_conta(grupo).id for _ in range(5)]
+        ExecucaoJob.objects.create(
+            nome='verificar_status_contas:2024-05-10',
+            iniciado_em=timezone.now() - timedelta(days=60),
+            concluido_em=timezone.now() - timedelta(days=60),
+        )
+
+        for _ in range(2):
+            job = JobContas('contas', tamanho_lote=2)
+            execucao = job.executar()
+            self.assertEqual(job.lotes, [ids[0:2], ids[2:4], ids[4:]])
+            self.assertEqual((execucao.lotes, execucao.registros), (3, 5))
+
+        self.assertEqual(list(ExecucaoJob.objects.values_list('nome', flat=True)), ['contas'])
+
+
+class MensagensNotificacaoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grupo = GrupoConta.objects.create(
+            nome='Energia', mensagem_alerta_vence_hoje='{{grupo}}: {{nome_conta}} vence hoje ({{valor}})'
+        )
+        cls.padrao = criar_conta(cls.grupo, nome_conta='Luz', whatsapp_contato_alerta='(21) 99999-0001')
+        cls.propria = criar_conta(
+            cls.grupo,
+            nome_conta='Água',
+            whatsapp_contato_alerta='(21) 99999-0002',
+            mensagem_alerta_vence_hoje='Pague {{nome_conta}} até {{vencimento}}',
+        )
+
+    def mensagem(self, conta, template):
+        enfileirar_alertas(template, [conta.id])
+        return renderizar_notificacao(Notificacao.objects.get(conta=conta, template=template))
+
+    def test_mensagem_da_conta_do_grupo_ou_padrao(self):
+        vencimento = self.propria.data_vencimento.strftime('%d/%m/%Y')
+        self.assertEqual(self.mensagem(self.propria, 'alerta_vence_hoje'), f'Pague Água até {vencimento}')
+        self.assertEqual(self.mensagem(self.padrao, 'alerta_vence_hoje'), 'Energia: Luz vence hoje (R$ 100,00)')
+
+        padrao = self.mensagem(self.padrao, 'alerta_prox_vencer')
+        self.assertTrue(padrao.startswith(MENSAGENS['alerta_prox_vencer'][:10]))
+        self.assertIn('Nome da Conta: Luz', padrao)
+
+    def test_modelo_com_variavel_desconhecida_e_rejeitado(self):
+        with self.assertRaises(ValidationError):
+            validar_modelo_mensagem('{{senha}}')
+
+        form = GrupoContaForm(data={'nome': 'Aluguel', 'lembrete_atraso_dias': 0, 'mensagem_lembrete_atraso': '{{nome_conta'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('mensagem_lembrete_atraso', form.errors)
+
+
+class MigracaoTelefonesTests(TestCase):
+
+    def test_normalizador_congelado(self):
+        migracao = import_module('main.apps.pay.migrations.0027_whatsapp_e164')
+        esperados = {
+            '(21) 99999-0000': '+5521999990000',
+            '021 2222-3333': '+552122223333',
+            '+1 415 555 0100': '+14155550100',
+            '123': '',
+            None: '',
+        }
+        for numero, esperado in esperados.items():
+            self.assertEqual(migracao.normalizar_e164(numero), esperado, numero)
+
+
+@override_settings(
+    EVOLUTION_ESTRATEGIA='round_robin',
+    EVOLUTION_INSTANCIAS=[{'name': 'a', 'key': 'a', 'peso': 2}, {'name': 'b', 'key': 'b', 'peso': 1}],
+)
+class PoolInstanciasTests(TestCase):
+
+    def test_round_robin_mantido_entre_chamadas(self):
+        self.assertIs(get_pool(), get_pool())
+        with mock.patch('main.src.agents.evolution_pool.instancia_conectada', return_value=True):
+            escolhidas = [get_pool().escolher()['name'] for _ in range(6)]
+        self.assertEqual(escolhidas, ['a', 'b', 'a', 'a', 'b', 'a'])
+
+    def test_nova_configuracao_cria_outro_pool(self):
+        pool = get_pool()
+        with override_settings(EVOLUTION_INSTANCIAS=[{'name': 'c', 'key': 'c'}]):
+            self.assertIsNot(get_pool(), pool)
+            self.assertEqual([instancia['name'] for instancia in get_pool().instancias], ['c'])
+
+
+class CircuitBreakerTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(self.assertLogs('main.src.agents.resiliencia', 'WARNING'))
+        # Duas instâncias com o mesmo nome, como em dois processos diferentes
+        self.processo_a = CircuitBreaker('teste:enviar', limite_falhas=3, tempo_aberto=30)
+        self.processo_b = CircuitBreaker('teste:enviar', limite_falhas=3, tempo_aberto=30)
+
+    def test_estado_compartilhado_entre_processos(self):
+        self.processo_a.registrar_falha()
+        self.processo_b.registrar_falha()
+        self.assertEqual(self.processo_a.estado, FECHADO)
+        self.processo_b.registrar_falha()
+
+        self.assertEqual(self.processo_a.estado, ABERTO)
+        self.assertFalse(self.processo_a.permitir())
+        self.assertEqual(metricas_circuito('teste:enviar'), {'aberturas': 1, 'fechamentos': 0, 'rejeitadas': 1})
+
+    def test_uma_chamada_de_teste_apos_o_tempo_aberto(self):
+        for _ in range(3):
+            self.processo_a.registrar_falha()
+
+        with mock.patch('main.src.agents.resiliencia.time.time', return_value=time.time() + 31):
+            self.assertTrue(self.processo_a.permitir())
+            self.assertFalse(self.processo_b.permitir())
+            self.assertEqual(self.processo_b.estado, MEIO_ABERTO)
+
+            self.processo_a.registrar_sucesso()
+        self.assertEqual(self.processo_b.estado, FECHADO)
+        self.assertTrue(self.processo_b.permitir())
+        self.assertEqual(metricas_circuito('teste:enviar')['fechamentos'], 1)
+
+    def test_falha_na_chamada_de_teste_reabre(self):
+        for _ in range(3):
+            self.processo_a.registrar_falha()
+
+        with mock.patch('main.src.agents.resiliencia.time.time', return_value=time.time() + 31):
+            self.assertTrue(self.processo_a.permitir())
+            self.processo_a.registrar_falha()
+            self.assertEqual(self.processo_b.estado, ABERTO)
+            self.assertFalse(self.processo_b.permitir())
+        self.assertEqual(metricas_circuito('teste:enviar')['aberturas'], 2)
+
+
+OPERADORES_IXC = {
+    '=': operator.eq, '>': operator.gt, '<': operator.lt, '>=': operator.ge, '<=': operator.le,
+    'IN': lambda valor, lista: valor in lista,
+}
+
+
+class IXCFake(IXC):
+    """IXC com a listagem de cliente_contrato servida de `registros` em memória."""
+
+    def __init__(self, registros):
+        super().__init__()
+        self.registros = registros
+        self.chamadas = []
+        self.ao_listar = None
+        self.fora_do_ar = False
+
+    def _disponivel(self):
+        if self.fora_do_ar:
+            raise HttpErrors(message="Erro de conexão com a API. O servidor pode estar fora do ar.", status_code=503)
+
+    def get_contratos(self, contratoid):
+        self._disponivel()
+        self.chamadas.append(('get', contratoid))
+        registro = self.registros.get(int(contratoid))
+        return {'status_code': 200, 'response': {'registros': [registro] if registro else []}}
+
+    def listar_pagina(self, tabela, pagina=1, por_pagina=None, filtros=None, ordenar_por=None, ordem='asc', apos_id=0):
+        self._disponivel()
+        self.chamadas.append(apos_id)
+        if self.ao_listar:
+            self.ao_listar(len(self.chamadas))
+
+        def atende(registro):
+            for campo, operador, valor in filtros or []:
+                campo = campo.split('.')[-1]
+                if campo == 'id':
+                    atual = int(registro['id'])
+                    valor = [int(item) for item in valor] if operador == 'IN' else int(valor)
+                else:
+                    atual = registro[campo]
+                if not OPERADORES_IXC[operador](atual, valor):
+                    return False
+            return True
+
+        selecionados = sorted(
+            (registro for registro in self.registros.values() if int(registro['id']) > apos_id and atende(registro)),
+            key=lambda registro: int(registro['id']),
+        )
+        return {'status_code': 200, 'response': {'registros': selecionados[:por_pagina]}}
+
+
+def registro_contrato(contrato_id, ultima_atualizacao='2024-05-01 10:00:00', **campos):
+    return {
+        'id': str(contrato_id),
+        'id_cliente': '1',
+        'status': 'A',
+        'contrato': f'Contrato {contrato_id}',
+        'data_ativacao': '2024-01-01',
+        'ultima_atualizacao': ultima_atualizacao,
+        **campos,
+    }
+
+
+class ContratosIXCTests(TestCase):
+
+    def setUp(self):
+        self.registros = {contrato_id: registro_contrato(contrato_id) for contrato_id in range(1, 11)}
+        self.ixc = IXCFake(self.registros)
+
+    def test_paginacao_por_chave_nao_pula_registros_excluidos_durante_a_leitura(self):
+        def excluir_da_primeira_pagina(chamada):
+            if chamada == 2:
+                del self.registros[1]
+                del self.registros[2]
+
+        self.ixc.ao_listar = excluir_da_primeira_pagina
+        ids = [int(registro['id']) for registro in self.ixc.iter_contratos(por_pagina=3)]
+
+        # Com OFFSET, a exclusão deslocaria as páginas e os contratos 4 e 5 seriam pulados
+        self.assertEqual(ids, list(range(1, 11)))
+        self.assertEqual(self.ixc.chamadas, [0, 3, 6, 9])
+
+    def test_sincronizacao_incremental_busca_alterados_e_novos(self):
+        sincronizar_contratos(self.ixc, tamanho_lote=4)
+        self.assertEqual(ContratoIXC.objects.count(), 10)
+
+        self.registros[3] = registro_contrato(3, '2024-05-02 08:00:00', status='C')
+        self.registros[11] = registro_contrato(11, '2024-05-02 09:00:00')
+
+        total = sincronizar_contratos(self.ixc, tamanho_lote=4)
+
+        # Os contratos com a mesma ultima_atualizacao da marca são relidos (filtro >=), o 11 uma vez só
+        self.assertEqual(total, 11)
+        self.assertEqual(ContratoIXC.objects.count(), 11)
+        self.assertEqual(ContratoIXC.objects.get(id_ixc=3).status, 'C')
+
+        # Sem alterações, só o contrato com a ultima_atualizacao da marca é relido
+        self.assertEqual(sincronizar_contratos(self.ixc, tamanho_lote=4), 1)
+
+
+@override_settings(IXC_ESPELHO_TTL=3600)
+class LeituraEspelhoIXCTests(TestCase):
+
+    def setUp(self):
+        self.registros = {contrato_id: registro_contrato(contrato_id) for contrato_id in range(1, 4)}
+        self.ixc = IXCFake(self.registros)
+        sincronizar_contratos(self.ixc)
+        self.ixc.chamadas.clear()
+        self.registros[1] = registro_contrato(1, '2024-05-02 08:00:00', status='C')
+
+    def envelhecer(self, *ids):
+        ContratoIXC.objects.filter(id_ixc__in=ids).update(sincronizado_em=timezone.now() - timedelta(hours=2))
+
+    def test_espelho_recente_nao_consulta_o_ixc(self):
+        self.assertEqual(obter_contrato(1, ixc=self.ixc).status, 'A')
+        contratos = obter_contratos([1, 2], ixc=self.ixc)
+        self.assertEqual({id_ixc: contrato.status for id_ixc, contrato in contratos.items()}, {1: 'A', 2: 'A'})
+        self.assertEqual(self.ixc.chamadas, [])
+
+    def test_copia_vencida_busca_no_ixc_e_atualiza_o_espelho(self):
+        self.envelhecer(1)
+
+        self.assertEqual(obter_contrato(1, ixc=self.ixc).status, 'C')
+        self.assertEqual(self.ixc.chamadas, [('get', 1)])
+        self.assertEqual(ContratoIXC.objects.get(id_ixc=1).status, 'C')
+
+    def test_busca_em_lote_so_dos_ausentes_e_vencidos(self):
+        self.envelhecer(1)
+        self.registros[4] = registro_contrato(4)
+
+        contratos = obter_contratos([1, 2, 4, 99], ixc=self.ixc)
+
+        self.assertEqual(sorted(contratos), [1, 2, 4])
+        self.assertEqual(contratos[1].status, 'C')
+        # Uma listagem (filtro IN) para os ids 1, 4 e 99, nenhuma para o 2
+        self.assertEqual(self.ixc.chamadas, [0])
+        self.assertEqual(ContratoIXC.objects.count(), 4)
+
+    def test_ixc_fora_do_ar_devolve_a_copia_local(self):
+        self.envelhecer(1, 2)
+        self.ixc.fora_do_ar = True
+
+        self.assertEqual(obter_contrato(1, ixc=self.ixc).status, 'A')
+        self.assertEqual(sorted(obter_contratos([1, 2, 99], ixc=self.ixc)), [1, 2])
+        with self.assertRaises(HttpErrors):
+            obter_contrato(99, ixc=self.ixc)
+
+    def test_contrato_inexistente(self):
+        self.assertIsNone(obter_contrato(99, ixc=self.ixc))
+
+
+@override_settings(IXC_STATUS_CONCILIACAO=['A'], CONCILIACAO_TOLERANCIA_VALOR='0.01')
+class ConciliacaoIXCTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        grupo = GrupoConta.objects.create(nome='Fornecedores')
+
+        def conta(cpf_cnpj, nome_razao, valor, vencimento):
+            return criar_conta(
+                grupo, cpf_cnpj=cpf_cnpj, nome_razao=nome_razao, valor=Decimal(valor), data_vencimento=vencimento
+            ).id
+
+        cls.contas = {
+            'otica': conta('123.456.789-01', 'Ótica Visão Ltda.', '100.00', date(2026, 2, 28)),
+            'link_50': conta('11.222.333/0001-44', 'Link Net', '50.00', date(2026, 3, 10)),
+            'link_80': conta('11.222.333/0001-44', 'Link Net', '80.00', date(2026, 3, 10)),
+            'padaria': conta('', 'Padaria Pão Quente', '1234.56', date(2026, 3, 15)),
+            'aluguel': conta('999.999.999-99', 'Imobiliária', '200.00', date(2026, 3, 5)),
+            'energia': conta('555.555.555-55', 'Energia', '300.00', date(2026, 3, 7)),
+        }
+
+        def contrato(contrato_id, cnpj_cpf, razao, valor, dia, status='A'):
+            return registro_contrato(
+                contrato_id, status=status, cnpj_cpf=cnpj_cpf, razao=razao, valor=valor, dia_fixo_vencimento=dia
+            )
+
+        salvar_contratos([
+            # Dia 31 vence no último dia de fevereiro: sem divergência de vencimento
+            contrato(1, '12345678901', 'OTICA VISAO', '100,00', '31'),
+            # Dois contratos do mesmo CNPJ: cada um fica com a conta de mesmo valor
+            contrato(2, '11222333000144', 'Link Net', '80.00', '10'),
+            # Sem documento: conciliado pela razão social normalizada
+            contrato(3, '', 'PADARIA PAO QUENTE', '1.234,56', '2026-03-20'),
+            contrato(4, '99999999999', 'Imobiliária', '250,00', '5'),
+            # Diferença dentro da tolerância
+            contrato(5, '55555555555', 'Energia', '300,01', '7'),
+            contrato(6, '00000000000', 'Sem Conta', '10,00', '1'),
+            # Cancelado: fora da conciliação
+            contrato(7, '12345678901', 'OTICA VISAO', '999,00', '1', status='C'),
+        ])
+        cls.contratos = dict(ContratoIXC.objects.values_list('id_ixc', 'id'))
+
+    def test_relatorio_de_divergencias(self):
+        conciliacao = conciliar_contratos()
+
+        self.assertEqual(
+            (conciliacao.contratos, conciliacao.contas, conciliacao.conciliados, conciliacao.divergencias),
+            (6, 6, 5, 4),
+        )
+        divergencias = set(conciliacao.itens.values_list('tipo', 'contrato_id', 'conta_id'))
+        self.assertEqual(divergencias, {
+            ('vencimento', self.contratos[3], self.contas['padaria']),
+            ('valor', self.contratos[4], self.contas['aluguel']),
+            ('sem_conta', self.contratos[6], None),
+            ('sem_contrato', None, self.contas['link_50']),
+        })
+
+        valor = conciliacao.itens.get(tipo='valor')
+        self.assertEqual((valor.valor_ixc, valor.valor_conta), (Decimal('250.00'), Decimal('200.00')))
+        vencimento = conciliacao.itens.get(tipo='vencimento')
+        self.assertEqual((vencimento.dia_vencimento_ixc, vencimento.data_vencimento_conta), (20, date(2026, 3, 15)))
+
+    def test_conciliacao_restrita_ao_grupo(self):
+        outro = GrupoConta.objects.create(nome='Outro')
+        conciliacao = conciliar_contratos(grupo_conta_id=outro.id)
+
+        self.assertEqual((conciliacao.contas, conciliacao.conciliados), (0, 0))
+        self.assertEqual(conciliacao.itens.filter(tipo='sem_conta').count(), 6)
+
+    def test_valores_e_dias_do_ixc(self):
+        self.assertEqual(_valor('1.234,56'), Decimal('1234.56'))
+        self.assertEqual(_valor('1234.5'), Decimal('1234.50'))
+        self.assertEqual(_valor(80), Decimal('80.00'))
+        self.assertIsNone(_valor(''))
+        self.assertIsNone(_valor('abc'))
+
+        self.assertEqual(_dia('10'), 10)
+        self.assertEqual(_dia('2024-05-31'), 31)
+        self.assertIsNone(_dia('32'))
+        self.assertIsNone(_dia('0000-00-00'))
+        self.assertIsNone(_dia(None))
+
+
+def estado_conexao(estado):
+    return {'status_code': 200, 'response': {'instance': {'instanceName': 'a', 'state': estado}}}
+
+
+@override_settings(
+    EVOLUTION_INSTANCIAS=[{'name': 'a', 'key': 'a'}], EVOLUTION_ESTADO_TTL=30, EVOLUTION_ESPERA_RECONEXAO=60,
+    NOTIFICACAO_RESUMO=False,
+)
+class MonitorConexaoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        evolution = self.enterContext(mock.patch('main.src.agents.evolution_monitor.Evolution'))
+        self.instance_status = evolution.return_value.instance_status
+        self.instance_status.return_value = estado_conexao('open')
+
+    def test_estado_fica_no_cache_pelo_ttl(self):
+        self.assertEqual(estado_instancia('a', 'a'), 'open')
+        self.instance_status.return_value = estado_conexao('close')
+        self.assertEqual(estado_instancia('a', 'a'), 'open')
+        self.assertEqual(self.instance_status.call_count, 1)
+
+        self.assertEqual(estado_instancia('a', 'a', forcar=True), 'close')
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + 31):
+            self.instance_status.return_value = estado_conexao('open')
+            self.assertEqual(estado_instancia('a', 'a'), 'open')
+        self.assertEqual(self.instance_status.call_count, 3)
+
+    def test_desconectado_agenda_um_unico_despacho(self):
+        self.instance_status.return_value = estado_conexao('close')
+        criar_notificacao('+5521999990001')
+
+        with mock.patch.object(despachar_notificacoes, 'apply_async') as agendar:
+            for _ in range(3):
+                self.assertEqual(despachar_notificacoes(), "WhatsApp desconectado: envio de notificações pausado")
+        agendar.assert_called_once_with(countdown=60)
+        self.assertTrue(cache.get(CHAVE_AGUARDANDO_CONEXAO))
+
+        # Expirada a marca, a próxima verificação desconectada agenda de novo
+        cache.delete(CHAVE_AGUARDANDO_CONEXAO)
+        with mock.patch.object(despachar_notificacoes, 'apply_async') as agendar:
+            despachar_notificacoes()
+        agendar.assert_called_once_with(countdown=60)
+
+    def test_lote_fica_para_o_proximo_despacho_se_a_conexao_cai(self):
+        notificacao = criar_notificacao('+5521999990001')
+        with mock.patch('main.apps.pay.tasks.chord') as distribuir:
+            self.assertEqual(despachar_notificacoes(), "1 notificações distribuídas em 1 lotes")
+        lote = [notificacao.id]
+        self.assertEqual(list(distribuir.call_args.args[0])[0].args, (lote,))
+
+        # A conexão caiu entre a distribuição e a execução do lote
+        self.instance_status.return_value = estado_conexao('close')
+        cache.clear()
+        with mock.patch('main.apps.pay.services.notificacoes.send_text_many') as envio:
+            resultado = enviar_lote_notificacoes(lote)
+
+        envio.assert_not_called()
+        self.assertEqual(resultado, {"enviadas": 0, "falhas": 0, "ignoradas": 1, "lote": 1})
+        notificacao.refresh_from_db()
+        self.assertEqual((notificacao.estado, notificacao.tentativas), ('pendente', 0))
+
+
+class EstadoInstanciaCircuitoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(self.assertLogs('main.src.agents.resiliencia', 'WARNING'))
+        self.evolution = Evolution()
+        self.resposta = mock.Mock(status_code=502, json=mock.Mock(return_value={'message': 'Bad Gateway'}))
+        self.sessao = mock.Mock(get=mock.Mock(return_value=self.resposta))
+        self.evolution._Evolution__session = self.sessao
+
+    def test_erro_5xx_conta_como_falha_no_circuito(self):
+        limite = circuito('evolution:instance_status').limite_falhas
+        for _ in range(limite):
+            with self.assertRaises(HttpErrors) as erro:
+                self.evolution.instance_status('a', 'a')
+            self.assertEqual(erro.exception.status_code, 502)
+
+        # Circuito aberto: falha na hora, sem chamar a API
+        with self.assertRaises(HttpErrors) as erro:
+            self.evolution.instance_status('a', 'a')
+        self.assertEqual(erro.exception.status_code, 503)
+        self.assertEqual(self.sessao.get.call_count, limite)
+        self.assertEqual(estado_instancia('a', 'a', evolution=self.evolution), ESTADO_INDISPONIVEL)
+
+
+class BuscaContasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        grupo = GrupoConta.objects.create(nome='Frota')
+        cls.caminhao = criar_conta(grupo, nome_conta='IPVA Caminhão', nome_razao='Detran RJ', placa='KXY3B21')
+        cls.energia = criar_conta(grupo, nome_conta='Energia', nome_razao='Light Serviços', cpf_cnpj='60.444.437/0001-46')
+        cls.aluguel = criar_conta(grupo, nome_conta='Aluguel', nome_razao='Imobiliária Light')
+
+    def buscar(self, termo):
+        return set(buscar_contas(ContaPagar.objects.all(), termo).values_list('id', flat=True))
+
+    def test_busca_por_razao_documento_e_placa(self):
+        self.assertEqual(connection.vendor, 'sqlite')
+        self.assertEqual(self.buscar('light'), {self.energia.id, self.aluguel.id})
+        self.assertEqual(self.buscar('444.437'), {self.energia.id})
+        self.assertEqual(self.buscar('xy3b'), {self.caminhao.id})
+        # Abaixo de 3 caracteres não há trigramas: cai no icontains
+        self.assertEqual(self.buscar('KX'), {self.caminhao.id})
+
+    def test_indice_acompanha_escritas_sem_signals(self):
+        ContaPagar.objects.filter(id=self.aluguel.id).update(nome_razao='Imobiliária Central')
+        ContaPagar.objects.bulk_create([ContaPagar(
+            nome_conta='Internet', grupo_conta=self.energia.grupo_conta, fixo_variado='fixo',
+            recorrencia='mensal', valor=Decimal('99.90'), data_vencimento=timezone.now().date(),
+            nome_razao='Light Fibra',
+        )])
+        ContaPagar.objects.filter(id=self.energia.id).delete()
+
+        internet = ContaPagar.objects.get(nome_conta='Internet')
+        self.assertEqual(self.buscar('light'), {internet.id})
+        self.assertEqual(self.buscar('central'), {self.aluguel.id})
+
+    def test_ordenar_por_relevancia(self):
+        criar_conta(self.energia.grupo_conta, nome_conta='Outra', nome_razao='Outra')
+        contas = ordenar_por_relevancia(buscar_contas(ContaPagar.objects.all(), 'light'), 'light')
+
+        self.assertEqual({conta.id for conta in contas}, {self.energia.id, self.aluguel.id})
+        self.assertTrue(all(conta.relevancia > 0 for conta in contas))
+        self.assertGreaterEqual(contas[0].relevancia, contas[1].relevancia)
+
+    def test_gatilhos_apagados_sao_recriados_com_o_indice(self):
+        with connection.cursor() as cursor:
+            for gatilho in GATILHOS_BUSCA_SQLITE:
+                cursor.execute(f'DROP TRIGGER {gatilho}')
+        ContaPagar.objects.filter(id=self.caminhao.id).update(placa='ABC1D23')
+        self.assertEqual(self.buscar('abc1'), set())
+
+        self.assertTrue(garantir_gatilhos_busca(connection))
+        self.assertFalse(garantir_gatilhos_busca(connection))
+        self.assertEqual(self.buscar('abc1'), {self.caminhao.id})
@@ -0,0 +1,34 @@
+import re
+
+from django.core.exceptions import ValidationError
+
+
+# Variáveis aceitas nos modelos de mensagem, no formato {{variavel}}
+VARIAVEIS_MENSAGEM = {
+    'nome_conta': 'Nome da conta',
+    'nome_razao': 'Nome/Razão social do fornecedor',
+    'grupo': 'Grupo da conta',
+    'valor': 'Valor da conta (R$)',
+    'vencimento': 'Data de vencimento',
+    'data_pagamento': 'Data de pagamento',
+}
+
+PADRAO_VARIAVEL = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+
+def validar_modelo_mensagem(texto):
+    """Validador de campo: rejeita variáveis desconhecidas e marcadores {{ }} incompletos."""
+    desconhecidas = sorted({
+        nome for nome in PADRAO_VARIAVEL.findall(texto or '') if nome not in VARIAVEIS_MENSAGEM
+    })
+    if desconhecidas:
+        raise ValidationError(
+            'Variáveis desconhecidas: %s. Use: %s.' % (
+                ', '.join('{{%s}}' % nome for nome in desconhecidas),
+                ', '.join('{{%s}}' % nome for nome in VARIAVEIS_MENSAGEM),
+            )
+        )
+
+    restante = PADRAO_VARIAVEL.sub('', texto or '')
+    if '{{' in restante or '}}' in restante:
+        raise ValidationError('Marcador de variável incompleto: use o formato {{variavel}}.')
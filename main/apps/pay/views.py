@@ -1,5 +1,4 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.core.paginator import Paginator
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, View
 from django.urls import reverse_lazy
 from django.contrib import messages
@@ -17,6 +16,10 @@ from dateutil.relativedelta import relativedelta
 from .models import GrupoConta, ContaPagar, Faturamento, HistoricoPagamento
 from .forms import GrupoContaForm, ContaForm, FaturamentoForm
 from .tasks import enviar_confirmacao_pagamento
+from .services.resumo import filtrar_contas, contas_listagem
+from .services.cache_resumo import normalizar_filtros, resumo_dashboard_cache
+from .services.busca import buscar_grupos, ordenar_por_relevancia
+from .services.paginacao import PaginatorComTotal, paginar_por_cursor, ORDENACOES, ORDENACAO_PADRAO
 from main.src.agents.evolution_agent import Evolution
 from django.conf import settings
 from datetime import timedelta
@@ -37,7 +40,7 @@ class GrupoContaListView(LoginRequiredMixin, ListView):
         queryset = super().get_queryset()
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(nome__icontains=search)
+            queryset = buscar_grupos(queryset, search)
         return queryset
 
 
@@ -85,78 +88,42 @@ class ContaPagarListView(View):
     def get(self, request, *args, **kwargs):
         hoje = timezone.now().date()
 
-        queryset = ContaPagar.objects.all()
-
-        nome = request.GET.get('nome')
-        grupo = request.GET.get('grupo')
-        status = request.GET.get('status')
-        recorrencia = request.GET.get('recorrencia')
-
-        if nome:
-            queryset = queryset.filter(nome_conta__icontains=nome)
-        if grupo:
-            queryset = queryset.filter(grupo_conta_id=grupo)
-        if recorrencia:
-            queryset = queryset.filter(recorrencia=recorrencia)
-        
-        if status == 'em_dia':
-            queryset = queryset.filter(data_vencimento__gt=hoje, pago=False)
-        elif status == 'hoje':
-            queryset = queryset.filter(data_vencimento=hoje, pago=False)
-        elif status == 'atrasada':
-            queryset = queryset.filter(data_vencimento__lt=hoje, pago=False)
-        elif status == 'proximo_vencer':
-            proximo = hoje + timezone.timedelta(days=7)
-            queryset = queryset.filter(
-                data_vencimento__gt=hoje,
-                data_vencimento__lte=proximo,
-                pago=False
-            )
-
-        paginator = Paginator(queryset.order_by('-id'), 100)
-        page = request.GET.get('page')
-        contas = paginator.get_page(page)
+        filtros = normalizar_filtros(
+            nome=request.GET.get('nome'),
+            grupo=request.GET.get('grupo'),
+            status=request.GET.get('status'),
+            recorrencia=request.GET.get('recorrencia'),
+        )
+        nome, grupo, status, recorrencia = filtros
 
-        contas_filtradas = queryset
-        
-        em_dia = contas_filtradas.filter(data_vencimento__gt=hoje, pago=False)
-        vence_hoje = contas_filtradas.filter(data_vencimento=hoje, pago=False)
-        atrasadas = contas_filtradas.filter(data_vencimento__lt=hoje, pago=False)
-        
-        proximo = hoje + timezone.timedelta(days=7)
-        proximo_vencer = contas_filtradas.filter(
-            data_vencimento__gt=hoje,
-            data_vencimento__lte=proximo,
-            pago=False
+        queryset = filtrar_contas(
+            ContaPagar.objects.all(),
+            nome=nome, grupo=grupo, status=status, recorrencia=recorrencia, hoje=hoje,
         )
 
-        total_contas = contas_filtradas.aggregate(total=Sum('valor'))['total'] or 0
-        
-        ultimo_faturamento = Faturamento.objects.order_by('-mes_referencia').first()
-        valor_faturamento = ultimo_faturamento.valor if ultimo_faturamento else 0
+        # Totais/quantidades dos cards: uma única consulta, servida do cache quando possível
+        resumo = resumo_dashboard_cache(filtros, hoje)
+
+        listagem = contas_listagem(queryset)
+        ordem = request.GET.get('ordem')
+        if request.GET.get('paginacao') == 'cursor':
+            contas = paginar_por_cursor(
+                listagem, request.GET.get('cursor'), ordem=ordem, por_pagina=100, com_estimativa=True
+            )
+        else:
+            if nome and not ordem:
+                # Busca sem ordenação explícita: resultados mais relevantes primeiro
+                listagem = ordenar_por_relevancia(listagem, nome)
+            else:
+                listagem = listagem.order_by(*ORDENACOES.get(ordem, ORDENACOES[ORDENACAO_PADRAO]))
+            paginator = PaginatorComTotal(listagem, 100, total=resumo['total_registros'])
+            page = request.GET.get('page')
+            contas = paginator.get_page(page)
 
         context = {
             'contas': contas,
             'hoje': hoje,
-
-            'total_contas': total_contas,
-            'total_registros': contas_filtradas.count(),
-
-            'total_em_dia': em_dia.aggregate(total=Sum('valor'))['total'] or 0,
-            'qtd_em_dia': em_dia.count(),
-
-            'total_vence_hoje': vence_hoje.aggregate(total=Sum('valor'))['total'] or 0,
-            'qtd_vence_hoje': vence_hoje.count(),
-
-            'total_atrasado': atrasadas.aggregate(total=Sum('valor'))['total'] or 0,
-            'qtd_atrasadas': atrasadas.count(),
-            
-            'total_proximo_vencer': proximo_vencer.aggregate(total=Sum('valor'))['total'] or 0,
-            'qtd_proximo_vencer': proximo_vencer.count(),
-
-            'faturamento': valor_faturamento,
-            'lucro': valor_faturamento - total_contas,
-
+            **resumo,
             'grupos': GrupoConta.objects.all()
         }
 
@@ -237,10 +204,11 @@ class ContaPagoView(View):
         )
         
         # Enviar mensagem de confirmação em segundo plano via Celery
-        if conta.whatsapp_confirmacao and conta.mensagem_confirmacao:
+        if conta.whatsapp_confirmacao_e164 and (conta.mensagem_confirmacao or conta.grupo_conta.mensagem_confirmacao):
             enviar_confirmacao_pagamento.delay(
                 conta.id,
-                data_pagamento.strftime('%Y-%m-%d')
+                data_pagamento.strftime('%Y-%m-%d'),
+                conta.data_vencimento.strftime('%Y-%m-%d')
             )
         
         # Atualizar data de vencimento conforme recorrência
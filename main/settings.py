@@ -1,5 +1,7 @@
+import json
 import os
 from pathlib import Path
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 # Carrega as variáveis do .env
@@ -83,6 +85,48 @@ CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers.DatabaseScheduler'
 
 CELERY_RESULT_BACKEND = 'django-db'
 
+# Fila dos lotes de notificação. Por padrão é a fila 'celery', atendida pelo worker comum;
+# para isolar o envio, defina por exemplo NOTIFICACAO_FILA=notificacoes e suba um
+# worker que a consuma (celery -A main worker -Q celery,notificacoes)
+NOTIFICACAO_FILA = os.getenv('NOTIFICACAO_FILA', 'celery')
+
+CELERY_TASK_ROUTES = {
+    'main.apps.pay.tasks.enviar_lote_notificacoes': {'queue': NOTIFICACAO_FILA},
+}
+
+
+# Cache dos totais do dashboard: Redis quando configurado, memória local no desenvolvimento
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+            'KEY_PREFIX': 'payaccount',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+RESUMO_CACHE_TIMEOUT = int(os.getenv('RESUMO_CACHE_TIMEOUT', '300'))
+
+# Duração máxima (segundos) da trava que impede execuções sobrepostas dos jobs de status
+TRAVA_DURACAO = int(os.getenv('TRAVA_DURACAO', '900'))
+# Tasks de status que encontram a trava ocupada são reexecutadas após N segundos (até M vezes)
+TRAVA_ESPERA_RETENTATIVA = int(os.getenv('TRAVA_ESPERA_RETENTATIVA', '60'))
+TRAVA_MAXIMO_RETENTATIVAS = int(os.getenv('TRAVA_MAXIMO_RETENTATIVAS', '30'))
+
+# Checkpoints (ExecucaoJob) de jobs concluídos (ou abandonados) há mais de N dias são apagados
+EXECUCAO_JOB_RETENCAO_DIAS = int(os.getenv('EXECUCAO_JOB_RETENCAO_DIAS', '30'))
+
 
 # Configurar o fuso horário no Celery
 CELERY_TIMEZONE = 'America/Sao_Paulo'  
@@ -169,4 +213,106 @@ EVOLUTIONMASTERKEY = os.getenv("EVOLUTIONMASTERKEY")
 
 INSTANCE_NAME = os.getenv("INSTANCE_NAME")
 INSTANCE_KEY = os.getenv("INSTANCE_KEY")
-INSTANCE_NUMBER = os.getenv ("INSTANCE_NUMBER")
\ No newline at end of file
+INSTANCE_NUMBER = os.getenv ("INSTANCE_NUMBER")
+
+# Pool de instâncias para envio, em JSON: [{"name": "...", "key": "...", "peso": 2, "rate_limit": 10}, ...]
+# (sem configuração, usa apenas a instância acima)
+EVOLUTION_INSTANCIAS = json.loads(os.getenv('EVOLUTION_INSTANCIAS') or 'null') or [
+    {'name': INSTANCE_NAME, 'key': INSTANCE_KEY, 'peso': 1},
+]
+# 'round_robin' (ponderado pelo peso) ou 'hash' (mesmo destinatário sempre na mesma instância)
+EVOLUTION_ESTRATEGIA = os.getenv('EVOLUTION_ESTRATEGIA', 'round_robin')
+
+# Conexões HTTP com a Evolution API (pool keep-alive compartilhado por processo)
+EVOLUTION_POOL_MAXSIZE = int(os.getenv('EVOLUTION_POOL_MAXSIZE', '20'))
+EVOLUTION_TIMEOUT_CONEXAO = float(os.getenv('EVOLUTION_TIMEOUT_CONEXAO', '5'))
+EVOLUTION_TIMEOUT_LEITURA = float(os.getenv('EVOLUTION_TIMEOUT_LEITURA', '30'))
+EVOLUTION_RETRIES = int(os.getenv('EVOLUTION_RETRIES', '3'))
+EVOLUTION_BACKOFF = float(os.getenv('EVOLUTION_BACKOFF', '0.5'))
+# Máximo de mensagens por segundo por instância (0 = sem limite), somando todos os
+# processos e workers: o limite fica no cache (compartilhado quando o cache é o Redis)
+EVOLUTION_RATE_LIMIT = float(os.getenv('EVOLUTION_RATE_LIMIT', '10'))
+
+# Estado da conexão do WhatsApp: cache da consulta e espera antes de tentar de novo quando desconectado
+EVOLUTION_ESTADO_TTL = int(os.getenv('EVOLUTION_ESTADO_TTL', '30'))
+EVOLUTION_ESPERA_RECONEXAO = int(os.getenv('EVOLUTION_ESPERA_RECONEXAO', '60'))
+
+# API do IXC Provedor
+IXC_API_URL = os.getenv('IXC_API_URL')
+IXCKEY = os.getenv('IXCKEY')
+IXC_TIMEOUT_CONEXAO = float(os.getenv('IXC_TIMEOUT_CONEXAO', '5'))
+IXC_TIMEOUT_LEITURA = float(os.getenv('IXC_TIMEOUT_LEITURA', '30'))
+IXC_POOL_MAXSIZE = int(os.getenv('IXC_POOL_MAXSIZE', '5'))
+IXC_RETRIES = int(os.getenv('IXC_RETRIES', '3'))
+IXC_BACKOFF = float(os.getenv('IXC_BACKOFF', '0.5'))
+# Registros por página nas listagens (iter_contratos)
+IXC_POR_PAGINA = int(os.getenv('IXC_POR_PAGINA', '500'))
+# Idade máxima (s) da cópia local de um contrato antes de consultar o IXC de novo
+IXC_ESPELHO_TTL = int(os.getenv('IXC_ESPELHO_TTL', '3600'))
+# Intervalo (s) da sincronização incremental do espelho pelo beat
+IXC_SINCRONIZACAO_INTERVALO = int(os.getenv('IXC_SINCRONIZACAO_INTERVALO', '3600'))
+
+# Conciliação IXC x contas a pagar: chaves do registro do contrato (JSON) usadas na comparação
+IXC_CAMPOS_CONCILIACAO = json.loads(os.getenv('IXC_CAMPOS_CONCILIACAO') or 'null') or {
+    'cpf_cnpj': 'cnpj_cpf',
+    'nome_razao': 'razao',
+    'valor': 'valor',
+    'vencimento': 'dia_fixo_vencimento',
+}
+# Status dos contratos considerados (separados por vírgula; 'A' = ativo)
+IXC_STATUS_CONCILIACAO = [status for status in os.getenv('IXC_STATUS_CONCILIACAO', 'A').split(',') if status]
+# Diferença de valor (R$) aceita sem gerar divergência
+CONCILIACAO_TOLERANCIA_VALOR = os.getenv('CONCILIACAO_TOLERANCIA_VALOR', '0.01')
+
+# Circuit breaker por endpoint: abre após N falhas seguidas e testa de novo após X segundos
+# (estado no cache, compartilhado entre os processos quando o cache é o Redis)
+CIRCUITO_LIMITE_FALHAS = int(os.getenv('CIRCUITO_LIMITE_FALHAS', '5'))
+CIRCUITO_TEMPO_ABERTO = int(os.getenv('CIRCUITO_TEMPO_ABERTO', '30'))
+# Bulkhead: chamadas simultâneas por upstream em cada processo e espera máxima por uma vaga
+BULKHEAD_LIMITES = {
+    'evolution': int(os.getenv('BULKHEAD_EVOLUTION', '20')),
+    'ixc': int(os.getenv('BULKHEAD_IXC', '5')),
+}
+BULKHEAD_ESPERA = float(os.getenv('BULKHEAD_ESPERA', '5'))
+
+# Fila de notificações (outbox)
+NOTIFICACAO_LOTE = int(os.getenv('NOTIFICACAO_LOTE', '50'))
+NOTIFICACAO_CONCORRENCIA = int(os.getenv('NOTIFICACAO_CONCORRENCIA', '10'))
+NOTIFICACAO_MAX_TENTATIVAS = int(os.getenv('NOTIFICACAO_MAX_TENTATIVAS', '5'))
+NOTIFICACAO_BACKOFF_SEGUNDOS = int(os.getenv('NOTIFICACAO_BACKOFF_SEGUNDOS', '60'))
+NOTIFICACAO_BACKOFF_MAXIMO = int(os.getenv('NOTIFICACAO_BACKOFF_MAXIMO', '3600'))
+
+# Resumo: alertas para o mesmo destinatário viram uma única mensagem (até N contas por mensagem)
+NOTIFICACAO_RESUMO = os.getenv('NOTIFICACAO_RESUMO', 'True') == 'True'
+NOTIFICACAO_RESUMO_MAXIMO = int(os.getenv('NOTIFICACAO_RESUMO_MAXIMO', '20'))
+
+# Despacho periódico da outbox: é ele que reenvia as notificações com retentativa
+# (backoff) e retoma as reservas expiradas.
+NOTIFICACAO_DESPACHO_INTERVALO = int(os.getenv('NOTIFICACAO_DESPACHO_INTERVALO', '60'))
+
+# Intervalo (s) do processamento da agenda de status (transições e alertas do dia)
+AGENDA_STATUS_INTERVALO = int(os.getenv('AGENDA_STATUS_INTERVALO', '3600'))
+
+# Hora (CELERY_TIMEZONE) da geração diária dos lembretes agendados (OcorrenciaLembrete)
+LEMBRETES_HORA = int(os.getenv('LEMBRETES_HORA', '8'))
+
+# Tarefas periódicas. O DatabaseScheduler copia estas entradas para o
+# django_celery_beat, onde os intervalos também podem ser ajustados pelo admin.
+CELERY_BEAT_SCHEDULE = {
+    'despachar-notificacoes': {
+        'task': 'main.apps.pay.tasks.despachar_notificacoes',
+        'schedule': NOTIFICACAO_DESPACHO_INTERVALO,
+    },
+    'processar-agenda-status': {
+        'task': 'main.apps.pay.tasks.processar_agenda_status',
+        'schedule': AGENDA_STATUS_INTERVALO,
+    },
+    'enviar-lembretes': {
+        'task': 'main.apps.pay.tasks.enviar_lembretes',
+        'schedule': crontab(hour=LEMBRETES_HORA, minute=0),
+    },
+    'sincronizar-contratos-ixc': {
+        'task': 'main.apps.pay.tasks.sincronizar_contratos_ixc',
+        'schedule': IXC_SINCRONIZACAO_INTERVALO,
+    },
+}
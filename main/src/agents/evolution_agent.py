@@ -1,6 +1,8 @@
 from django.conf import settings
 from main.src.httperro.http_erro import HttpErrors
 import requests
+from main.src.agents.http_session import get_session
+from main.src.agents.resiliencia import protegido
 
 
 
@@ -10,7 +12,15 @@ class Evolution():
     def __init__(self):
         self.__base_url = settings.EVOLUTION_API_URL
         self.__evolutionmasterkey = settings.EVOLUTIONMASTERKEY
+        self.__timeout = (settings.EVOLUTION_TIMEOUT_CONEXAO, settings.EVOLUTION_TIMEOUT_LEITURA)
+        self.__session = get_session(
+            'evolution',
+            pool_maxsize=settings.EVOLUTION_POOL_MAXSIZE,
+            retries=settings.EVOLUTION_RETRIES,
+            backoff_factor=settings.EVOLUTION_BACKOFF,
+        )
     
+    @protegido('evolution')
     def instance_create(self, name):
         
         headers = {
@@ -23,9 +33,10 @@ class Evolution():
             "groupsIgnore": False
         }
         
-        response = requests.post(
+        response = self.__session.post(
             url=f"{self.__base_url}/instance/create",
             headers=headers,
+            timeout=self.__timeout,
             json=json
         )
         status_code = response.status_code
@@ -41,16 +52,36 @@ class Evolution():
             )
             
     
+    @protegido('evolution')
     def instance_status(self, name, key):
         
         headers = {
             "apikey": f"{key}"
         }
 
-        response = requests.get(
-            url=f"{self.__base_url}/instance/connectionState/{name}",
-            headers=headers,
-        )
+        try:
+            response = self.__session.get(
+                url=f"{self.__base_url}/instance/connectionState/{name}",
+                headers=headers,
+                timeout=self.__timeout,
+            )
+        except requests.exceptions.Timeout:
+            raise HttpErrors(message="A requisição expirou. O servidor pode estar indisponível.", status_code=504)
+        
+        except requests.exceptions.ConnectionError:
+            raise HttpErrors(message="Erro de conexão com a API. O servidor pode estar fora do ar.", status_code=503)
+
+        except requests.exceptions.RequestException as e:
+            raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
+
+        # Erro do servidor conta como falha no circuito, como no envio
+        if response.status_code >= 500:
+            try:
+                error_response = response.json()
+            except requests.exceptions.JSONDecodeError:
+                error_response = "Erro desconhecido na API"
+            raise HttpErrors(message=error_response, status_code=response.status_code)
+
         data = {
             "status_code": response.status_code,
             "response": response.json()
@@ -58,15 +89,17 @@ class Evolution():
         return data
     
 
+    @protegido('evolution')
     def instance_connect(self, name, key):
         
         headers = {
             "apikey": f"{key}"
         }
 
-        response = requests.get(
+        response = self.__session.get(
             url=f"{self.__base_url}/instance/connect/{name}",
             headers=headers,
+            timeout=self.__timeout,
         )
 
         data = {
@@ -75,15 +108,17 @@ class Evolution():
         }
         return data
     
+    @protegido('evolution')
     def instance_desconect(self, name, key):
         
         headers = {
             "apikey": f"{key}"
         }
 
-        response = requests.delete(
+        response = self.__session.delete(
             url=f"{self.__base_url}/instance/logout/{name}",
             headers=headers,
+            timeout=self.__timeout,
         )
 
         data = {
@@ -92,15 +127,17 @@ class Evolution():
         }
         return data
     
+    @protegido('evolution')
     def instance_delete(self, name, key):
         
         headers = {
             "apikey": f"{key}"
         }
 
-        response = requests.delete(
+        response = self.__session.delete(
             url=f"{self.__base_url}/instance/delete/{name}",
             headers=headers,
+            timeout=self.__timeout,
         )
 
         data = {
@@ -109,6 +146,7 @@ class Evolution():
         }
         return data
     
+    @protegido('evolution')
     def instance_send_text(self, name, key, number, text):
         headers = {
             "apikey": f"{key}"
@@ -120,11 +158,22 @@ class Evolution():
         }
         
 
-        response = requests.post(
-            url=f"{self.__base_url}/message/sendText/{name}",
-            headers=headers,
-            json=json
-        )
+        try:
+            response = self.__session.post(
+                url=f"{self.__base_url}/message/sendText/{name}",
+                headers=headers,
+                timeout=self.__timeout,
+                json=json
+            )
+        except requests.exceptions.Timeout:
+            raise HttpErrors(message="A requisição expirou. O servidor pode estar indisponível.", status_code=504)
+        
+        except requests.exceptions.ConnectionError:
+            raise HttpErrors(message="Erro de conexão com a API. O servidor pode estar fora do ar.", status_code=503)
+
+        except requests.exceptions.RequestException as e:
+            raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
+
         status_code = response.status_code
         if ((status_code >= 200) and (status_code <= 299)):
             data = {
@@ -137,6 +186,7 @@ class Evolution():
                 message=response.json(), status_code=status_code
             )
     
+    @protegido('evolution')
     def instance_send_media(self, name, key, number, text, media_url, tipo):
         try:
             headers = {
@@ -152,11 +202,11 @@ class Evolution():
                     }
                     
                     
-            response = requests.post(
+            response = self.__session.post(
                 url=f"{self.__base_url}/message/sendMedia/{name}",
                 headers=headers,
                 json=json,
-                timeout=15
+                timeout=self.__timeout
             )
             response.raise_for_status() 
                     
@@ -180,6 +230,7 @@ class Evolution():
         except requests.exceptions.RequestException as e:
             raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
     
+    @protegido('evolution')
     def instance_create_group(self, name, key, nomedogrupo, participantes):
         try:
             headers = {
@@ -191,9 +242,10 @@ class Evolution():
                 "participants": participantes
             }
 
-            response = requests.post(
+            response = self.__session.post(
                     url=f"{self.__base_url}/group/create/{name}",
                     headers=headers,
+                    timeout=self.__timeout,
                     json=json
                 )
             
@@ -219,6 +271,7 @@ class Evolution():
         except requests.exceptions.RequestException as e:
             raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
     
+    @protegido('evolution')
     def instance_update_image_group(self, name, key,groupid,imageurl):
 
        
@@ -232,9 +285,10 @@ class Evolution():
                 "image": f'{signed_url}'
             }
 
-            response = requests.post(
+            response = self.__session.post(
                     url=f"{self.__base_url}/group/updateGroupPicture/{name}?groupJid={groupid}",
                     headers=headers,
+                    timeout=self.__timeout,
                     json=json
                 )
             
@@ -260,6 +314,7 @@ class Evolution():
         except requests.exceptions.RequestException as e:
             raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
     
+    @protegido('evolution')
     def instance_update_subject_group(self, name, key,groupid,groupname):
 
         try:
@@ -271,9 +326,10 @@ class Evolution():
                 "subject": f"{groupname}"
                 }
 
-            response = requests.post(
+            response = self.__session.post(
                     url=f"{self.__base_url}/group/updateGroupSubject/{name}?groupJid={groupid}",
                     headers=headers,
+                    timeout=self.__timeout,
                     json=json
                 )
         
@@ -299,6 +355,7 @@ class Evolution():
         except requests.exceptions.RequestException as e:
             raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
     
+    @protegido('evolution')
     def instance_update_description_group(self, name, key,groupid,description):
 
         try:
@@ -312,9 +369,10 @@ class Evolution():
             "description": f"{description}"
             }
 
-            response = requests.post(
+            response = self.__session.post(
                     url=f"{self.__base_url}/group/updateGroupDescription/{name}?groupJid={groupid}",
                     headers=headers,
+                    timeout=self.__timeout,
                     json=json
                 )
             print (response.text)
@@ -340,15 +398,17 @@ class Evolution():
         except requests.exceptions.RequestException as e:
             raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
     
+    @protegido('evolution')
     def instance_get_invite_group(self, name, key, groupid):
         try:
             headers = {
                 "apikey": f"{key}"
             }
 
-            response = requests.get(
+            response = self.__session.get(
                     url=f"{self.__base_url}/group/inviteCode/{name}?groupJid={groupid}",
                     headers=headers,
+                    timeout=self.__timeout,
                 )
             
             response.raise_for_status() 
@@ -374,6 +434,7 @@ class Evolution():
             raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
         
     
+    @protegido('evolution')
     def instance_send_invite_group(self, name, key, groupid):
         try:
             headers = {
@@ -386,9 +447,10 @@ class Evolution():
                 "numbers": [f'{groupid}']
             }
 
-            response = requests.post(
+            response = self.__session.post(
                     url=f"{self.__base_url}/group/sendInvite/{name}?groupJid={groupid}",
                     headers=headers,
+                    timeout=self.__timeout,
                     json=json
                 )
             
@@ -414,15 +476,17 @@ class Evolution():
         except requests.exceptions.RequestException as e:
             raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
         
+    @protegido('evolution')
     def instance_get_group(self, name, key):
         try:
             headers = {
                 "apikey": f"{key}"
             }
 
-            response = requests.get(
+            response = self.__session.get(
                     url=f"{self.__base_url}/group/fetchAllGroups/{name}?getParticipants=false",
                     headers=headers,
+                    timeout=self.__timeout,
                 )
             
             response.raise_for_status() 
@@ -0,0 +1,98 @@
+"""
+Envio em massa pela Evolution com asyncio.
+
+O asyncio aqui só coordena os envios (semáforo de concorrência, espera do
+limite de taxa com asyncio.sleep e ordem dos resultados): o HTTP continua
+síncrono. Cada envio é uma chamada bloqueante da sessão `requests` do
+Evolution (pool keep-alive) executada com asyncio.to_thread, e as idas ao
+cache (reserva do LimiteTaxa e estado das instâncias) também rodam em
+threads. Na prática é um pool de threads orquestrado pelo event loop: a
+concorrência real é o menor entre `concurrency` e o número de threads do
+executor, que send_text_many dimensiona para `concurrency`.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from main.src.agents.evolution_agent import Evolution
+from main.src.agents.evolution_pool import get_pool
+from main.src.agents.limite_taxa import limite_instancia
+
+
+class AsyncEvolution():
+    """
+    Contraparte assíncrona do Evolution para envios em massa. Cada envio roda
+    em uma thread (ver a docstring do módulo) reaproveitando a sessão HTTP do
+    Evolution, com concorrência limitada por semáforo e taxa limitada por
+    instância (LimiteTaxa, compartilhado com os demais processos pelo cache).
+    Mensagens sem instância definida são distribuídas pelo pool de instâncias.
+    """
+
+    def __init__(self, evolution=None, rate_limit=None, pool=None):
+        self.__ev = evolution or Evolution()
+        self.__rate_limit = settings.EVOLUTION_RATE_LIMIT if rate_limit is None else rate_limit
+        self.__pool = pool or get_pool()
+        self.__limitadores = {
+            instancia['name']: limite_instancia(instancia, self.__rate_limit)
+            for instancia in self.__pool.instancias
+        }
+
+    def __limitador(self, name):
+        if name not in self.__limitadores:
+            self.__limitadores[name] = limite_instancia({'name': name}, self.__rate_limit)
+        return self.__limitadores[name]
+
+    async def send_text(self, name, key, number, text):
+        await self.__limitador(name).aguardar_async()
+        return await asyncio.to_thread(self.__ev.instance_send_text, name, key, number, text)
+
+    async def send_text_many(self, messages, concurrency=10):
+        """
+        Envia várias mensagens concorrentemente. `messages` é uma lista de dicts
+        com `number` e `text` (e opcionalmente `name`/`key` da instância).
+        Retorna um resultado por mensagem, na mesma ordem:
+        {"ok": bool, "status_code": int, "instancia": name, "response": ... ou "erro": ...}.
+        """
+        semaforo = asyncio.Semaphore(concurrency)
+        # Estado das instâncias consultado uma vez por chamada (cache ou API: fora do event loop)
+        conectadas = await asyncio.to_thread(self.__pool.conectadas)
+
+        async def enviar(message):
+            if 'name' in message:
+                instancia = {'name': message['name'], 'key': message.get('key', settings.INSTANCE_KEY)}
+            else:
+                instancia = self.__pool.escolher(message['number'], conectadas)
+            if instancia is None:
+                return {"ok": False, "status_code": 503, "erro": "Nenhuma instância do WhatsApp conectada"}
+
+            async with semaforo:
+                try:
+                    data = await self.send_text(
+                        instancia['name'],
+                        instancia['key'],
+                        message['number'],
+                        message['text'],
+                    )
+                except Exception as e:
+                    return {
+                        "ok": False,
+                        "status_code": getattr(e, 'status_code', 500),
+                        "instancia": instancia['name'],
+                        "erro": getattr(e, 'message', str(e)),
+                    }
+                return {"ok": True, "instancia": instancia['name'], **data}
+
+        return await asyncio.gather(*(enviar(message) for message in messages))
+
+
+def send_text_many(messages, concurrency=10, evolution=None, pool=None):
+    """
+    Atalho síncrono (para tasks do Celery) de AsyncEvolution.send_text_many,
+    com um executor de `concurrency` threads para os envios (o padrão do
+    asyncio tem no máximo min(32, CPUs + 4)).
+    """
+    async def enviar():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+        return await AsyncEvolution(evolution, pool=pool).send_text_many(messages, concurrency=concurrency)
+
+    return asyncio.run(enviar())
@@ -0,0 +1,189 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class ServidorEvolutionFake():
+    """
+    Servidor HTTP local que imita a Evolution API para testes de carga e
+    desenvolvimento (não envia nada ao WhatsApp). Atende sendText,
+    sendMedia, connectionState e os endpoints de grupo usados pelo
+    Evolution, com latência, taxa de erro (500) e limite de requisições
+    por segundo por instância (429) configuráveis.
+    """
+
+    def __init__(self, host='127.0.0.1', porta=0, latencia=0.0, variacao=0.0,
+                 taxa_erro=0.0, limite_por_segundo=0, estado='open'):
+        self.latencia = latencia
+        self.variacao = variacao
+        self.taxa_erro = taxa_erro
+        self.limite_por_segundo = limite_por_segundo
+        self.estado = estado
+        self.contadores = {}
+        self.duracoes = []
+        self.__janelas = {}
+        self.__lock = threading.Lock()
+        self.__thread = None
+
+        servidor = self
+
+        class Handler(_HandlerEvolution):
+            fake = servidor
+
+        self.__httpd = ThreadingHTTPServer((host, porta), Handler)
+        self.__httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, porta = self.__httpd.server_address[:2]
+        return f'http://{host}:{porta}'
+
+    def iniciar(self):
+        self.__thread = threading.Thread(target=self.__httpd.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def servir(self):
+        self.__httpd.serve_forever()
+
+    def parar(self):
+        self.__httpd.shutdown()
+        self.__httpd.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+    def _contar(self, chave):
+        with self.__lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + 1
+
+    def _registrar_duracao(self, duracao):
+        with self.__lock:
+            self.duracoes.append(duracao)
+
+    def _limitado(self, instancia):
+        """Janela fixa de 1 segundo por instância."""
+        if not self.limite_por_segundo:
+            return False
+        segundo = int(time.monotonic())
+        with self.__lock:
+            janela, total = self.__janelas.get(instancia, (segundo, 0))
+            if janela != segundo:
+                janela, total = segundo, 0
+            self.__janelas[instancia] = (janela, total + 1)
+            return total >= self.limite_por_segundo
+
+    def _aguardar(self):
+        atraso = self.latencia + (random.uniform(-self.variacao, self.variacao) if self.variacao else 0)
+        if atraso > 0:
+            time.sleep(atraso)
+
+
+def _mensagem_enviada(instancia, corpo):
+    return {
+        'key': {
+            'remoteJid': f"{corpo.get('number', '')}@s.whatsapp.net",
+            'fromMe': True,
+            'id': uuid.uuid4().hex[:20].upper(),
+        },
+        'message': {'conversation': corpo.get('text') or corpo.get('caption', '')},
+        'messageTimestamp': int(time.time()),
+        'status': 'PENDING',
+        'instance': instancia,
+    }
+
+
+def _grupo(corpo):
+    return {
+        'id': f'{uuid.uuid4().int % 10 ** 18}@g.us',
+        'subject': corpo.get('subject', ''),
+        'size': len(corpo.get('participants', [])) + 1,
+        'creation': int(time.time()),
+    }
+
+
+# (método, endpoint) -> (status, função que monta a resposta a partir da instância e do corpo)
+ROTAS = {
+    ('POST', 'message/sendText'): (201, _mensagem_enviada),
+    ('POST', 'message/sendMedia'): (201, _mensagem_enviada),
+    ('POST', 'group/create'): (201, lambda instancia, corpo: _grupo(corpo)),
+    ('POST', 'group/updateGroupPicture'): (201, lambda instancia, corpo: {'update': 'success'}),
+    ('POST', 'group/updateGroupSubject'): (201, lambda instancia, corpo: {'update': 'success'}),
+    ('POST', 'group/updateGroupDescription'): (201, lambda instancia, corpo: {'update': 'success'}),
+    ('GET', 'group/inviteCode'): (
+        200, lambda instancia, corpo: {'inviteUrl': 'https://chat.whatsapp.com/FAKE', 'inviteCode': 'FAKE'}
+    ),
+    ('POST', 'group/sendInvite'): (201, lambda instancia, corpo: {'send': True}),
+    ('GET', 'group/fetchAllGroups'): (200, lambda instancia, corpo: []),
+}
+
+PADRAO_ROTA = re.compile(r'^/(?P<endpoint>\w+/\w+)/(?P<instancia>[^/]+)$')
+
+
+class _HandlerEvolution(BaseHTTPRequestHandler):
+    fake = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _corpo(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        if not tamanho:
+            return {}
+        try:
+            return json.loads(self.rfile.read(tamanho))
+        except ValueError:
+            return {}
+
+    def _tratar(self, metodo):
+        inicio = time.perf_counter()
+        corpo = self._corpo()
+        rota = PADRAO_ROTA.match(urlsplit(self.path).path)
+        if rota is None:
+            return self._responder(404, {'status': 404, 'error': 'Not Found', 'response': {'message': [self.path]}})
+
+        endpoint, instancia = rota['endpoint'], rota['instancia']
+        self.fake._contar(endpoint)
+        self.fake._aguardar()
+
+        if (metodo, endpoint) == ('GET', 'instance/connectionState'):
+            self._responder(200, {'instance': {'instanceName': instancia, 'state': self.fake.estado}})
+        elif (metodo, endpoint) not in ROTAS:
+            self._responder(404, {'status': 404, 'error': 'Not Found', 'response': {'message': [self.path]}})
+        elif self.fake._limitado(instancia):
+            self.fake._contar('429')
+            self._responder(429, {'status': 429, 'error': 'Too Many Requests', 'response': {'message': ['Rate limit']}})
+        elif self.fake.taxa_erro and random.random() < self.fake.taxa_erro:
+            self.fake._contar('500')
+            self._responder(500, {'status': 500, 'error': 'Internal Server Error', 'response': {'message': ['Falha simulada']}})
+        else:
+            status, resposta = ROTAS[(metodo, endpoint)]
+            self._responder(status, resposta(instancia, corpo))
+
+        self.fake._registrar_duracao(time.perf_counter() - inicio)
+
+    def do_GET(self):
+        self._tratar('GET')
+
+    def do_POST(self):
+        self._tratar('POST')
+
+    def do_DELETE(self):
+        self._tratar('DELETE')
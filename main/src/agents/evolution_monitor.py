@@ -0,0 +1,47 @@
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from main.src.agents.evolution_agent import Evolution
+from main.src.httperro.http_erro import HttpErrors
+
+
+# Estado retornado pela Evolution quando o WhatsApp está conectado
+ESTADO_CONECTADO = 'open'
+
+# Estado usado quando a própria API da Evolution não respondeu
+ESTADO_INDISPONIVEL = 'indisponivel'
+
+
+def _chave_estado(name):
+    return f'evolution:estado:{name}'
+
+
+def estado_instancia(name=None, key=None, evolution=None, forcar=False):
+    """
+    Estado da conexão da instância ('open', 'close', 'connecting' ou
+    'indisponivel'), consultado em /instance/connectionState e guardado no
+    cache por EVOLUTION_ESTADO_TTL segundos para que as tasks possam
+    verificá-lo a cada envio sem chamar a API.
+    """
+    name = name or settings.INSTANCE_NAME
+    key = key or settings.INSTANCE_KEY
+
+    estado = None if forcar else cache.get(_chave_estado(name))
+    if estado is not None:
+        return estado
+
+    try:
+        data = (evolution or Evolution()).instance_status(name, key)
+        if 200 <= data['status_code'] <= 299:
+            estado = data['response'].get('instance', {}).get('state') or ESTADO_INDISPONIVEL
+        else:
+            estado = ESTADO_INDISPONIVEL
+    except (requests.exceptions.RequestException, HttpErrors, ValueError, AttributeError):
+        estado = ESTADO_INDISPONIVEL
+
+    cache.set(_chave_estado(name), estado, settings.EVOLUTION_ESTADO_TTL)
+    return estado
+
+
+def instancia_conectada(name=None, key=None, evolution=None):
+    return estado_instancia(name, key, evolution) == ESTADO_CONECTADO
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import math
+import os
+import threading
+
+from django.conf import settings
+from main.src.agents.evolution_monitor import instancia_conectada
+
+
+class PoolInstancias():
+    """
+    Escolhe a instância da Evolution usada em cada envio entre as
+    configuradas em EVOLUTION_INSTANCIAS, ignorando as desconectadas
+    (failover pelo monitor de conexão). Estratégias:
+
+    - 'round_robin': round-robin ponderado (suave) pelo `peso`;
+    - 'hash': hashing por destinatário (rendezvous ponderado), mantendo cada
+      contato sempre na mesma instância enquanto ela estiver conectada.
+    """
+
+    def __init__(self, instancias=None, estrategia=None):
+        self.__instancias = [
+            {'peso': 1, 'rate_limit': None, **instancia}
+            for instancia in (instancias or settings.EVOLUTION_INSTANCIAS)
+        ]
+        self.__estrategia = estrategia or settings.EVOLUTION_ESTRATEGIA
+        self.__atual = {instancia['name']: 0 for instancia in self.__instancias}
+        self.__lock = threading.Lock()
+
+    @property
+    def instancias(self):
+        return list(self.__instancias)
+
+    def conectadas(self):
+        return [
+            instancia for instancia in self.__instancias
+            if instancia_conectada(instancia['name'], instancia['key'])
+        ]
+
+    def __round_robin(self, candidatas):
+        # Smooth weighted round-robin: distribui proporcionalmente ao peso sem rajadas
+        with self.__lock:
+            total = 0
+            escolhida = None
+            for instancia in candidatas:
+                self.__atual[instancia['name']] += instancia['peso']
+                total += instancia['peso']
+                if escolhida is None or self.__atual[instancia['name']] > self.__atual[escolhida['name']]:
+                    escolhida = instancia
+            self.__atual[escolhida['name']] -= total
+            return escolhida
+
+    @staticmethod
+    def __hash(candidatas, numero):
+        def pontuacao(instancia):
+            digest = hashlib.sha1(f"{instancia['name']}:{numero}".encode()).digest()
+            fracao = (int.from_bytes(digest[:8], 'big') + 1) / (2 ** 64 + 2)
+            return -instancia['peso'] / math.log(fracao)
+
+        return max(candidatas, key=pontuacao)
+
+    def escolher(self, numero=None, candidatas=None):
+        """
+        Instância para enviar a `numero` entre `candidatas` (por padrão as
+        conectadas agora). Retorna None se nenhuma estiver disponível.
+        """
+        candidatas = self.conectadas() if candidatas is None else candidatas
+        if not candidatas:
+            return None
+        if self.__estrategia == 'hash' and numero:
+            return self.__hash(candidatas, numero)
+        return self.__round_robin(candidatas)
+
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    PoolInstancias compartilhado pelo processo (como get_session), para que
+    o estado do round-robin ponderado se mantenha entre os envios. O pool é
+    recriado após um fork e quando a configuração das instâncias muda.
+    """
+    chave = (
+        os.getpid(),
+        settings.EVOLUTION_ESTRATEGIA,
+        json.dumps(settings.EVOLUTION_INSTANCIAS, sort_keys=True),
+    )
+    pool = _pools.get(chave)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(chave)
+            if pool is None:
+                pool = PoolInstancias()
+                _pools[chave] = pool
+    return pool
+
+
+def alguma_instancia_conectada():
+    return bool(get_pool().conectadas())
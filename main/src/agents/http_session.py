@@ -0,0 +1,51 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+_sessoes = {}
+_lock = threading.Lock()
+
+
+def _criar_sessao(pool_maxsize, retries, backoff_factor, status_forcelist):
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        # Timeout de leitura não é repetido: o POST pode ter sido processado
+        read=0,
+        status=retries,
+        status_forcelist=status_forcelist,
+        # 502/503/504 só são repetidos em métodos idempotentes: um POST (sendText)
+        # pode já ter sido entregue, e a retentativa dele fica com a outbox
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        backoff_factor=backoff_factor,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    sessao = requests.Session()
+    sessao.mount('http://', adapter)
+    sessao.mount('https://', adapter)
+    return sessao
+
+
+def get_session(nome, pool_maxsize=10, retries=3, backoff_factor=0.5, status_forcelist=(502, 503, 504)):
+    """
+    Retorna a Session (keep-alive, pool de conexões e retry com backoff)
+    compartilhada pelo processo para o cliente `nome`. Falhas de conexão
+    são repetidas em qualquer método; respostas de `status_forcelist`,
+    só nos idempotentes. A sessão é recriada
+    após um fork (workers prefork do Celery) para não compartilhar sockets.
+    """
+    chave = (nome, os.getpid())
+    sessao = _sessoes.get(chave)
+    if sessao is None:
+        with _lock:
+            sessao = _sessoes.get(chave)
+            if sessao is None:
+                sessao = _criar_sessao(pool_maxsize, retries, backoff_factor, status_forcelist)
+                _sessoes[chave] = sessao
+    return sessao
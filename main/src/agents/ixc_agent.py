@@ -1,6 +1,15 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
 from django.conf import settings
 import requests
 from main.src.httperro.http_erro import HttpErrors
+from main.src.agents.http_session import get_session
+from main.src.agents.resiliencia import protegido
+
+
+# Quantidade máxima de ids em cada filtro IN (listas maiores são divididas)
+MAXIMO_IDS_FILTRO = 500
 
 
 
@@ -9,7 +18,15 @@ class IXC():
     def __init__(self):
         self.__base_url = settings.IXC_API_URL
         self.__ixckey = settings.IXCKEY
+        self.__timeout = (settings.IXC_TIMEOUT_CONEXAO, settings.IXC_TIMEOUT_LEITURA)
+        self.__session = get_session(
+            'ixc',
+            pool_maxsize=settings.IXC_POOL_MAXSIZE,
+            retries=settings.IXC_RETRIES,
+            backoff_factor=settings.IXC_BACKOFF,
+        )
     
+    @protegido('ixc')
     def get_contratos(self, contratoid):
         try:
             headers = {
@@ -29,9 +46,10 @@ class IXC():
             }
 
 
-            response = requests.get(
+            response = self.__session.get(
                 url=f'{self.__base_url}/webservice/v1/cliente_contrato',
                 headers=headers,
+                timeout=self.__timeout,
                 json=json_data
             )
     
@@ -58,4 +76,111 @@ class IXC():
         except requests.exceptions.RequestException as e:
             raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
 
-      
\ No newline at end of file
+    @protegido('ixc')
+    def listar_pagina(self, tabela, pagina=1, por_pagina=None, filtros=None, ordenar_por=None, ordem='asc', apos_id=0):
+        """
+        Uma página da listagem de `tabela` (ex.: 'cliente_contrato') com os
+        registros de id maior que `apos_id`. `filtros` é uma lista de
+        (campo, operador, valor), com operadores '=', '!=', '>', '<', '>=',
+        '<=', 'L' (like) ou 'IN' (valor lista); todos são combinados com E
+        via grid_param.
+        """
+        try:
+            headers = {
+                'ixcsoft': 'listar',
+                'Content-Type': 'application/json',
+                'Authorization': F'Basic {self.__ixckey}',
+            }
+
+            json_data = {
+                'qtype': f'{tabela}.id',
+                'query': f'{apos_id}',
+                'oper': '>',
+                'page': f'{pagina}',
+                'rp': f'{por_pagina or settings.IXC_POR_PAGINA}',
+                'sortname': ordenar_por or f'{tabela}.id',
+                'sortorder': ordem,
+            }
+            if filtros:
+                json_data['grid_param'] = json.dumps([
+                    {
+                        'TB': campo,
+                        'OP': operador,
+                        'P': ','.join(str(item) for item in valor) if operador == 'IN' else f'{valor}',
+                    }
+                    for campo, operador, valor in filtros
+                ])
+
+            response = self.__session.get(
+                url=f'{self.__base_url}/webservice/v1/{tabela}',
+                headers=headers,
+                timeout=self.__timeout,
+                json=json_data
+            )
+
+            response.raise_for_status()
+
+            return {
+                "status_code": response.status_code,
+                "response": response.json()
+            }
+        except requests.exceptions.Timeout:
+            raise HttpErrors(message="A requisição expirou. O servidor pode estar indisponível.", status_code=504)
+
+        except requests.exceptions.ConnectionError:
+            raise HttpErrors(message="Erro de conexão com a API. O servidor pode estar fora do ar.", status_code=503)
+
+        except requests.exceptions.HTTPError as e:
+            try:
+                error_response = response.json()
+            except requests.exceptions.JSONDecodeError:
+                error_response = "Erro desconhecido na API"
+            raise HttpErrors(message=error_response, status_code=response.status_code)
+
+        except requests.exceptions.RequestException as e:
+            raise HttpErrors(message=f"Erro na requisição: {str(e)}", status_code=500)
+
+    def iter_registros(self, tabela, filtros=None, por_pagina=None):
+        """
+        Gerador com todos os registros de `tabela` que atendem aos filtros,
+        em ordem de id. A paginação é por chave (id maior que o último da
+        página anterior), não por número de página: registros incluídos,
+        alterados ou excluídos durante a leitura não deslocam as páginas
+        seguintes, então nenhum é pulado nem repetido. A próxima página é
+        buscada em segundo plano enquanto quem chamou processa a atual.
+        """
+        por_pagina = por_pagina or settings.IXC_POR_PAGINA
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        def buscar(apos_id):
+            return executor.submit(self.listar_pagina, tabela, 1, por_pagina, filtros, apos_id=apos_id)
+
+        try:
+            proxima = buscar(0)
+            while proxima is not None:
+                registros = proxima.result()['response'].get('registros') or []
+
+                proxima = None
+                if len(registros) == por_pagina:
+                    proxima = buscar(int(registros[-1]['id']))
+
+                yield from registros
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_contratos(self, filtros=None, ids=None, por_pagina=None):
+        """
+        Gerador de contratos (cliente_contrato) em ordem de id, em páginas
+        de `por_pagina`.
+        Ex.: filtros=[('cliente_contrato.id', '>=', 1000), ('cliente_contrato.id', '<', 2000)]
+        para uma faixa, ou ids=[...] para buscar vários contratos de uma vez.
+        """
+        filtros = list(filtros or [])
+        if ids is None:
+            yield from self.iter_registros('cliente_contrato', filtros, por_pagina)
+            return
+
+        ids = sorted(ids)
+        for inicio in range(0, len(ids), MAXIMO_IDS_FILTRO):
+            filtro_ids = ('cliente_contrato.id', 'IN', ids[inicio:inicio + MAXIMO_IDS_FILTRO])
+            yield from self.iter_registros('cliente_contrato', [*filtros, filtro_ids], por_pagina)
@@ -0,0 +1,75 @@
+import asyncio
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# Janelas à frente em que se procura uma vaga antes de desistir de espaçar o envio
+MAXIMO_JANELAS = 60
+
+
+class LimiteTaxa():
+    """
+    Limite de envios por segundo de uma instância, compartilhado entre
+    threads, processos e workers pelo cache (Redis em produção). O tempo é
+    dividido em janelas de 1 segundo (ou de 1/taxa, para taxas menores que
+    1/s) e cada envio reserva, com um incremento atômico no cache, a
+    próxima posição livre: a posição define quanto o envio espera, o que
+    espaça as mensagens uniformemente dentro da janela.
+    """
+
+    def __init__(self, nome, por_segundo):
+        self.nome = nome
+        self.por_segundo = por_segundo or 0
+        self.__duracao = max(1.0, 1 / self.por_segundo) if self.por_segundo else 0
+        self.__capacidade = max(1, math.floor(self.por_segundo * self.__duracao)) if self.por_segundo else 0
+
+    def __chave(self, janela):
+        return f'evolution:taxa:{self.nome}:{janela}'
+
+    def __posicao(self, janela):
+        chave = self.__chave(janela)
+        timeout = math.ceil(self.__duracao * (MAXIMO_JANELAS + 2))
+        cache.add(chave, 0, timeout=timeout)
+        try:
+            return cache.incr(chave) - 1
+        except ValueError:
+            # A chave expirou entre o add e o incr
+            cache.add(chave, 1, timeout=timeout)
+            return 0
+
+    def reservar(self, agora=None):
+        """Reserva a vez de um envio e retorna quantos segundos esperar por ela."""
+        if not self.por_segundo:
+            return 0.0
+        agora = time.time() if agora is None else agora
+        primeira = int(agora // self.__duracao)
+        for janela in range(primeira, primeira + MAXIMO_JANELAS):
+            posicao = self.__posicao(janela)
+            if posicao < self.__capacidade:
+                return max(0.0, janela * self.__duracao + posicao / self.por_segundo - agora)
+        return MAXIMO_JANELAS * self.__duracao
+
+    def aguardar(self):
+        espera = self.reservar()
+        if espera > 0:
+            time.sleep(espera)
+
+    async def aguardar_async(self):
+        # A reserva é uma ida ao cache (bloqueante): roda em uma thread para não travar o event loop
+        espera = await asyncio.to_thread(self.reservar)
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+def limite_instancia(instancia, por_segundo=None):
+    """
+    LimiteTaxa de uma instância do pool: o `rate_limit` dela ou, sem ele,
+    `por_segundo` (padrão EVOLUTION_RATE_LIMIT).
+    """
+    taxa = instancia.get('rate_limit')
+    if taxa is None:
+        taxa = settings.EVOLUTION_RATE_LIMIT if por_segundo is None else por_segundo
+    return LimiteTaxa(instancia['name'], taxa)
@@ -0,0 +1,176 @@
+import functools
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from main.src.httperro.http_erro import HttpErrors
+
+
+logger = logging.getLogger(__name__)
+
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+MEIO_ABERTO = 'meio_aberto'
+
+CAMPOS_METRICAS = ('aberturas', 'fechamentos', 'rejeitadas')
+
+
+def _contar(nome, campo):
+    chave = f'circuito:{nome}:{campo}'
+    cache.add(chave, 0, timeout=None)
+    cache.incr(chave)
+
+
+def metricas_circuito(nome):
+    """Contadores acumulados do circuito: aberturas, fechamentos e chamadas rejeitadas."""
+    return {campo: cache.get(f'circuito:{nome}:{campo}', 0) for campo in CAMPOS_METRICAS}
+
+
+def _eh_falha(erro):
+    # Erros 4xx mostram que o upstream está respondendo: não abrem o circuito
+    return not (isinstance(erro, HttpErrors) and erro.status_code < 500)
+
+
+class CircuitBreaker():
+    """
+    Circuito por endpoint, com o estado no cache (Redis em produção) para
+    ser compartilhado por todos os processos e workers. Após
+    `limite_falhas` falhas seguidas abre e rejeita as chamadas por
+    `tempo_aberto` segundos; depois deixa passar uma única chamada de teste
+    (meio aberto), que fecha o circuito se der certo ou o reabre se falhar.
+    """
+
+    def __init__(self, nome, limite_falhas=None, tempo_aberto=None):
+        self.nome = nome
+        self.limite_falhas = limite_falhas or settings.CIRCUITO_LIMITE_FALHAS
+        self.tempo_aberto = tempo_aberto or settings.CIRCUITO_TEMPO_ABERTO
+        self.__chave_aberto_em = f'circuito:{nome}:aberto_em'
+        self.__chave_falhas = f'circuito:{nome}:falhas'
+        self.__chave_teste = f'circuito:{nome}:teste'
+
+    @property
+    def estado(self):
+        aberto_em = cache.get(self.__chave_aberto_em)
+        if aberto_em is None:
+            return FECHADO
+        if cache.get(self.__chave_teste) or time.time() - aberto_em >= self.tempo_aberto:
+            return MEIO_ABERTO
+        return ABERTO
+
+    def permitir(self):
+        aberto_em = cache.get(self.__chave_aberto_em)
+        if aberto_em is None:
+            return True
+        # Só um processo consegue a vaga da chamada de teste
+        if time.time() - aberto_em >= self.tempo_aberto and cache.add(
+            self.__chave_teste, True, timeout=self.tempo_aberto
+        ):
+            logger.warning('Circuito %s: %s -> %s', self.nome, ABERTO, MEIO_ABERTO)
+            return True
+        _contar(self.nome, 'rejeitadas')
+        return False
+
+    def registrar_sucesso(self):
+        valores = cache.get_many([self.__chave_aberto_em, self.__chave_falhas])
+        if self.__chave_falhas in valores:
+            cache.delete(self.__chave_falhas)
+        if self.__chave_aberto_em in valores:
+            cache.delete_many([self.__chave_aberto_em, self.__chave_teste])
+            logger.warning('Circuito %s: %s -> %s', self.nome, MEIO_ABERTO, FECHADO)
+            _contar(self.nome, 'fechamentos')
+
+    def registrar_falha(self):
+        if cache.get(self.__chave_teste):
+            # A chamada de teste falhou: reabre por mais `tempo_aberto` segundos
+            cache.set(self.__chave_aberto_em, time.time(), timeout=None)
+            cache.delete(self.__chave_teste)
+            logger.warning('Circuito %s: %s -> %s', self.nome, MEIO_ABERTO, ABERTO)
+            _contar(self.nome, 'aberturas')
+            return
+
+        cache.add(self.__chave_falhas, 0, timeout=None)
+        falhas = cache.incr(self.__chave_falhas)
+        if falhas >= self.limite_falhas and cache.add(self.__chave_aberto_em, time.time(), timeout=None):
+            cache.delete(self.__chave_falhas)
+            logger.warning('Circuito %s: %s -> %s', self.nome, FECHADO, ABERTO)
+            _contar(self.nome, 'aberturas')
+
+
+class Bulkhead():
+    """
+    Limita as chamadas simultâneas a um upstream dentro de um processo.
+    É intencionalmente local: protege as threads e conexões do próprio
+    processo (o limite total é o limite vezes a quantidade de processos).
+    """
+
+    def __init__(self, nome, limite, espera=None):
+        self.nome = nome
+        self.espera = settings.BULKHEAD_ESPERA if espera is None else espera
+        self.__semaforo = threading.BoundedSemaphore(limite)
+
+    def __enter__(self):
+        if not self.__semaforo.acquire(timeout=self.espera):
+            raise HttpErrors(
+                message=f"Limite de chamadas simultâneas para {self.nome} atingido.", status_code=503
+            )
+        return self
+
+    def __exit__(self, *exc):
+        self.__semaforo.release()
+
+
+_circuitos = {}
+_bulkheads = {}
+_lock = threading.Lock()
+
+
+def circuito(nome):
+    # O estado fica no cache: o objeto só guarda a configuração
+    with _lock:
+        if nome not in _circuitos:
+            _circuitos[nome] = CircuitBreaker(nome)
+        return _circuitos[nome]
+
+
+# Como as sessões HTTP, o bulkhead é por processo (recriado após o fork dos workers)
+def bulkhead(upstream):
+    chave = (upstream, os.getpid())
+    with _lock:
+        if chave not in _bulkheads:
+            _bulkheads[chave] = Bulkhead(upstream, settings.BULKHEAD_LIMITES.get(upstream, 10))
+        return _bulkheads[chave]
+
+
+def protegido(upstream, endpoint=None):
+    """
+    Decorator para os métodos dos agents: bulkhead por upstream e circuito
+    por endpoint (`upstream:endpoint`, por padrão o nome do método). Com o
+    circuito aberto a chamada falha na hora com HttpErrors 503.
+    """
+    def decorator(metodo):
+        nome = f'{upstream}:{endpoint or metodo.__name__}'
+
+        @functools.wraps(metodo)
+        def wrapper(*args, **kwargs):
+            disjuntor = circuito(nome)
+            if not disjuntor.permitir():
+                raise HttpErrors(
+                    message=f"Circuito aberto para {nome}: o serviço está indisponível.", status_code=503
+                )
+            with bulkhead(upstream):
+                try:
+                    resultado = metodo(*args, **kwargs)
+                except Exception as e:
+                    if _eh_falha(e):
+                        disjuntor.registrar_falha()
+                    else:
+                        disjuntor.registrar_sucesso()
+                    raise
+            disjuntor.registrar_sucesso()
+            return resultado
+
+        return wrapper
+    return decorator